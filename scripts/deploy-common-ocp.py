@@ -2,10 +2,10 @@ import schedule
 import datetime
 import time
 import os
-import yaml
+from src.utility.serialization import yaml_load
 
 with open('./config/env.yaml', 'r') as env_file:
-    environment = yaml.safe_load(env_file)
+    environment = yaml_load(env_file)
 
 def get_suffix():
     nowtime = datetime.datetime.now()
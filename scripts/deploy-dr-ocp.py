@@ -2,10 +2,10 @@ import schedule
 import datetime
 import time
 import os
-import yaml
+from src.utility.serialization import yaml_load
 
 with open('./config/env.dr.yaml', 'r') as env_file:
-    environment = yaml.safe_load(env_file)
+    environment = yaml_load(env_file)
 
 def get_suffix():
     nowtime = datetime.datetime.now()
@@ -34,13 +34,16 @@ def job_submariner():
     try:
         print("executing")
         suffix = get_suffix()
-        multicluster_cmd =  "deploy-ocp multicluster 2"
+        # Rerun of the same clusters with the same conf files, so that the
+        # phases which already succeeded (e.g. OCP and ODF) are skipped and
+        # the failed ones (e.g. submariner) are retried
+        multicluster_cmd =  "deploy-ocp multicluster 2 --resume"
         if 'webhook_url' in environment:
             multicluster_cmd += f" --webhook-url '{environment['webhook_url']}'"
         if 'email_ids' in environment:
             multicluster_cmd += f" --email-ids {environment['email_ids']}"
-        deploy_cmd = multicluster_cmd + (f" --cluster1 --cluster-name dr1-{suffix} --cluster-path /tmp/dr1-{suffix} --ocp4mcoci-conf {environment['ocp_sub_config']}"
-            f" --cluster2 --cluster-name dr2-{suffix} --cluster-path /tmp/dr2-{suffix} --ocp4mcoci-conf {environment['ocp_hub_sub_config']}"
+        deploy_cmd = multicluster_cmd + (f" --cluster1 --cluster-name dr1-{suffix} --cluster-path /tmp/dr1-{suffix} --ocp4mcoci-conf {environment['ocp_config']}"
+            f" --cluster2 --cluster-name dr2-{suffix} --cluster-path /tmp/dr2-{suffix} --ocp4mcoci-conf {environment['ocp_hub_config']}"
         )
         os.system(deploy_cmd)
     except Exception:
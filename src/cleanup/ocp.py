@@ -1,12 +1,12 @@
 import logging
 import argparse
 import os
-import multiprocessing as mp
 
 from src.utility.constants import BASIC_FORMAT
 from src.framework import config
 from src.utility import utils
 from src.utility.exceptions import CommandFailed
+from src.utility.executor import ProcessExecutor
 from src.deployment.submariner import remove_aws_policy
 
 logging.basicConfig(format=BASIC_FORMAT, level=logging.DEBUG)
@@ -30,6 +30,7 @@ def destroy_ocp(
                 log_level=log_cli_level,
             ),
             timeout=3600,
+            stream=True,
         )
     except CommandFailed as ex:
         logger.error("Unable to destroy ocp cluster.")
@@ -53,14 +54,15 @@ def cluster_cleanup():
     is_managed_cluster = args.is_managed_cluster
     bin_dir = os.path.expanduser(config.RUN["bin_dir"])
     oc_bin = os.path.join(bin_dir, "openshift-install")
-    processes = []
+    executor = ProcessExecutor()
     for cluster_path in cluster_paths:
-        p = mp.Process(
-            target=destroy_ocp, args=(oc_bin, cluster_path, is_managed_cluster)
+        executor.submit(
+            cluster_path, destroy_ocp, oc_bin, cluster_path, is_managed_cluster
         )
-        processes.append(p)
-    if len(processes) > 0:
-        [proc.start() for proc in processes]
-        # complete the processes
-        for proc in processes:
-            proc.join()
+    for result in executor.wait_all().values():
+        if result.success:
+            logger.info(
+                f"Cleanup of {result.name} finished in {int(result.duration)} seconds"
+            )
+        else:
+            logger.error(f"Cleanup of {result.name} failed: {result.error}")
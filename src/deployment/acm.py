@@ -3,7 +3,6 @@ import os
 import base64
 import tempfile
 import time
-from subprocess import PIPE, Popen
 
 from src.framework import config
 from src.ocs.resources.package_manifest import PackageManifest
@@ -116,18 +115,10 @@ class ACMDeployment(OperatorDeployment):
 
         logger.info("Running open-cluster-management deploy")
         cmd = ["./start.sh", "--silent"]
-        logger.info("Running cmd: %s", " ".join(cmd))
-        proc = Popen(
-            cmd,
-            cwd=acm_hub_deploy_dir,
-            stdout=PIPE,
-            stderr=PIPE,
-            encoding="utf-8",
-        )
-        stdout, stderr = proc.communicate()
-        logger.info(stdout)
-        if proc.returncode:
-            logger.error(stderr)
+        try:
+            exec_cmd(cmd, timeout=None, cwd=acm_hub_deploy_dir, stream=True)
+        except CommandFailed as ex:
+            logger.error(ex)
             raise CommandFailed("open-cluster-management deploy script error")
 
         self.validate_acm_hub_install()
@@ -1,12 +1,11 @@
 import logging
-import tempfile
 import base64
-import yaml
 
 from src.framework import config
 from src.deployment.oadp import OADPDeployment
 from src.utility import constants
 from src.utility import templating
+from src.utility.serialization import yaml_dump, yaml_load
 from src.utility.utils import (
     get_non_acm_cluster_config,
     get_primary_cluster_config,
@@ -31,6 +30,13 @@ class DiscoveredDR(OADPDeployment):
         # deploy OADP operator
         self.do_deploy_oadp()
 
+        self.configure()
+
+    def configure(self):
+        """
+        Configure DR on the ACM cluster, OADP operator has to be deployed
+        on the managed clusters
+        """
         # Configure mirror peer
         self._configure_mirror_peer()
 
@@ -48,9 +54,6 @@ class DiscoveredDR(OADPDeployment):
         if odf_running_version < VERSION_4_19:
             mirror_peer = constants.MIRROR_PEER_RDR_OLD
         mirror_peer_data = templating.load_yaml(mirror_peer)
-        mirror_peer_yaml = tempfile.NamedTemporaryFile(
-            mode="w+", prefix="mirror_peer", delete=False
-        )
         # Update all the participating clusters in mirror_peer_yaml
         non_acm_clusters = get_non_acm_cluster_config(include_acm=True)
         primary = get_primary_cluster_config()
@@ -72,8 +75,7 @@ class DiscoveredDR(OADPDeployment):
                     "cluster_name"
                 ]
             index += 1
-        templating.dump_data_to_temp_yaml(mirror_peer_data, mirror_peer_yaml.name)
-        exec_cmd(f"oc apply -f {mirror_peer_yaml.name}")
+        ocp.apply_objects(mirror_peer_data)
         self._validate_mirror_peer(mirror_peer_data["metadata"]["name"])
         config.switch_default_cluster_ctx()
 
@@ -129,12 +131,8 @@ class DiscoveredDR(OADPDeployment):
                 "cluster_name"
             ]
 
-        dr_policy_hub_yaml = tempfile.NamedTemporaryFile(
-            mode="w+", prefix="dr_policy_hub_", delete=False
-        )
-        templating.dump_data_to_temp_yaml(dr_policy_hub_data, dr_policy_hub_yaml.name)
         self.dr_policy_name = dr_policy_hub_data["metadata"]["name"]
-        exec_cmd(f"oc apply -f {dr_policy_hub_yaml.name}")
+        ocp.apply_objects(dr_policy_hub_data)
         # Check the status of DRPolicy and wait for 'Reason' field to be set to 'Succeeded'
         dr_policy_resource = ocp.OCP(
             kind="DRPolicy",
@@ -176,7 +174,7 @@ class DiscoveredDR(OADPDeployment):
         config.switch_acm_ctx()
         ca_cert_data_encode = self._get_root_ca_cert()
         dr_ramen_hub_configmap_data = self._get_ramen_resource()
-        ramen_config = yaml.safe_load(
+        ramen_config = yaml_load(
             dr_ramen_hub_configmap_data.data["data"][
                 constants.DR_RAMEN_CONFIG_MANAGER_KEY
             ]
@@ -202,43 +200,29 @@ class DiscoveredDR(OADPDeployment):
         dr_ramen_hub_configmap_data.get()
         return dr_ramen_hub_configmap_data
 
-    def _update_config_map_commit(self, config_map_data, prefix=None):
+    def _update_config_map_commit(self, config_map_data):
         """
         merge the config and update the resource
 
         Args:
-            config_map_data (dict): base dictionary which will be later converted to yaml content
-            prefix (str): Used to identify temp yaml
+            config_map_data (dict): base dictionary of the config map
 
         """
         logger.debug(
-            "Converting Ramen section (which is string) to dict and updating "
-            "config_map_data with the same dict"
+            "Converting Ramen section (which is string) to dict and serializing "
+            "it back as the yaml content of the config map"
+        )
+        ramen_section = yaml_load(
+            config_map_data["data"][constants.DR_RAMEN_CONFIG_MANAGER_KEY]
+        )
+        config_map_data["data"][constants.DR_RAMEN_CONFIG_MANAGER_KEY] = yaml_dump(
+            ramen_section
         )
-        ramen_section = {
-            f"{constants.DR_RAMEN_CONFIG_MANAGER_KEY}": yaml.safe_load(
-                config_map_data["data"].pop(f"{constants.DR_RAMEN_CONFIG_MANAGER_KEY}")
-            )
-        }
-        logger.debug("Merge back the ramen_section with config_map_data")
-        config_map_data["data"].update(ramen_section)
         for key in ["annotations", "creationTimestamp", "resourceVersion", "uid"]:
             if config_map_data["metadata"].get(key):
                 config_map_data["metadata"].pop(key)
-
-        dr_ramen_configmap_yaml = tempfile.NamedTemporaryFile(
-            mode="w+", prefix=prefix, delete=False
-        )
-        yaml_serialized = yaml.dump(config_map_data)
-        logger.debug(
-            "Update yaml stream with a '|' for literal interpretation"
-            " which comes exactly right after the key 'ramen_manager_config.yaml'"
-        )
-        yaml_serialized = yaml_serialized.replace(
-            f"{constants.DR_RAMEN_CONFIG_MANAGER_KEY}:",
-            f"{constants.DR_RAMEN_CONFIG_MANAGER_KEY}: |",
+        logger.info(
+            "after serialize "
+            f"{config_map_data['data'][constants.DR_RAMEN_CONFIG_MANAGER_KEY]}"
         )
-        logger.info(f"after serialize {yaml_serialized}")
-        dr_ramen_configmap_yaml.write(yaml_serialized)
-        dr_ramen_configmap_yaml.flush()
-        exec_cmd(f"oc apply -f {dr_ramen_configmap_yaml.name}")
+        ocp.apply_objects(config_map_data)
@@ -1,5 +1,4 @@
 import logging
-import tempfile
 
 from src.ocs import ocp
 from src.framework import config
@@ -23,9 +22,16 @@ class GitopsDeployment(OperatorDeployment):
         # deploy GitOps operator
         self.gitops_subscription()
 
+    def get_install_args(self):
+        """
+        Returns:
+            dict: Arguments of deploy_operator() / get_install_manifests()
+        """
+        return {"subscription_yaml": constants.GITOPS_SUBSCRIPTION_YAML}
+
     def gitops_subscription(self):
         logger.info("Deploying GitOps operator.")
-        self.deploy_operator(subscription_yaml=constants.GITOPS_SUBSCRIPTION_YAML)
+        self.deploy_operator(**self.get_install_args())
 
     def gitops_role_binding(self):
         logger.info("Creating GitOps cluster role binding.")
@@ -33,14 +39,6 @@ class GitopsDeployment(OperatorDeployment):
 
     @staticmethod
     def deploy_gitops(log_cli_level="INFO"):
-        logger.info("Creating GitOps CLuster Resource")
-        exec_cmd(f"oc apply -f {constants.GITOPS_CLUSTER_YAML}")
-
-        logger.info("Creating GitOps CLuster Placement Resource")
-        exec_cmd(f"oc apply -f {constants.GITOPS_PLACEMENT_YAML}")
-
-        logger.info("Creating ManagedClusterSetBinding")
-
         cluster_set = []
         managed_clusters = (
             ocp.OCP(kind=constants.ACM_MANAGEDCLUSTER).get().get("items", [])
@@ -66,13 +64,17 @@ class GitopsDeployment(OperatorDeployment):
         )
         managedclustersetbinding_obj["metadata"]["name"] = cluster_set[0]
         managedclustersetbinding_obj["spec"]["clusterSet"] = cluster_set[0]
-        managedclustersetbinding = tempfile.NamedTemporaryFile(
-            mode="w+", prefix="managedcluster_setbinding", delete=False
+        logger.info(
+            "Creating GitOps Cluster, Placement and ManagedClusterSetBinding "
+            "Resources"
         )
-        templating.dump_data_to_temp_yaml(
-            managedclustersetbinding_obj, managedclustersetbinding.name
+        ocp.apply_objects(
+            [
+                templating.load_yaml(constants.GITOPS_CLUSTER_YAML),
+                templating.load_yaml(constants.GITOPS_PLACEMENT_YAML),
+                managedclustersetbinding_obj,
+            ]
         )
-        exec_cmd(f"oc apply -f {managedclustersetbinding.name}")
 
         gitops_obj = ocp.OCP(
             resource_name=constants.GITOPS_CLUSTER_NAME,
@@ -1,11 +1,11 @@
 import logging
 import os
-import tempfile
 
-import yaml
-
-from src.utility import templating
-from src.utility.utils import get_kube_config, exec_cmd
+from src.ocs import ocp
+from src.ocs.watch import WaitCondition, wait_all
+from src.utility import constants, templating
+from src.utility.serialization import yaml_load_all
+from src.utility.utils import get_kube_config
 
 logger = logging.getLogger(__name__)
 
@@ -29,12 +29,43 @@ class ImportManagedCluster(object):
                 "cluster_name": self.cluster_name,
             },
         )
-        import_cluster_obj = list(yaml.load_all(import_cluster_str, yaml.FullLoader))
+        import_cluster_obj = list(yaml_load_all(import_cluster_str))
         import_cluster_obj[1]["stringData"]["kubeconfig"] = get_kube_config(
             self.cluster_path
         )
-        import_cluster_temp = tempfile.NamedTemporaryFile(
-            mode="w+", prefix="aws_import_cluster", delete=False
+        ocp.apply_objects(import_cluster_obj, timeout=2400)
+
+    @staticmethod
+    def wait_for_available(cluster_names, timeout=900):
+        """
+        Wait for the imported managed clusters to become available on the hub,
+        all of them are checked from a single list per sample
+        Args:
+            cluster_names (list): Names of the managed clusters
+            timeout (int): Time in seconds to wait
+        Raises:
+            TimeoutExpiredError: In case a cluster didn't become available
+        """
+
+        def is_available(managed_clusters):
+            for managed_cluster in managed_clusters.values():
+                for condition in managed_cluster.get("status", {}).get(
+                    "conditions", []
+                ):
+                    if condition.get("type") == constants.ACM_MANAGEDCLUSTER_AVAILABLE:
+                        return condition.get("status") == "True"
+            return False
+
+        wait_all(
+            [
+                WaitCondition(
+                    kind=constants.ACM_MANAGEDCLUSTER,
+                    resource_name=cluster_name,
+                    predicate=is_available,
+                    description=f"managed cluster {cluster_name}",
+                )
+                for cluster_name in cluster_names
+            ],
+            timeout=timeout,
+            sleep=10,
         )
-        templating.dump_data_to_temp_yaml(import_cluster_obj, import_cluster_temp.name)
-        exec_cmd(f"oc apply -f {import_cluster_temp.name}", timeout=2400)
@@ -14,6 +14,31 @@ class OADPDeployment(OperatorDeployment):
     def __init__(self):
         super().__init__(constants.OADP_NAMESPACE, constants.OADP_OPERATOR_NAME)
 
+    def get_install_args(self):
+        """
+        Returns:
+            dict: Arguments of deploy_operator() / get_install_manifests()
+        """
+        return {
+            "subscription_yaml": constants.OADP_SUBSCRIPTION_YAML,
+            "ns_yaml": constants.OADP_NS_YAML,
+        }
+
+    def deploy_oadp(self):
+        """
+        Deploy OADP Operator on the current cluster context
+
+        """
+        logger.info(
+            f"Deploying OADP Operator for  cluster {config.ENV_DATA['cluster_name']}"
+        )
+        self.deploy_operator(**self.get_install_args())
+        self.create_data_protection_application()
+
+    def create_data_protection_application(self):
+        logger.info("Creating Resource DataProtectionApplication")
+        exec_cmd(f"oc apply -f {constants.DPA_DISCOVERED_APPS_PATH}")
+
     def do_deploy_oadp(self):
         """
         Deploy OADP Operator
@@ -24,13 +49,5 @@ class OADPDeployment(OperatorDeployment):
             for cluster in managed_clusters:
                 index = cluster.MULTICLUSTER["multicluster_index"]
                 config.switch_ctx(index)
-                logger.info(
-                    f"Deploying OADP Operator for  cluster {cluster.ENV_DATA['cluster_name']}"
-                )
-                self.deploy_operator(
-                    subscription_yaml=constants.OADP_SUBSCRIPTION_YAML,
-                    ns_yaml=constants.OADP_NS_YAML,
-                )
-                logger.info("Creating Resource DataProtectionApplication")
-                exec_cmd(f"oc apply -f {constants.DPA_DISCOVERED_APPS_PATH}")
+                self.deploy_oadp()
             config.switch_default_cluster_ctx()
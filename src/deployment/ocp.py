@@ -1,7 +1,6 @@
 import os
 import logging
 import json
-import yaml
 import shutil
 
 from src.utility.retry import retry
@@ -10,6 +9,7 @@ from src.utility import utils
 from src.utility import constants
 from src.utility.exceptions import PullSecretNotFoundException, CommandFailed
 from src.utility import templating
+from src.utility.serialization import yaml_dump, yaml_load
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +25,8 @@ class OCPDeployment:
         self.installer_binary_path = self.download_installer()
         # create config
         self.create_config()
+        if config.DEPLOYMENT.get("inject_install_manifests"):
+            self.create_manifests()
 
     @retry(CommandFailed, tries=5, delay=60, backoff=1)
     def download_installer(self):
@@ -83,12 +85,12 @@ class OCPDeployment:
         # so we don't leak sensitive data.
         logger.info(f"Install config: \n{install_config_str}")
         # Parse the rendered YAML so that we can manipulate the object directly
-        install_config_obj = yaml.safe_load(install_config_str)
+        install_config_obj = yaml_load(install_config_str)
         install_config_obj["pullSecret"] = self.get_pull_secret()
         ssh_key = self.get_ssh_key()
         if ssh_key:
             install_config_obj["sshKey"] = ssh_key
-        install_config_str = yaml.safe_dump(install_config_obj)
+        install_config_str = yaml_dump(install_config_obj)
         install_config_path = os.path.join(self.cluster_path, "install-config.yaml")
         # create cluster directory
         if not os.path.exists(self.cluster_path):
@@ -97,6 +99,41 @@ class OCPDeployment:
         with open(install_config_path, "w") as f:
             f.write(install_config_str)
 
+    def create_manifests(self):
+        """
+        Create the install manifests from the install config and add the
+        registry mirrors, the custom catalog source and the operator
+        namespaces of the cluster to them, 'create cluster' then deploys the
+        cluster from the manifests
+        """
+        # importing here to avoid dependencies
+        from src.deployment.operator_deployment import get_install_time_manifests
+
+        multicluster = config.MULTICLUSTER
+        deploy_ocs = not config.ENV_DATA["skip_ocs_deployment"] and not (
+            multicluster.get("acm_cluster") and not multicluster.get("primary_cluster")
+        )
+        deploy_mco = multicluster.get("acm_cluster") and not multicluster.get(
+            "skip_mco_deployment"
+        )
+        if not (deploy_ocs or deploy_mco):
+            logger.info("No custom catalog on the cluster, no manifests to inject")
+            return
+        manifests = get_install_time_manifests(
+            constants.ODF_OLM_YAML if deploy_ocs else None
+        )
+        if not manifests:
+            return
+        logger.info(f"Creating install manifests in {self.cluster_path}")
+        utils.exec_cmd(
+            f"{self.installer_binary_path} create manifests --dir {self.cluster_path}"
+        )
+        manifests_dir = os.path.join(self.cluster_path, "manifests")
+        for file_name, data in manifests.items():
+            with open(os.path.join(manifests_dir, file_name), "w") as f:
+                yaml_dump(data, f)
+            logger.info(f"Injected {data['kind']} {data['metadata']['name']}")
+
     @staticmethod
     def deploy_ocp(installer_binary_path, cluster_path, log_cli_level="INFO"):
         # Do not access framework.config directly inside deploy_ocp, it is not thread safe
@@ -108,6 +145,8 @@ class OCPDeployment:
                     log_level=log_cli_level,
                 ),
                 timeout=3600,
+                stream=True,
             )
-        except CommandFailed as ex:
+        except CommandFailed:
             logger.error("Unable to deploy ocp cluster.")
+            raise
@@ -3,7 +3,6 @@ import logging
 from src.ocs import ocp
 from src.framework import config
 from src.utility import constants, defaults
-from src.utility.cmd import exec_cmd
 from src.utility.version import (
     get_semantic_ocs_version_from_config,
     VERSION_4_18,
@@ -37,7 +36,6 @@ class OCSDeployment(OperatorDeployment):
 
     def ocs_subscription(self):
         logger.info("Deploying ODF operator.")
-        exec_cmd(f"oc apply -f {constants.ODF_OLM_YAML}")
         operator_selector = get_selector_for_ocs_operator()
         custom_channel = config.DEPLOYMENT.get("ocs_csv_channel")
         self.deploy_operator(
@@ -1,12 +1,13 @@
+import contextvars
 import os
 import logging
-import tempfile
-import time
-import yaml
+from concurrent.futures import ThreadPoolExecutor
 
 from src.framework import config
 from src.utility.cmd import exec_cmd
 from src.utility import constants, templating
+from src.utility.image_cache import extract_image_path
+from src.utility.serialization import yaml_dump, yaml_load
 from src.ocs.resources.catalog_source import disable_specific_source
 from src.ocs.resources.catalog_source import CatalogSource
 from src.utility.utils import (
@@ -14,11 +15,16 @@ from src.utility.utils import (
     create_directory_path,
     wait_for_machineconfigpool_status,
 )
-from src.utility.timeout import TimeoutSampler
 from src.utility.exceptions import CommandFailed
+from src.utility.tracing import get_current_span, traced
 from src.ocs import ocp
+from src.ocs.olm import InstallTracker
+from src.ocs.resources.machine_config_pool import (
+    MachineConfigPoolRollout,
+    wait_for_rollouts,
+)
 from src.ocs.resources.package_manifest import PackageManifest
-from src.ocs.resources.csv import CSV
+from src.ocs.watch import wait_for_condition
 
 logger = logging.getLogger(__name__)
 
@@ -45,41 +51,210 @@ def get_and_apply_icsp_from_catalog(image, apply=True, insecure=False):
         config.ENV_DATA["cluster_path"], f"icsp-{config.run_id}"
     )
     icsp_file_dest_location = os.path.join(icsp_file_dest_dir, "icsp.yaml")
-    pull_secret_path = os.path.join(constants.TOP_DIR, "data", "pull-secret")
     create_directory_path(icsp_file_dest_dir)
-    cmd = (
-        f"oc image extract --filter-by-os linux/amd64 --registry-config {pull_secret_path} "
-        f"{image} --confirm "
-        f"--path {icsp_file_location}:{icsp_file_dest_dir}"
-    )
-    if insecure:
-        cmd = f"{cmd} --insecure"
-    exec_cmd(cmd)
+    # The image is extracted once per digest, the clusters get a local copy
+    extract_image_path(image, icsp_file_location, icsp_file_dest_dir, insecure)
     if not os.path.exists(icsp_file_dest_location):
         return ""
 
     # make icsp name unique - append run_id
     with open(icsp_file_dest_location) as f:
-        icsp_content = yaml.safe_load(f)
+        icsp_content = yaml_load(f)
     icsp_content["metadata"]["name"] += f"-{config.run_id}"
     with open(icsp_file_dest_location, "w") as f:
-        yaml.dump(icsp_content, f)
+        yaml_dump(icsp_content, f)
     if apply:
-        exec_cmd(f"oc apply -f {icsp_file_dest_location}")
-        num_nodes = (
-            config.ENV_DATA["worker_replicas"]
-            + config.ENV_DATA["master_replicas"]
-            + config.ENV_DATA.get("infra_replicas", 0)
-        )
-        timeout = 2800 if num_nodes > 6 else 1900
-        wait_for_machineconfigpool_status(node_type="all", timeout=timeout)
+        rollout = apply_icsp(icsp_file_dest_location)
+        if rollout:
+            wait_for_machineconfigpool_status(
+                node_type="all", timeout=get_mcp_rollout_timeout(), rollout=rollout
+            )
     return icsp_file_dest_location
 
 
+def get_mcp_rollout_timeout(cluster=None):
+    """
+    Get the timeout of the machine config pools rollout, it depends on the
+    number of the nodes of the cluster
+
+    Args:
+        cluster (Config): Config of the cluster, the current cluster context
+            if not set
+
+    Returns:
+        int: Timeout in seconds
+
+    """
+    env_data = (cluster or config).ENV_DATA
+    num_nodes = (
+        env_data["worker_replicas"]
+        + env_data["master_replicas"]
+        + env_data.get("infra_replicas", 0)
+    )
+    return 2800 if num_nodes > 6 else 1900
+
+
+def apply_icsp(icsp_file_location):
+    """
+    Apply the ICSP on the current cluster context, unless it is already
+    applied (e.g. by apply_registry_mirrors())
+
+    Args:
+        icsp_file_location (str): Path to the icsp.yaml file
+
+    Returns:
+        MachineConfigPoolRollout: The started rollout of the ICSP, None if
+            the ICSP was already applied
+
+    """
+    with open(icsp_file_location) as f:
+        icsp_name = yaml_load(f)["metadata"]["name"]
+    icsp = ocp.OCP(kind=constants.IMAGECONTENTSOURCEPOLICY).get(
+        resource_name=icsp_name, dont_raise=True, silent=True
+    )
+    if icsp:
+        logger.info(f"ICSP {icsp_name} is already applied")
+        return None
+    # The rendered configs before the change tell when the rollout starts
+    rollout = MachineConfigPoolRollout(
+        [constants.WORKER_MACHINE, constants.MASTER_MACHINE],
+        cluster_kubeconfig=config.get_kubeconfig_path(),
+        cluster_name=config.ENV_DATA["cluster_name"],
+    )
+    exec_cmd(f"oc apply -f {icsp_file_location}")
+    return rollout
+
+
+def apply_registry_mirrors(indexes):
+    """
+    Apply the ICSP of the catalog image to all the clusters first and then
+    wait for their machine config pools together, so that the nodes of the
+    clusters are rebooted at the same time instead of one cluster after
+    another. The catalog source of a cluster then finds its ICSP applied.
+
+    Args:
+        indexes (list): Indexes of the clusters
+
+    """
+    rollouts = []
+    timeout = 0
+    for index in indexes:
+        with config.bind_ctx(index) as cluster:
+            image = cluster.ENV_DATA.get("ocs_registry_image")
+            if not image:
+                continue
+            catalog_source = CatalogSource(
+                resource_name=constants.OPERATOR_CATALOG_SOURCE_NAME,
+                namespace=constants.MARKETPLACE_NAMESPACE,
+            ).get(dont_raise=True, silent=True)
+            # The catalog source already runs the image, compared as written
+            # to the spec, see OperatorDeployment.create_catalog_source()
+            catalog_image = get_catalog_source_data(image)["spec"]["image"]
+            if catalog_source and catalog_source["spec"]["image"] == catalog_image:
+                continue
+            icsp_file_location = get_and_apply_icsp_from_catalog(
+                image=image, apply=False, insecure=True
+            )
+            if not icsp_file_location:
+                continue
+            rollout = apply_icsp(icsp_file_location)
+            if rollout:
+                rollouts.append(rollout)
+                timeout = max(timeout, get_mcp_rollout_timeout(cluster))
+    if not rollouts:
+        logger.info("No registry mirrors to apply")
+        return
+    wait_for_rollouts(
+        rollouts,
+        timeout=timeout,
+        start_timeout=config.RUN.get("mcp_rollout_start_timeout", 120),
+    )
+
+
+def get_catalog_source_data(image_path):
+    """
+    Get the manifest of the custom catalog source
+
+    Args:
+        image_path (str): Image of ocs registry, the 'latest' tag is used if
+            it has none
+
+    Returns:
+        dict: The catalog source
+
+    """
+    image_and_tag = image_path.rsplit(":", 1)
+    image = image_and_tag[0]
+    image_tag = image_and_tag[1] if len(image_and_tag) == 2 else None
+    catalog_source_data = templating.load_yaml(constants.CATALOG_SOURCE_YAML)
+    cs_name = constants.OPERATOR_CATALOG_SOURCE_NAME
+    change_cs_condition = (
+        (image or image_tag)
+        and catalog_source_data["kind"] == "CatalogSource"
+        and catalog_source_data["metadata"]["name"] == cs_name
+    )
+    if change_cs_condition:
+        default_image = config.ENV_DATA["default_ocs_registry_image"]
+        image = image if image else default_image.rsplit(":", 1)[0]
+        catalog_source_data["spec"][
+            "image"
+        ] = f"{image}:{image_tag if image_tag else 'latest'}"
+    return catalog_source_data
+
+
+def get_install_time_manifests(namespaces_yaml=None):
+    """
+    Get the manifests of the custom catalog of the current cluster context to
+    be added to the OCP install, the ICSP of the catalog image, the catalog
+    source replacing the default source of the same name and the operator
+    namespaces. The nodes then come up with the registry mirrors and the
+    catalog source phase doesn't trigger a machine config rollout.
+
+    Args:
+        namespaces_yaml (str): Path to the template with the operator
+            namespaces, only its namespaces are used as the operator groups
+            need OLM
+
+    Returns:
+        dict: file name -> manifest, empty if the cluster uses the default
+            catalog sources
+
+    """
+    image_path = config.ENV_DATA.get("ocs_registry_image")
+    if not image_path:
+        return {}
+    manifests = {}
+    icsp_file_location = get_and_apply_icsp_from_catalog(
+        image=image_path, apply=False, insecure=True
+    )
+    if icsp_file_location:
+        with open(icsp_file_location) as f:
+            manifests["99-ocs-registry-icsp.yaml"] = yaml_load(f)
+    # Same as disable_specific_source() after the install
+    manifests["99-operatorhub.yaml"] = {
+        "apiVersion": "config.openshift.io/v1",
+        "kind": "OperatorHub",
+        "metadata": {"name": "cluster"},
+        "spec": {
+            "sources": [
+                {"name": constants.OPERATOR_CATALOG_SOURCE_NAME, "disabled": True}
+            ]
+        },
+    }
+    manifests["99-ocs-catalog-source.yaml"] = get_catalog_source_data(image_path)
+    if namespaces_yaml:
+        for doc in templating.load_yaml(namespaces_yaml, multi_document=True):
+            if doc and doc["kind"] == "Namespace":
+                name = doc["metadata"]["name"]
+                manifests[f"99-namespace-{name}.yaml"] = doc
+    return manifests
+
+
 class OperatorDeployment(object):
     def __init__(self, namespace, name):
         self.namespace = namespace
         self.name = name
+        self.subscription_name = name
 
     def create_catalog_source(self, image=None):
         """
@@ -90,12 +265,14 @@ class OperatorDeployment(object):
             ignore_upgrade (bool): Ignore upgrade parameter.
         """
         imagePath = image or config.ENV_DATA.get("ocs_registry_image", "")
+        catalog_source_data = get_catalog_source_data(imagePath)
         catalog_obj = CatalogSource(
             resource_name=constants.OPERATOR_CATALOG_SOURCE_NAME,
             namespace=constants.MARKETPLACE_NAMESPACE,
         ).get()
         # If the catalog already exists with the same image, skip creating it.
-        if catalog_obj["spec"]["image"] == imagePath:
+        # The image is compared as written to the spec, with its tag.
+        if catalog_obj["spec"]["image"] == catalog_source_data["spec"]["image"]:
             return
         # Because custom catalog source will be called: redhat-operators, we need to disable
         # default sources. This should not be an issue as OCS internal registry images
@@ -105,31 +282,9 @@ class OperatorDeployment(object):
             get_kube_config_path(config.ENV_DATA["cluster_path"]),
         )
         logger.info("Adding CatalogSource")
-        image_and_tag = imagePath.rsplit(":", 1)
-        image = image_and_tag[0]
-        image_tag = image_and_tag[1] if len(image_and_tag) == 2 else None
-        catalog_source_data = templating.load_yaml(constants.CATALOG_SOURCE_YAML)
-        cs_name = constants.OPERATOR_CATALOG_SOURCE_NAME
-        change_cs_condition = (
-            (image or image_tag)
-            and catalog_source_data["kind"] == "CatalogSource"
-            and catalog_source_data["metadata"]["name"] == cs_name
-        )
-        if change_cs_condition:
-            default_image = config.ENV_DATA["default_ocs_registry_image"]
-            image = image if image else default_image.rsplit(":", 1)[0]
-            catalog_source_data["spec"][
-                "image"
-            ] = f"{image}:{image_tag if image_tag else 'latest'}"
         # apply icsp
         get_and_apply_icsp_from_catalog(image=imagePath, insecure=True)
-        catalog_source_manifest = tempfile.NamedTemporaryFile(
-            mode="w+", prefix="catalog_source_manifest", delete=False
-        )
-        templating.dump_data_to_temp_yaml(
-            catalog_source_data, catalog_source_manifest.name
-        )
-        exec_cmd(f"oc apply -f {catalog_source_manifest.name}", timeout=2400)
+        ocp.apply_objects(catalog_source_data, timeout=2400)
         catalog_source = CatalogSource(
             resource_name=constants.OPERATOR_CATALOG_SOURCE_NAME,
             namespace=constants.MARKETPLACE_NAMESPACE,
@@ -137,45 +292,39 @@ class OperatorDeployment(object):
         # Wait for catalog source is ready
         catalog_source.wait_for_state("READY")
 
+    def _wait_for_name(self, kind, timeout=300):
+        """
+        Wait for a resource of the kind whose name contains the operator name
+        to appear in the namespace
+        """
+
+        def found(objects):
+            for name in objects:
+                if self.name in name:
+                    logger.info(f"{kind} found: {name}")
+                    return True
+            logger.debug(f"Still waiting for the {kind}: {self.name}")
+            return False
+
+        wait_for_condition(
+            ocp.OCP(kind=kind, namespace=self.namespace),
+            found,
+            timeout,
+            sleep=10,
+            description=f"{kind} {self.name}",
+        )
+
     def wait_for_subscription(self):
         """
         Wait for the subscription to appear
-        Args:
-            subscription_name (str): Subscription name pattern
         """
-
-        resource_kind = constants.SUBSCRIPTION
-        ocp.OCP(kind=resource_kind, namespace=self.namespace)
-        for sample in TimeoutSampler(
-            300, 10, ocp.OCP, kind=resource_kind, namespace=self.namespace
-        ):
-            subscriptions = sample.get().get("items", [])
-            for subscription in subscriptions:
-                found_subscription_name = subscription.get("metadata", {}).get(
-                    "name", ""
-                )
-                if self.name in found_subscription_name:
-                    logger.info(f"Subscription found: {found_subscription_name}")
-                    return
-                logger.debug(f"Still waiting for the subscription: {self.name}")
+        self._wait_for_name(constants.SUBSCRIPTION)
 
     def wait_for_csv(self):
         """
-        Wait for th e CSV to appear
-        Args:
-            csv_name (str): CSV name pattern
+        Wait for the CSV to appear
         """
-        ocp.OCP(kind="subscription", namespace=self.namespace)
-        for sample in TimeoutSampler(
-            300, 10, ocp.OCP, kind="csv", namespace=self.namespace
-        ):
-            csvs = sample.get().get("items", [])
-            for csv in csvs:
-                found_csv_name = csv.get("metadata", {}).get("name", "")
-                if self.name in found_csv_name:
-                    logger.info(f"CSV found: {found_csv_name}")
-                    return
-                logger.debug(f"Still waiting for the CSV: {self.name}")
+        self._wait_for_name("csv")
 
     def enable_console_plugin(self, name, enable_console=True):
         """
@@ -207,30 +356,34 @@ class OperatorDeployment(object):
         else:
             logger.debug(f"Skipping console plugin for {name} operator ")
 
-    def deploy_operator(
+    def get_install_manifests(
         self,
         subscription_yaml,
         ns_yaml=None,
         channel=None,
         operator_selector=None,
-        sleep=120,
     ):
         """
-        Deploy operator
+        Get the manifests which install the operator, the subscription is
+        pinned to the current CSV of the channel
+        Args:
+            subscription_yaml (str): Path to the subscription template
+            ns_yaml (str): Path to the namespace and operator group template
+            channel (str): Channel to subscribe, the default channel of the
+                package if not set
+            operator_selector (str): Label selector of the package manifest
+        Returns:
+            list: Namespace and operator group (if ns_yaml is set) and
+                subscription
         """
-        logger.info("Creating Namespace")
-        # creating Namespace and operator group for cert-manager
-        logger.info("Creating namespace and operator group for Openshift-oadp")
-        if ns_yaml:
-            exec_cmd(f"oc apply -f {ns_yaml}")
-        logger.info("Creating Operator Subscription")
         subscription_yaml_data = templating.load_yaml(subscription_yaml)
         package_manifest = PackageManifest(
             resource_name=self.name,
             selector=operator_selector,
         )
-        # Wait for package manifest is ready
-        package_manifest.wait_for_resource(timeout=300)
+        if package_manifest.catalog_index is None:
+            # Wait for package manifest is ready
+            package_manifest.wait_for_resource(timeout=300)
         default_channel = package_manifest.get_default_channel()
         subscription_yaml_data["spec"]["channel"] = (
             channel if channel else default_channel
@@ -240,22 +393,108 @@ class OperatorDeployment(object):
                 channel=channel if channel else default_channel
             )
         )
-        subscription_manifest = tempfile.NamedTemporaryFile(
-            mode="w+", prefix="subscription_manifest", delete=False
+        self.subscription_name = subscription_yaml_data["metadata"]["name"]
+        manifests = []
+        if ns_yaml:
+            manifests = [
+                doc
+                for doc in templating.load_yaml(ns_yaml, multi_document=True)
+                if doc
+            ]
+        manifests.append(subscription_yaml_data)
+        return manifests
+
+    def _track_install(self, timeout):
+        """
+        Wait until the subscribed operator is installed
+        Returns:
+            InstallTracker: The tracker with the step timings
+        """
+        tracker = InstallTracker(self.subscription_name, self.namespace)
+        tracker.track(timeout=timeout)
+        get_current_span().set(
+            **{
+                f"{self.name}_{step}_seconds": int(took)
+                for step, took in tracker.timings.items()
+            },
         )
-        templating.dump_data_to_temp_yaml(
-            subscription_yaml_data, subscription_manifest.name
+        return tracker
+
+    @traced()
+    def deploy_operator(
+        self,
+        subscription_yaml,
+        ns_yaml=None,
+        channel=None,
+        operator_selector=None,
+        timeout=900,
+    ):
+        """
+        Deploy operator
+        Args:
+            subscription_yaml (str): Path to the subscription template
+            ns_yaml (str): Path to the namespace and operator group template
+            channel (str): Channel to subscribe, the default channel of the
+                package if not set
+            operator_selector (str): Label selector of the package manifest
+            timeout (int): Timeout in seconds of the install, from the
+                subscription to the succeeded CSV
+        """
+        get_current_span().set(operator=self.name, namespace=self.namespace)
+        logger.info("Creating Operator Subscription")
+        manifests = self.get_install_manifests(
+            subscription_yaml, ns_yaml, channel, operator_selector
         )
-        exec_cmd(f"oc apply -f {subscription_manifest.name}")
-        self.wait_for_subscription()
-        logger.info(f"Sleeping for {sleep} seconds after subscribing Operator")
-        time.sleep(sleep)
-        subscriptions = ocp.OCP(
-            kind=constants.SUBSCRIPTION_WITH_ACM,
-            resource_name=self.name,
-            namespace=self.namespace,
-        ).get()
-        csv_name = subscriptions["status"]["currentCSV"]
-        csv = CSV(resource_name=csv_name, namespace=self.namespace)
-        csv.wait_for_phase("Succeeded", timeout=720)
+        # Namespace, operator group and subscription are applied together
+        ocp.apply_objects(manifests)
+        tracker = self._track_install(timeout)
+        get_current_span().set(csv=tracker.csv_name)
         logger.info("Operator Deployment Succeeded")
+
+    @staticmethod
+    @traced()
+    def deploy_operators(operators, timeout=900):
+        """
+        Install several operators on the current cluster context at once. The
+        namespaces, operator groups and subscriptions of all of them are
+        applied together and the installs are tracked at the same time, so it
+        takes about as long as the slowest operator.
+        Args:
+            operators (list): (OperatorDeployment, dict) tuples, the dict holds
+                the get_install_manifests() arguments of the operator
+            timeout (int): Timeout in seconds of the installs
+        Raises:
+            OperatorInstallFailed: In case an install plan failed
+            TimeoutExpiredError: In case an operator was not installed in time
+        Returns:
+            dict: operator name -> name of its installed CSV
+        """
+        names = [operator.name for operator, _ in operators]
+        get_current_span().set(operators=",".join(names))
+        logger.info(f"Creating Subscriptions of operators {', '.join(names)}")
+        manifests = {}
+        for operator, kwargs in operators:
+            for manifest in operator.get_install_manifests(**kwargs):
+                # Operators sharing a namespace share its operator group
+                metadata = manifest["metadata"]
+                key = (manifest["kind"], metadata.get("namespace"), metadata["name"])
+                manifests.setdefault(key, manifest)
+        ocp.apply_objects(list(manifests.values()))
+        with ThreadPoolExecutor(max_workers=len(operators)) as pool:
+            # Copy of the context per install, so that the cluster context
+            # and the span are the ones of the caller
+            futures = {
+                operator.name: pool.submit(
+                    contextvars.copy_context().run, operator._track_install, timeout
+                )
+                for operator, _ in operators
+            }
+        errors = []
+        for name, future in futures.items():
+            if future.exception():
+                logger.error(f"Install of {name} failed: {future.exception()}")
+                errors.append(future.exception())
+        if errors:
+            raise errors[0]
+        logger.info(f"Operators {', '.join(names)} Deployment Succeeded")
+        return {name: future.result().csv_name for name, future in futures.items()}
@@ -1,10 +1,8 @@
-import tempfile
 import logging
-import yaml
-from yaml.loader import SafeLoader
+from src.ocs import ocp
 from src.utility.cmd import exec_cmd
-from src.utility import templating
 from src.utility import constants
+from src.utility.serialization import yaml_load
 
 logger = logging.getLogger(__name__)
 
@@ -12,7 +10,7 @@ logger = logging.getLogger(__name__)
 class SSLCertificate(object):
     def __init__(self):
         self.ssl_certificate = ""
-        self.ssl_certificate_path = ""
+        self.ssl_certificate_data = {}
 
     def get_certificate(self):
         result = exec_cmd(
@@ -20,18 +18,14 @@ class SSLCertificate(object):
         )
         self.ssl_certificate += result.stdout.decode("utf-8")
 
-    def get_certificate_file_path(self):
-        cert_file = tempfile.NamedTemporaryFile(
-            mode="w+", prefix="ssl_cert", delete=False
-        )
-        f = open(constants.SSL_CERTIFICATE_YAML, "r")
-        ssl_certificate = yaml.load(f, Loader=SafeLoader)
+    def get_certificate_data(self):
+        with open(constants.SSL_CERTIFICATE_YAML, "r") as f:
+            ssl_certificate = yaml_load(f)
         ssl_certificate["data"]["ca-bundle.crt"] = self.ssl_certificate
-        templating.dump_data_to_temp_yaml(ssl_certificate, cert_file.name)
-        self.ssl_certificate_path = cert_file.name
+        self.ssl_certificate_data = ssl_certificate
 
     def exchange_certificate(self):
-        exec_cmd(f"oc create -f {self.ssl_certificate_path}")
+        ocp.apply_objects(self.ssl_certificate_data)
         exec_cmd(
             'oc patch proxy cluster --type=merge  --patch=\'{"spec":{"trustedCA":{"name":"user-ca-bundle"}}}\''
         )
@@ -114,7 +114,7 @@ def run_subctl_cmd(cmd=None):
         cmd: subctl command to be executed
     """
     cmd = " ".join(["subctl", cmd])
-    exec_cmd(cmd)
+    exec_cmd(cmd, stream=True)
 
 
 class Submariner(object):
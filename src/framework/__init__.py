@@ -9,17 +9,23 @@ under section PYTEST_DONT_REWRITE
 # Use the new python 3.7 dataclass decorator, which provides an object similar
 # to a namedtuple, but allows type enforcement and defining methods.
 import os
-import yaml
 import logging
+import contextvars
 from collections.abc import Mapping
+from contextlib import contextmanager
 from dataclasses import dataclass, field, fields
 from src.utility.exceptions import ClusterNotFoundException
+from src.utility.serialization import yaml_load
 
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
 DEFAULT_CONFIG_PATH = os.path.join(THIS_DIR, "conf/default_config.yaml")
 
 logger = logging.getLogger(__name__)
 
+# Index of the cluster bound to the current thread / asyncio task, None means
+# the process wide context selected by MultiClusterConfig.switch_ctx is used
+_bound_cluster_index = contextvars.ContextVar("bound_cluster_index", default=None)
+
 
 @dataclass
 class Config:
@@ -48,7 +54,7 @@ class Config:
         with open(DEFAULT_CONFIG_PATH) as file_stream:
             return {
                 k: (v if v is not None else {})
-                for (k, v) in yaml.safe_load(file_stream).items()
+                for (k, v) in yaml_load(file_stream).items()
             }
 
     def update(self, user_dict: dict):
@@ -122,11 +128,11 @@ class MultiClusterConfig:
         self.run_id = ""
         # Holds all cluster's Config() object
         self.clusters = list()
-        # This member always points to current cluster's Config() object
-        self.cluster_ctx = None
+        # Process wide cluster context, see cluster_ctx
+        self._cluster_ctx = None
         self.nclusters = 1
-        # Index for current cluster in context
-        self.cur_index = 0
+        # Index for process wide cluster context
+        self._cur_index = 0
         self.multicluster = False
         # Points to cluster conf objects which holds ACM cluster conf
         # Applicable only if we are deploying ACM cluster
@@ -134,6 +140,77 @@ class MultiClusterConfig:
         self.single_cluster_default = True
         self._single_cluster_init_cluster_configs()
 
+    def __getattr__(self, name):
+        # Config sections (ENV_DATA, RUN, ...) always resolve from the
+        # current cluster context
+        if name in Config.__dataclass_fields__:
+            return getattr(self.cluster_ctx, name)
+        raise AttributeError(
+            f"'{type(self).__name__}' object has no attribute '{name}'"
+        )
+
+    @property
+    def cluster_ctx(self):
+        """
+        Config() object of the current cluster context. It is the cluster
+        bound to the current thread or asyncio task by bind_ctx() if any,
+        otherwise the process wide context selected by switch_ctx().
+        """
+        index = _bound_cluster_index.get()
+        if index is not None:
+            return self.clusters[index]
+        return self._cluster_ctx
+
+    @cluster_ctx.setter
+    def cluster_ctx(self, value):
+        self._cluster_ctx = value
+
+    @property
+    def cur_index(self):
+        index = _bound_cluster_index.get()
+        return self._cur_index if index is None else index
+
+    @cur_index.setter
+    def cur_index(self, value):
+        self._cur_index = value
+
+    def is_ctx_bound(self):
+        """
+        Returns:
+            bool: True if a cluster is bound to the current thread or
+                asyncio task
+        """
+        return _bound_cluster_index.get() is not None
+
+    @contextmanager
+    def bind_ctx(self, index):
+        """
+        Bind the cluster context to the current thread or asyncio task. Unlike
+        switch_ctx(), it doesn't change the process wide context nor the
+        KUBECONFIG environment variable, so several clusters can be driven
+        concurrently from one process.
+        Args:
+            index (int): Index of the cluster to bind
+        Example::
+            with config.bind_ctx(1):
+                OCP(kind="node").get()
+        """
+        token = _bound_cluster_index.set(index)
+        try:
+            yield self.clusters[index]
+        finally:
+            _bound_cluster_index.reset(token)
+
+    def get_kubeconfig_path(self):
+        """
+        Get the kubeconfig path of the current cluster context
+        Returns:
+            str: Path to the kubeconfig file
+        """
+        return os.path.join(
+            self.ENV_DATA["cluster_path"], self.RUN.get("kubeconfig_location")
+        )
+
     @property
     def default_cluster_ctx(self):
         """
@@ -185,20 +262,22 @@ class MultiClusterConfig:
         self.cluster_ctx = self.clusters[0]
         self._refresh_ctx()
 
+    def to_dict(self):
+        return self.cluster_ctx.to_dict()
+
     def _refresh_ctx(self):
-        [
-            self.__setattr__(attr, self.cluster_ctx.__getattribute__(attr))
-            for attr in self.attr_list
-        ]
-        self.to_dict = self.cluster_ctx.to_dict
-        os.environ["KUBECONFIG"] = os.path.join(
-            self.ENV_DATA["cluster_path"], self.RUN.get("kubeconfig_location")
-        )
+        # KUBECONFIG is process wide, bound contexts pass it explicitly
+        if not self.is_ctx_bound():
+            os.environ["KUBECONFIG"] = self.get_kubeconfig_path()
 
     def switch_ctx(self, index=0):
-        self.cluster_ctx = self.clusters[index]
-        self.cur_index = index
-        self._refresh_ctx()
+        if self.is_ctx_bound():
+            # Only switch the context of the current thread / asyncio task
+            _bound_cluster_index.set(index)
+        else:
+            self.cluster_ctx = self.clusters[index]
+            self.cur_index = index
+            self._refresh_ctx()
         # Log the switch after changing the current index
         logger.info(f"Switched to cluster: {self.current_cluster_name()}")
 
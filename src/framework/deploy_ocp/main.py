@@ -2,13 +2,14 @@ import argparse
 import os
 import re
 import sys
-import yaml
 import time
 from datetime import datetime
 
 from src import framework
 from src.utility.exceptions import UnSupportedPlatformException
 from src.utility import utils
+from src.utility.serialization import yaml_load
+from src.utility.tracing import export_trace, span
 from src.framework.deployment import Deployment
 from src.framework.logger_factory import setup_logging
 
@@ -36,7 +37,7 @@ def load_config(config_files):
     """
     for config_file in config_files:
         with open(os.path.abspath(os.path.expanduser(config_file))) as file_stream:
-            custom_config_data = yaml.safe_load(file_stream)
+            custom_config_data = yaml_load(file_stream)
             framework.config.update(custom_config_data)
 
 
@@ -198,6 +199,17 @@ def process_log_level_arg(arguments):
     return args.log_cli_level
 
 
+def process_resume_arg(arguments):
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="skip the phases which already succeeded in the previous run",
+    )
+    args, _ = parser.parse_known_args(args=arguments)
+    return args.resume
+
+
 def process_email_recipients(arguments):
     parser = argparse.ArgumentParser(add_help=False)
     parser.add_argument(
@@ -226,33 +238,18 @@ def main(argv=None):
     arguments = argv or sys.argv[1:]
     init_ocp4mcoci_conf(arguments)
     log_cli_level = process_log_level_arg(arguments)
+    resume = process_resume_arg(arguments)
     log_file_path = f"logs/deployment_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
     setup_logging(log_cli_level, log_file_path)
 
-    # Proceed with deployment steps
-    deployment = Deployment()
-    deployment.deploy_ocp(log_cli_level)
-
-    deployment = Deployment()
-    # Deploy OCP
-    deployment.deploy_ocp(log_cli_level)
-    # Deploy OCS
-    deployment.deploy_ocs(log_cli_level)
-    # Deploy ACM
-    deployment.deploy_acm()
-    # Deploy MCO
-    deployment.deploy_mco()
-    # Configure submariner
-    deployment.configure_submariner()
-    # import managed cluster
-    deployment.aws_import_cluster()
-    # Deploy GitOps
-    deployment.deploy_gitops()
-    # SSL certificate exchange
-    deployment.ssl_certificate()
-    # Configure discovered DR
-    deployment.configure_discovered_dr()
-    # Send email report
-    deployment.send_email()
-    # Send gchat message
-    deployment.send_message()
+    try:
+        with span("deploy-ocp", resume=resume):
+            # Run the deployment phases following their dependencies
+            deployment = Deployment()
+            deployment.run_phases(log_cli_level, resume)
+            # Send email report
+            deployment.send_email()
+            # Send gchat message
+            deployment.send_message()
+    finally:
+        export_trace()
@@ -1,7 +1,5 @@
 import logging
 import sys
-import time
-import multiprocessing as mp
 
 from src.deployment.ocp import OCPDeployment
 from src.deployment.ocs import OCSDeployment
@@ -12,18 +10,103 @@ from src.deployment.ssl_certificate import SSLCertificate
 from src.deployment.submariner import Submariner
 from src.deployment.import_managed_cluster import ImportManagedCluster
 from src import framework
+from src.framework.journal import RunJournal
+from src.framework.scheduler import PhaseScheduler
+from src.utility.tracing import traced
 from src.utility.constants import LOG_FORMAT
 from src.utility.utils import (
     is_cluster_running,
     get_non_acm_cluster_config,
     get_kube_config_path,
+    get_installer_binary_path,
 )
 from src.utility.email import email_reports
 from src.utility.messenger import message_reports
 from src.deployment.discovered_dr import DiscoveredDR
+from src.deployment.oadp import OADPDeployment
+from src.deployment.operator_deployment import (
+    OperatorDeployment,
+    apply_registry_mirrors,
+)
 
 log = logging.getLogger(__name__)
 
+# Configuration (section, key) the outcome of each phase depends on, used by
+# the run journal to decide if a succeeded phase can be skipped on resume
+PHASE_INPUTS = {
+    "ocp-prereq": [
+        ("DEPLOYMENT", "installer_version"),
+        ("DEPLOYMENT", "inject_install_manifests"),
+        ("ENV_DATA", "ocs_registry_image"),
+    ],
+    "ocp": [
+        ("DEPLOYMENT", "installer_version"),
+        ("ENV_DATA", "platform"),
+        ("ENV_DATA", "region"),
+        ("ENV_DATA", "base_domain"),
+        ("ENV_DATA", "master_replicas"),
+        ("ENV_DATA", "worker_replicas"),
+        ("ENV_DATA", "master_instance_type"),
+        ("ENV_DATA", "worker_instance_type"),
+    ],
+    "registry-mirrors": [
+        ("ENV_DATA", "ocs_registry_image"),
+        ("ENV_DATA", "default_ocs_registry_image"),
+    ],
+    "catalog-source": [
+        ("ENV_DATA", "ocs_registry_image"),
+        ("ENV_DATA", "default_ocs_registry_image"),
+    ],
+    "ocs": [
+        ("ENV_DATA", "ocs_registry_image"),
+        ("ENV_DATA", "ocs_version"),
+        ("ENV_DATA", "skip_ocs_cluster_creation"),
+        ("DEPLOYMENT", "ocs_csv_channel"),
+    ],
+    "acm": [
+        ("MULTICLUSTER", "acm_hub_unreleased"),
+        ("MULTICLUSTER", "acm_hub_channel"),
+        ("MULTICLUSTER", "acm_unreleased_image"),
+    ],
+    "mco": [("ENV_DATA", "ocs_registry_image"), ("DEPLOYMENT", "ocs_csv_channel")],
+    "submariner": [
+        ("MULTICLUSTER", "submariner_source"),
+        ("MULTICLUSTER", "submariner_url"),
+    ],
+    "import": [("ENV_DATA", "platform")],
+    "operators": [("ENV_DATA", "gitops_install_namespace")],
+    "gitops": [
+        ("ENV_DATA", "gitops_install_namespace"),
+        ("MULTICLUSTER", "primary_cluster"),
+    ],
+    "ssl-certificate": [("ENV_DATA", "base_domain")],
+    "discovered-dr": [
+        ("ENV_DATA", "ocs_registry_image"),
+        ("DEPLOYMENT", "ocs_csv_channel"),
+        ("MULTICLUSTER", "primary_cluster"),
+    ],
+}
+
+
+def get_phase_inputs(name, index):
+    """
+    Get the configuration the phase outcome depends on
+    Args:
+        name (str): Phase name
+        index (int): Index of the cluster the phase is deployed to
+    Returns:
+        dict: Inputs of the phase
+    """
+    cluster = framework.config.clusters[index]
+    inputs = {
+        "cluster_name": cluster.ENV_DATA["cluster_name"],
+        "cluster_path": cluster.ENV_DATA["cluster_path"],
+        "clusters": [c.ENV_DATA["cluster_name"] for c in framework.config.clusters],
+    }
+    for section, key in PHASE_INPUTS.get(name, []):
+        inputs[f"{section}.{key}"] = getattr(cluster, section).get(key)
+    return inputs
+
 
 def set_log_level(log_cli_level):
     """
@@ -49,247 +132,422 @@ class Deployment(object):
     def __init__(self):
         pass
 
-    def deploy_ocp(self, log_cli_level="INFO"):
-        # OCP Deployment
-        processes = []
-        parallel = False
+    @traced()
+    def prepare_ocp_clusters(self):
+        """
+        Download the installer and create the install config of every
+        cluster which has to be deployed
+        """
         for i in range(framework.config.nclusters):
             framework.config.switch_ctx(i)
-            if framework.config.MULTICLUSTER["acm_cluster"]:
-                # Enable parallel deployment only if ACM cluster is present and the flag is true
-                parallel = framework.config.MULTICLUSTER.get(
-                    "parallel_ocp_deployment", False
-                )
-        for i in range(framework.config.nclusters):
-            try:
-                framework.config.switch_ctx(i)
-                cluster_path = framework.config.ENV_DATA["cluster_path"]
-                cluster_name = framework.config.ENV_DATA["cluster_name"]
-                if not framework.config.ENV_DATA.get("skip_ocp_deployment", True):
-                    if is_cluster_running(cluster_path):
-                        log.warning(
-                            "OCP cluster is already running, skipping installation"
-                        )
-                    else:
-                        log.info(f"Deploying OCP cluster for {cluster_name}")
-                        ocp_deployment = OCPDeployment(cluster_name, cluster_path)
-                        ocp_deployment.deploy_prereq()
-                        if parallel:
-                            # Prepare for parallel deployment
-                            p = mp.Process(
-                                target=OCPDeployment.deploy_ocp,
-                                args=(
-                                    ocp_deployment.installer_binary_path,
-                                    ocp_deployment.cluster_path,
-                                    log_cli_level,
-                                ),
-                            )
-                            processes.append(p)
-                        else:
-                            # Sequential deployment
-                            OCPDeployment.deploy_ocp(
-                                ocp_deployment.installer_binary_path,
-                                ocp_deployment.cluster_path,
-                                log_cli_level,
-                            )
-                else:
-                    log.warning("OCP deployment will be skipped")
-            except Exception as ex:
-                log.error("Unable to deploy OCP cluster !", exc_info=True)
+            cluster_path = framework.config.ENV_DATA["cluster_path"]
+            cluster_name = framework.config.ENV_DATA["cluster_name"]
+            if framework.config.ENV_DATA.get("skip_ocp_deployment", True):
+                continue
+            if is_cluster_running(cluster_path):
+                log.warning("OCP cluster is already running, skipping installation")
+                continue
+            log.info(f"Preparing OCP deployment for {cluster_name}")
+            OCPDeployment(cluster_name, cluster_path).deploy_prereq()
         framework.config.switch_default_cluster_ctx()
-        if parallel and len(processes) > 0:
-            for proc in processes:
-                proc.start()
-            # complete the processes
-            for proc in processes:
-                proc.join()
 
-    def deploy_ocs(self, log_cli_level):
-        # OCS Deployment
-        processes = []
-        for i in range(framework.config.nclusters):
-            try:
-                framework.config.switch_ctx(i)
-                if not framework.config.ENV_DATA["skip_ocs_deployment"]:
-                    if (
-                        framework.config.multicluster
-                        and framework.config.get_acm_index() == i
-                        and not framework.config.MULTICLUSTER["primary_cluster"]
-                    ):
-                        continue
-                    log.info("Deploying OCS Operator")
-                    ocs_deployment = OCSDeployment()
-                    ocs_deployment.deploy_prereq()
-                    p = mp.Process(
-                        target=OCSDeployment.deploy_ocs,
-                        args=(
-                            get_kube_config_path(
-                                framework.config.ENV_DATA["cluster_path"]
-                            ),
-                            framework.config.ENV_DATA["skip_ocs_cluster_creation"],
-                        ),
+    @traced()
+    def deploy_ocp_cluster(self, log_cli_level="INFO"):
+        """
+        Deploy OCP cluster of the current cluster context, the install config
+        has to be created by prepare_ocp_clusters
+        """
+        cluster_path = framework.config.ENV_DATA["cluster_path"]
+        if is_cluster_running(cluster_path):
+            log.warning("OCP cluster is already running, skipping installation")
+            return
+        log.info(
+            f"Deploying OCP cluster for {framework.config.ENV_DATA['cluster_name']}"
+        )
+        OCPDeployment.deploy_ocp(
+            get_installer_binary_path(), cluster_path, log_cli_level
+        )
+
+    @traced()
+    def create_catalog_source(self):
+        """
+        Create the custom catalog source (with its ICSP) on the current
+        cluster context
+        """
+        OCSDeployment().create_catalog_source()
+
+    @traced()
+    def apply_registry_mirrors(self, indexes):
+        """
+        Apply the registry mirrors (ICSP) of the catalog image to the clusters
+        and wait for the rollouts to their nodes together
+        Args:
+            indexes (list): Indexes of the clusters
+        """
+        apply_registry_mirrors(indexes)
+
+    @traced()
+    def deploy_ocs_cluster(self):
+        """
+        Deploy OCS operator and OCS cluster on the current cluster context
+        """
+        log.info("Deploying OCS Operator")
+        ocs_deployment = OCSDeployment()
+        ocs_deployment.deploy_prereq()
+        OCSDeployment.deploy_ocs(
+            get_kube_config_path(framework.config.ENV_DATA["cluster_path"]),
+            framework.config.ENV_DATA["skip_ocs_cluster_creation"],
+        )
+
+    @traced()
+    def import_managed_cluster(self, index):
+        """
+        Import a managed cluster into ACM, runs in the ACM cluster context
+        Args:
+            index (int): Index of the managed cluster
+        """
+        cluster = framework.config.clusters[index]
+        cluster_name = cluster.ENV_DATA["cluster_name"]
+        log.info(f"Importing cluster {cluster_name} into ACM")
+        import_managed_cluster = ImportManagedCluster(
+            cluster_name, cluster.ENV_DATA["cluster_path"]
+        )
+        import_managed_cluster.import_cluster()
+        # Wait for the cluster to join instead of sleeping a fixed time
+        import_managed_cluster.wait_for_available([cluster_name])
+
+    @traced()
+    def deploy_cluster_operators(self, gitops=False, oadp=False):
+        """
+        Install the GitOps and / or OADP operators on the current cluster
+        context at once, waiting for their CSVs together
+        Args:
+            gitops (bool): Install the GitOps operator
+            oadp (bool): Install the OADP operator
+        """
+        gitops_deployment = GitopsDeployment()
+        oadp_deployment = OADPDeployment()
+        operators = []
+        if gitops:
+            operators.append((gitops_deployment, gitops_deployment.get_install_args()))
+        if oadp:
+            operators.append((oadp_deployment, oadp_deployment.get_install_args()))
+        log.info(
+            f"Deploying {', '.join(operator.name for operator, _ in operators)} "
+            f"operators"
+        )
+        OperatorDeployment.deploy_operators(operators)
+        if gitops and framework.config.get_acm_index() != framework.config.cur_index:
+            gitops_deployment.gitops_role_binding()
+        if oadp:
+            oadp_deployment.create_data_protection_application()
+
+    @traced()
+    def deploy_gitops_hub(self):
+        """
+        Create GitOps cluster resources on the ACM cluster, GitOps operator
+        has to be deployed by deploy_gitops_operator
+        """
+        GitopsDeployment.deploy_gitops()
+
+    @traced()
+    def configure_discovered_dr_hub(self):
+        """
+        Configure DR for discovered applications on the ACM cluster, OADP
+        operator has to be deployed by deploy_oadp_operator
+        """
+        log.info("Configuring DR setup for discovered applications")
+        DiscoveredDR().configure()
+
+    def build_phase_graph(self, log_cli_level="INFO", journal=None):
+        """
+        Build the dependency graph of the deployment phases. Every phase only
+        depends on the phases of the clusters it really touches, e.g. ACM
+        needs the hub OCP cluster and import of a managed cluster needs ACM
+        and the managed OCP cluster. The per cluster work (catalog source,
+        ODF, GitOps and OADP operators) starts as soon as the cluster is up,
+        only the cross cluster phases (import, Submariner, GitOps cluster,
+        MirrorPeer and DRPolicy) wait for other clusters.
+        Args:
+            log_cli_level (str): OCP installer log level
+            journal (RunJournal): Journal to record the phase outcomes to
+        Returns:
+            PhaseScheduler: The scheduler with all the phases registered
+        """
+        scheduler = PhaseScheduler(journal=journal)
+        clusters = framework.config.clusters
+        ocp_phases = {}
+        catalog_phases = {}
+        ocs_phases = {}
+        to_deploy = [
+            i
+            for i, cluster in enumerate(clusters)
+            if not cluster.ENV_DATA.get("skip_ocp_deployment", True)
+        ]
+        # Enable parallel deployment only if ACM cluster is present and the
+        # flag is true, otherwise every OCP phase waits for the previous one
+        parallel = any(
+            cluster.MULTICLUSTER["acm_cluster"]
+            and cluster.MULTICLUSTER.get("parallel_ocp_deployment", False)
+            for cluster in clusters
+        )
+        if to_deploy:
+            prereq = previous = scheduler.add(
+                "ocp-prereq",
+                self.prepare_ocp_clusters,
+                inputs=get_phase_inputs("ocp-prereq", to_deploy[0]),
+            )
+            for i in to_deploy:
+                ocp_phases[i] = scheduler.add(
+                    "ocp",
+                    self.deploy_ocp_cluster,
+                    index=i,
+                    deps=[prereq, previous],
+                    weight=45,
+                    args=(log_cli_level,),
+                    inputs=get_phase_inputs("ocp", i),
+                )
+                if not parallel:
+                    previous = ocp_phases[i]
+        else:
+            log.warning("OCP deployment will be skipped")
+        acm_index = (
+            framework.config.get_acm_index() if framework.config.multicluster else None
+        )
+        hub = clusters[acm_index].MULTICLUSTER if acm_index is not None else {}
+        ocs_clusters = []
+        for i, cluster in enumerate(clusters):
+            if cluster.ENV_DATA["skip_ocs_deployment"]:
+                log.warning(
+                    f"OCS deployment will be skipped for "
+                    f"{cluster.ENV_DATA['cluster_name']}"
+                )
+                continue
+            if acm_index == i and not cluster.MULTICLUSTER["primary_cluster"]:
+                continue
+            ocs_clusters.append(i)
+        catalog_clusters = list(ocs_clusters)
+        if hub and not hub["skip_mco_deployment"] and acm_index not in ocs_clusters:
+            catalog_clusters.append(acm_index)
+        # The ICSPs of all the clusters are applied at once, so that the node
+        # reboots of the clusters overlap, the catalog sources wait for them
+        mirrors = None
+        if catalog_clusters and framework.config.RUN.get("batch_registry_mirrors"):
+            mirrors = scheduler.add(
+                "registry-mirrors",
+                self.apply_registry_mirrors,
+                deps=[ocp_phases.get(i) for i in catalog_clusters],
+                weight=30,
+                args=(catalog_clusters,),
+                inputs=dict(
+                    get_phase_inputs("registry-mirrors", catalog_clusters[0]),
+                    images=[
+                        clusters[i].ENV_DATA.get("ocs_registry_image")
+                        for i in catalog_clusters
+                    ],
+                ),
+            )
+        for i in catalog_clusters:
+            catalog_phases[i] = scheduler.add(
+                "catalog-source",
+                self.create_catalog_source,
+                index=i,
+                deps=[ocp_phases.get(i), mirrors],
+                weight=30 if mirrors is None else 5,
+                inputs=get_phase_inputs("catalog-source", i),
+            )
+        for i in ocs_clusters:
+            ocs_phases[i] = scheduler.add(
+                "ocs",
+                self.deploy_ocs_cluster,
+                index=i,
+                deps=[catalog_phases[i]],
+                weight=20,
+                inputs=get_phase_inputs("ocs", i),
+            )
+
+        def cluster_ready(i):
+            # Operators of a cluster are installed from its final catalog
+            # source, so they have to wait for it to be replaced
+            return catalog_phases.get(i) or ocp_phases.get(i)
+
+        if acm_index is None:
+            return scheduler
+
+        all_ocp = list(ocp_phases.values())
+        acm = mco = submariner = gitops = ssl = None
+        imports = []
+        if hub["deploy_acm_hub_cluster"]:
+            acm = scheduler.add(
+                "acm",
+                self.deploy_acm,
+                index=acm_index,
+                deps=[cluster_ready(acm_index)],
+                weight=15,
+                inputs=get_phase_inputs("acm", acm_index),
+            )
+        if not hub["skip_mco_deployment"]:
+            mco = scheduler.add(
+                "mco",
+                self.deploy_mco,
+                index=acm_index,
+                deps=[cluster_ready(acm_index), acm],
+                weight=10,
+                inputs=get_phase_inputs("mco", acm_index),
+            )
+        if hub["configure_submariner"]:
+            submariner = scheduler.add(
+                "submariner",
+                self.configure_submariner,
+                index=acm_index,
+                deps=all_ocp,
+                weight=10,
+                inputs=get_phase_inputs("submariner", acm_index),
+            )
+        if hub["import_managed_clusters"]:
+            for cluster in get_non_acm_cluster_config():
+                i = cluster.MULTICLUSTER["multicluster_index"]
+                imports.append(
+                    scheduler.add(
+                        "import",
+                        self.import_managed_cluster,
+                        index=acm_index,
+                        deps=[acm, ocp_phases.get(i)],
+                        weight=3,
+                        args=(i,),
+                        label=i,
+                        inputs=get_phase_inputs("import", i),
                     )
-                    processes.append(p)
-                else:
-                    log.warning("OCS deployment will be skipped")
-            except Exception as ex:
-                log.error("Unable to deploy OCS cluster", exc_info=True)
+                )
+        # The GitOps and OADP operators of a cluster are installed together
+        operator_phases = {}
+        oadp_clusters = []
+        if hub.get("configure_discovered_dr"):
+            oadp_clusters = [
+                cluster.MULTICLUSTER["multicluster_index"]
+                for cluster in get_non_acm_cluster_config(include_acm=True)
+            ]
+        for i in range(len(clusters)):
+            gitops_operator = not hub["skip_gitops_deployment"]
+            oadp_operator = i in oadp_clusters
+            if gitops_operator or oadp_operator:
+                operator_phases[i] = scheduler.add(
+                    "operators",
+                    self.deploy_cluster_operators,
+                    index=i,
+                    deps=[cluster_ready(i)],
+                    weight=5,
+                    args=(gitops_operator, oadp_operator),
+                    inputs=dict(
+                        get_phase_inputs("operators", i),
+                        gitops=gitops_operator,
+                        oadp=oadp_operator,
+                    ),
+                )
+        if not hub["skip_gitops_deployment"]:
+            gitops = scheduler.add(
+                "gitops",
+                self.deploy_gitops_hub,
+                index=acm_index,
+                deps=list(operator_phases.values()) + imports + [acm],
+                weight=5,
+                inputs=get_phase_inputs("gitops", acm_index),
+            )
+        if hub["exchange_ssl_certificate"]:
+            ssl = scheduler.add(
+                "ssl-certificate",
+                self.ssl_certificate,
+                index=acm_index,
+                deps=all_ocp,
+                weight=2,
+                inputs=get_phase_inputs("ssl-certificate", acm_index),
+            )
+        if hub.get("configure_discovered_dr"):
+            scheduler.add(
+                "discovered-dr",
+                self.configure_discovered_dr_hub,
+                index=acm_index,
+                deps=list(ocs_phases.values())
+                + [operator_phases[i] for i in oadp_clusters]
+                + imports
+                + [acm, mco, submariner, gitops, ssl],
+                weight=10,
+                inputs=dict(
+                    get_phase_inputs("discovered-dr", acm_index),
+                    primary_clusters=[
+                        cluster.ENV_DATA["cluster_name"]
+                        for cluster in clusters
+                        if cluster.MULTICLUSTER["primary_cluster"]
+                    ],
+                ),
+            )
+        return scheduler
+
+    @traced()
+    def run_phases(self, log_cli_level="INFO", resume=False):
+        """
+        Run all the deployment phases following their dependencies
+        Args:
+            log_cli_level (str): OCP installer log level
+            resume (bool): Skip the phases which already succeeded in the
+                previous run with the same configuration
+        Returns:
+            dict: phase key -> final state of the phase
+        """
+        scheduler = self.build_phase_graph(log_cli_level, RunJournal(resume))
+        results = scheduler.run()
         framework.config.switch_default_cluster_ctx()
-        if len(processes) > 0:
-            log.info(f"Creating OCS cluster on {len(processes)} clusters")
-            [proc.start() for proc in processes]
-            # complete the processes
-            for proc in processes:
-                proc.join()
+        return results
 
+    @traced()
     def deploy_mco(self):
-        # MCO Deployment
-        for i in range(framework.config.nclusters):
-            try:
-                framework.config.switch_ctx(i)
-                if (
-                    framework.config.multicluster
-                    and framework.config.get_acm_index() == i
-                ):
-                    if not framework.config.MULTICLUSTER["skip_mco_deployment"]:
-                        log.info("Deploying MCO Operator")
-                        mco_deployment = MCODeployment()
-                        mco_deployment.deploy_prereq()
-                        MCODeployment.deploy_mco()
-                    else:
-                        log.warning("MCO deployment will be skipped")
-            except Exception as ex:
-                log.error("Unable to deploy MCO operator", exc_info=True)
-        framework.config.switch_default_cluster_ctx()
+        """
+        Deploy MCO operator on the current cluster context (ACM hub)
+        """
+        log.info("Deploying MCO Operator")
+        mco_deployment = MCODeployment()
+        mco_deployment.deploy_prereq()
+        MCODeployment.deploy_mco()
 
+    @traced()
     def deploy_acm(self):
-        # ACM Deployment
-        for i in range(framework.config.nclusters):
-            try:
-                framework.config.switch_ctx(i)
-                if (
-                    framework.config.multicluster
-                    and framework.config.get_acm_index() == i
-                ):
-                    if framework.config.MULTICLUSTER["deploy_acm_hub_cluster"]:
-                        log.info("Deploying ACM")
-                        acm_deployment = ACMDeployment()
-                        if framework.config.MULTICLUSTER.get("acm_hub_unreleased"):
-                            acm_deployment.deploy_acm_hub_unreleased()
-                        else:
-                            acm_deployment.deploy_acm_hub_released()
-                    else:
-                        log.warning("ACM deployment will be skipped")
-            except Exception as ex:
-                log.error("Unable to deploy ACM hub operator", exc_info=True)
-        framework.config.switch_default_cluster_ctx()
+        """
+        Deploy ACM hub on the current cluster context
+        """
+        log.info("Deploying ACM")
+        acm_deployment = ACMDeployment()
+        if framework.config.MULTICLUSTER.get("acm_hub_unreleased"):
+            acm_deployment.deploy_acm_hub_unreleased()
+        else:
+            acm_deployment.deploy_acm_hub_released()
 
+    @traced()
     def configure_submariner(self):
-        try:
-            for i in range(framework.config.nclusters):
-                framework.config.switch_ctx(i)
-                if (
-                    framework.config.multicluster
-                    and framework.config.get_acm_index() == i
-                ):
-                    if framework.config.MULTICLUSTER["configure_submariner"]:
-                        log.info("Configuring submariner")
-                        submariner = Submariner()
-                        submariner.deploy()
-                    else:
-                        log.warning("Submariner configuration will be skipped")
-        except Exception as ex:
-            log.error("Unable to configure submariner", exc_info=True)
-        framework.config.switch_default_cluster_ctx()
-
-    def aws_import_cluster(self):
-        try:
-            for i in range(framework.config.nclusters):
-                framework.config.switch_ctx(i)
-                if (
-                    framework.config.multicluster
-                    and framework.config.get_acm_index() == i
-                ):
-                    if framework.config.MULTICLUSTER["import_managed_clusters"]:
-                        for cluster in get_non_acm_cluster_config():
-                            log.info(
-                                f"Importing cluster {cluster.ENV_DATA['cluster_name']} into ACM"
-                            )
-                            import_managed_cluster = ImportManagedCluster(
-                                cluster.ENV_DATA["cluster_name"],
-                                cluster.ENV_DATA["cluster_path"],
-                            )
-                            import_managed_cluster.import_cluster()
-                        log.info(
-                            "Sleeping for 90 seconds after importing managed cluster"
-                        )
-                        time.sleep(90)
-                    else:
-                        log.warning(f"Skipping managed cluster import")
-        except Exception as ex:
-            log.error("Unable to import cluster", exc_info=True)
-        framework.config.switch_default_cluster_ctx()
-
-    def deploy_gitops(self):
-        # MCO Deployment
-        for i in range(framework.config.nclusters):
-            try:
-                framework.config.switch_ctx(i)
-                if (
-                    framework.config.multicluster
-                    and framework.config.get_acm_index() == i
-                ):
-                    if not framework.config.MULTICLUSTER["skip_gitops_deployment"]:
-                        log.info("Deploying GitOps Operator")
-                        for cluster in framework.config.clusters:
-                            index = cluster.MULTICLUSTER["multicluster_index"]
-                            framework.config.switch_ctx(index)
-                            gitops_deployment = GitopsDeployment()
-                            gitops_deployment.deploy_prereq()
-                            if framework.config.get_acm_index() == index:
-                                GitopsDeployment.deploy_gitops()
-                            else:
-                                gitops_deployment.gitops_role_binding()
-                    else:
-                        log.warning("GitOps deployment will be skipped")
-            except Exception as ex:
-                log.error("Unable to deploy GitOps operator", exc_info=True)
-        framework.config.switch_default_cluster_ctx()
+        """
+        Configure Submariner from the current cluster context (ACM hub)
+        """
+        log.info("Configuring submariner")
+        Submariner().deploy()
 
+    @traced()
     def ssl_certificate(self):
-        try:
-            for i in range(framework.config.nclusters):
-                framework.config.switch_ctx(i)
-                if (
-                    framework.config.multicluster
-                    and framework.config.get_acm_index() == i
-                ):
-                    if framework.config.MULTICLUSTER["exchange_ssl_certificate"]:
-                        ssl_certificate = SSLCertificate()
-                        for cluster in framework.config.clusters:
-                            framework.config.switch_ctx(
-                                cluster.MULTICLUSTER["multicluster_index"]
-                            )
-                            log.info("Fetching ssl secrets")
-                            ssl_certificate.get_certificate()
-                        ssl_certificate.get_certificate_file_path()
-                        log.warning(ssl_certificate.ssl_certificate_path)
-                        for cluster in framework.config.clusters:
-                            framework.config.switch_ctx(
-                                cluster.MULTICLUSTER["multicluster_index"]
-                            )
-                            log.info("Exchanging ssl secrets")
-                            ssl_certificate.exchange_certificate()
-                    else:
-                        log.warning(
-                            f"Skipping SSL certificate exchange for managed clusters"
-                        )
-        except Exception as ex:
-            log.error(
-                "Unable to configure SSL certificate for the cluster", exc_info=True
-            )
-        framework.config.switch_default_cluster_ctx()
+        """
+        Exchange the SSL certificates of all the clusters, runs in the ACM
+        cluster context
+        """
+        ssl_certificate = SSLCertificate()
+        for cluster in framework.config.clusters:
+            framework.config.switch_ctx(cluster.MULTICLUSTER["multicluster_index"])
+            log.info("Fetching ssl secrets")
+            ssl_certificate.get_certificate()
+        ssl_certificate.get_certificate_data()
+        for cluster in framework.config.clusters:
+            framework.config.switch_ctx(cluster.MULTICLUSTER["multicluster_index"])
+            log.info("Exchanging ssl secrets")
+            ssl_certificate.exchange_certificate()
+        framework.config.switch_acm_ctx()
 
+    @traced()
     def send_email(self):
         # send email notification
         for i in range(framework.config.nclusters):
@@ -301,6 +559,7 @@ class Deployment(object):
                 log.warning("Email notification will be skipped")
         framework.config.switch_default_cluster_ctx()
 
+    @traced()
     def send_message(self):
         # send gchat message
         for i in range(framework.config.nclusters):
@@ -313,16 +572,3 @@ class Deployment(object):
             else:
                 log.warning("Gchat notification will be skipped")
         framework.config.switch_default_cluster_ctx()
-
-    def configure_discovered_dr(self):
-        try:
-            framework.config.switch_acm_ctx()
-            if framework.config.MULTICLUSTER["configure_discovered_dr"]:
-                log.info("Configuring DR setup for discovered applications")
-                discovered_dr = DiscoveredDR()
-                discovered_dr.deploy()
-            else:
-                log.warning("Discovered DR configuration will be skipped")
-        except Exception:
-            log.error("Unable to configure discovered DR", exc_info=True)
-        framework.config.switch_default_cluster_ctx()
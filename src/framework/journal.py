@@ -0,0 +1,120 @@
+"""
+Run journal of the deployment phases.
+
+The journal records the outcome of every phase in a JSON file under the
+cluster path of the cluster the phase runs in, together with a hash of the
+phase inputs. A resumed run skips the phases which already succeeded with
+the same inputs.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+
+from src import framework
+from src.utility.constants import JOURNAL_FILE_NAME
+
+log = logging.getLogger(__name__)
+
+
+def get_input_hash(inputs):
+    """
+    Get hash of the phase inputs
+    Args:
+        inputs (dict): Inputs of the phase
+    Returns:
+        str: sha256 hex digest of the inputs
+    """
+    data = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class RunJournal(object):
+    """
+    Persistent journal of the phase outcomes, one file per cluster
+    """
+
+    def __init__(self, resume=False):
+        """
+        Args:
+            resume (bool): If True, the journals of the previous run are
+                loaded and its succeeded phases are skipped, otherwise a new
+                journal is started.
+        """
+        self.resume = resume
+        self.journals = {}
+        for index, cluster in enumerate(framework.config.clusters):
+            journal = {"run_id": framework.config.run_id, "phases": {}}
+            path = self.get_path(index)
+            if resume and os.path.exists(path):
+                with open(path) as f:
+                    journal = json.load(f)
+                log.info(f"Loaded run journal {path}")
+            self.journals[index] = journal
+
+    @staticmethod
+    def get_path(index):
+        """
+        Args:
+            index (int): Index of the cluster
+        Returns:
+            str: Path to the journal file of the cluster
+        """
+        cluster_path = framework.config.clusters[index].ENV_DATA["cluster_path"]
+        return os.path.join(os.path.expanduser(cluster_path), JOURNAL_FILE_NAME)
+
+    @staticmethod
+    def _get_index(phase):
+        if phase.index is not None:
+            return phase.index
+        return framework.config.clusters[0].ENV_DATA.get(
+            "default_cluster_context_index", 0
+        )
+
+    def is_completed(self, phase):
+        """
+        Check if the phase succeeded in the previous run with the same inputs
+        Args:
+            phase (Phase): The phase to check
+        Returns:
+            bool: True if the phase can be skipped
+        """
+        if not self.resume:
+            return False
+        entry = self.journals[self._get_index(phase)]["phases"].get(phase.key, {})
+        return entry.get("state") == "succeeded" and entry.get(
+            "input_hash"
+        ) == get_input_hash(phase.inputs)
+
+    def record(self, phase):
+        """
+        Record the outcome of the phase and persist the journal
+        Args:
+            phase (Phase): The finished phase
+        """
+        index = self._get_index(phase)
+        self.journals[index]["phases"][phase.key] = {
+            "state": phase.state,
+            "input_hash": get_input_hash(phase.inputs),
+            "run_id": framework.config.run_id,
+            "start_time": phase.start_time,
+            "end_time": phase.end_time,
+            "duration": int(phase.duration),
+        }
+        self.save(index)
+
+    def save(self, index):
+        """
+        Write journal of the cluster to its cluster path
+        Args:
+            index (int): Index of the cluster
+        """
+        path = self.get_path(index)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.journals[index]["updated"] = time.time()
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.journals[index], f, indent=2)
+        os.replace(temp_path, path)
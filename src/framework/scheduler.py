@@ -0,0 +1,282 @@
+"""
+Dependency graph based phase scheduler.
+
+Every deployment phase is registered as a node which is bound to a cluster
+context and declares the nodes it depends on. Nodes whose dependencies are
+satisfied are started concurrently on a ProcessExecutor, the ones on the
+longest remaining chain first.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+
+from src import framework
+from src.ocs.diagnostics import collect_diagnostics_in_background, collected_since
+from src.utility.deadline import deadline
+from src.utility.executor import ProcessExecutor
+
+log = logging.getLogger(__name__)
+
+# Phase states
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+@dataclass
+class Phase:
+    """
+    Single node of the phase graph
+    Args:
+        key (str): Unique node name, e.g. 'ocs[cluster1]'
+        func (function): The function to run for this node
+        index (int): Index of the cluster context the node runs in, None to
+            keep the default cluster context
+        deps (list): Keys of the nodes this node depends on
+        weight (int): Estimated duration of the node, used to prioritize
+            the longest chain of the graph
+        args (tuple): Arguments for the function
+        inputs (dict): Configuration the phase outcome depends on, the run
+            journal skips a succeeded phase on resume only if they are the same
+        deadline (int): Time budget of the phase in seconds, the waits and
+            commands of the phase fail once it is spent, unlimited if not set
+    """
+
+    key: str
+    func: object
+    index: int = None
+    deps: list = field(default_factory=list)
+    weight: int = 1
+    args: tuple = ()
+    inputs: dict = field(default_factory=dict)
+    deadline: int = None
+    state: str = PENDING
+    start_time: float = None
+    end_time: float = None
+
+    @property
+    def duration(self):
+        if self.start_time is None:
+            return 0
+        return (self.end_time or time.time()) - self.start_time
+
+
+def _run_phase(phase):
+    """
+    Executor task which runs a single phase in its cluster context
+    """
+    if phase.index is not None:
+        framework.config.switch_ctx(phase.index)
+    with deadline(phase.deadline, phase.key):
+        phase.func(*phase.args)
+
+
+class PhaseScheduler(object):
+    """
+    Runs the registered phases as a DAG
+    """
+
+    def __init__(self, max_workers=None, journal=None):
+        """
+        Args:
+            max_workers (int): Maximum number of phases running at the same
+                time, defaults to RUN['max_parallel_phases']
+            journal (RunJournal): Journal to record the phase outcomes to
+        """
+        self.max_workers = max_workers or framework.config.RUN.get(
+            "max_parallel_phases", 4
+        )
+        self.journal = journal
+        self.phases = {}
+        self.diagnostics = []
+
+    def add(
+        self,
+        name,
+        func,
+        index=None,
+        deps=None,
+        weight=1,
+        args=(),
+        label=None,
+        inputs=None,
+        deadline=None,
+    ):
+        """
+        Register a phase
+        Args:
+            name (str): Phase name
+            func (function): The function to run
+            index (int): Cluster context index the function runs in
+            deps (list): Keys of the phases this one depends on
+            weight (int): Estimated duration (in minutes) of the phase
+            args (tuple): Arguments for the function
+            label (int): Index of the cluster used in the phase key, defaults
+                to index
+            inputs (dict): Configuration the phase outcome depends on
+            deadline (int): Time budget of the phase in seconds, defaults to
+                RUN['phase_deadlines'][name]
+        Returns:
+            str: Key of the registered phase
+        """
+        label = index if label is None else label
+        key = name
+        if label is not None:
+            key = (
+                f"{name}[{framework.config.clusters[label].ENV_DATA['cluster_name']}]"
+            )
+        if key in self.phases:
+            raise ValueError(f"Phase {key} is already registered")
+        self.phases[key] = Phase(
+            key=key,
+            func=func,
+            index=index,
+            deps=list(dict.fromkeys(dep for dep in (deps or []) if dep)),
+            weight=weight,
+            args=args,
+            inputs=dict(inputs or {}, phase=key),
+            deadline=deadline
+            or (framework.config.RUN.get("phase_deadlines") or {}).get(name),
+        )
+        return key
+
+    def validate(self):
+        """
+        Check that all dependencies are registered and the graph has no cycle
+        Raises:
+            ValueError: In case of unknown dependency or dependency cycle
+        """
+        for phase in self.phases.values():
+            for dep in phase.deps:
+                if dep not in self.phases:
+                    raise ValueError(f"Phase {phase.key} depends on unknown {dep}")
+        in_degree = {key: len(phase.deps) for key, phase in self.phases.items()}
+        ready = [key for key, degree in in_degree.items() if not degree]
+        visited = 0
+        while ready:
+            key = ready.pop()
+            visited += 1
+            for phase in self.phases.values():
+                if key in phase.deps:
+                    in_degree[phase.key] -= 1
+                    if not in_degree[phase.key]:
+                        ready.append(phase.key)
+        if visited != len(self.phases):
+            raise ValueError("Dependency cycle found in the phase graph")
+
+    def ranks(self):
+        """
+        Length of the longest chain starting at each phase, the phase
+        itself included
+        Returns:
+            dict: phase key -> rank
+        """
+        ranks = {}
+
+        def rank(key):
+            if key not in ranks:
+                successors = [
+                    phase.key for phase in self.phases.values() if key in phase.deps
+                ]
+                ranks[key] = self.phases[key].weight + max(
+                    [rank(successor) for successor in successors], default=0
+                )
+            return ranks[key]
+
+        for key in self.phases:
+            rank(key)
+        return ranks
+
+    def _ready_phases(self):
+        """
+        Mark phases with a failed dependency as skipped and return the ones
+        which can be started
+        """
+        ready = []
+        for phase in self.phases.values():
+            if phase.state != PENDING:
+                continue
+            dep_states = [self.phases[dep].state for dep in phase.deps]
+            if any(state in (FAILED, SKIPPED) for state in dep_states):
+                log.warning(f"Skipping phase {phase.key}, a dependency did not succeed")
+                phase.state = SKIPPED
+            elif all(state == SUCCEEDED for state in dep_states):
+                ready.append(phase)
+        return ready
+
+    def run(self):
+        """
+        Run all the registered phases
+        Returns:
+            dict: phase key -> final state of the phase
+        """
+        self.validate()
+        ranks = self.ranks()
+        executor = ProcessExecutor(max_workers=self.max_workers)
+        while True:
+            ready = self._ready_phases()
+            completed = [
+                phase
+                for phase in ready
+                if self.journal and self.journal.is_completed(phase)
+            ]
+            if completed:
+                for phase in completed:
+                    log.info(
+                        f"Phase {phase.key} already succeeded in the previous "
+                        f"run, skipping"
+                    )
+                    phase.state = SUCCEEDED
+                # Their dependents may be ready now
+                continue
+            ready.sort(key=lambda phase: ranks[phase.key], reverse=True)
+            # Phases are submitted only when a worker is free, so that the
+            # ones becoming ready later are still ordered by their rank
+            while ready and executor.idle_workers > 0:
+                phase = ready.pop(0)
+                log.info(f"Starting phase {phase.key}")
+                phase.state = RUNNING
+                phase.start_time = time.time()
+                executor.submit(phase.key, _run_phase, phase)
+            if not executor.running:
+                # A skipped phase can make its dependents skipped as well
+                if any(phase.state == PENDING for phase in self.phases.values()):
+                    continue
+                break
+            for result in executor.wait():
+                phase = self.phases[result.name]
+                phase.end_time = time.time()
+                phase.state = SUCCEEDED if result.success else FAILED
+                log.info(
+                    f"Phase {phase.key} {phase.state} in {int(phase.duration)} seconds"
+                )
+                if self.journal:
+                    self.journal.record(phase)
+                if phase.state == FAILED:
+                    self.collect_diagnostics(phase)
+        for thread in self.diagnostics:
+            thread.join()
+        self.log_summary()
+        return {key: phase.state for key, phase in self.phases.items()}
+
+    def collect_diagnostics(self, phase):
+        """
+        Collect the diagnostics of the cluster of the failed phase in the
+        background, unless a failed wait of the phase already collected them
+        """
+        index = framework.config.cur_index if phase.index is None else phase.index
+        cluster_name = framework.config.clusters[index].ENV_DATA["cluster_name"]
+        if collected_since(cluster_name, phase.start_time):
+            log.info(f"Diagnostics of {cluster_name} already collected")
+            return
+        self.diagnostics.append(
+            collect_diagnostics_in_background(f"phase {phase.key}", [index])
+        )
+
+    def log_summary(self):
+        log.info("Phase summary:")
+        for phase in sorted(self.phases.values(), key=lambda p: p.start_time or 0):
+            log.info(f"  {phase.key}: {phase.state} ({int(phase.duration)}s)")
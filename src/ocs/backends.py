@@ -0,0 +1,728 @@
+"""
+Backends of the OCP class.
+
+OcBackend runs the 'oc' binary for every call. KubernetesBackend talks to the
+API server directly with a DynamicClient from the openshift package, the
+clients are pooled per kubeconfig (and process, the connection pool can't be
+shared with a forked child), so the kubeconfig loading, API discovery and TLS
+handshake are done only once. The backend is selected by RUN['ocp_backend'],
+KubernetesBackend falls back to OcBackend for anything it can't handle.
+"""
+
+import json
+import logging
+import multiprocessing.util
+import os
+import select
+import shlex
+import subprocess
+import threading
+import time
+import urllib.parse
+
+from src.framework import config
+from src.utility.exceptions import CommandFailed
+from src.utility.serialization import json_dumps
+
+log = logging.getLogger(__name__)
+
+try:
+    from kubernetes import client as k8s_client
+    from kubernetes import config as k8s_config
+    from openshift.dynamic import DynamicClient
+    from openshift.dynamic.exceptions import (
+        DynamicApiError,
+        NotFoundError,
+        ResourceNotFoundError,
+    )
+except ImportError:
+    DynamicClient = None
+
+
+# Timeout in seconds of the list which starts a watch
+WATCH_LIST_TIMEOUT = 120
+
+# Field manager of the server side applies of KubernetesBackend
+FIELD_MANAGER = "ocp4mco"
+
+# Seconds without any watch event after which the watch generators yield None,
+# so that the consumer can check its deadline or stop the watch
+WATCH_HEARTBEAT = 1
+
+
+class BackendNotSupported(Exception):
+    """
+    The backend can't handle the call, the 'oc' fallback is used
+    """
+
+    pass
+
+
+class OcBackend(object):
+    """
+    Runs every call as an 'oc' command
+    """
+
+    name = "oc"
+
+    # (pid, kubeconfig) -> API resources of the cluster and the default
+    # namespace of the kubeconfig, see _get_api_resources()
+    _api_resources = {}
+
+    def get(
+        self,
+        ocp_obj,
+        resource_name="",
+        selector=None,
+        field_selector=None,
+        all_namespaces=False,
+        silent=False,
+        skip_tls_verify=False,
+    ):
+        """
+        Get the resource or list of resources
+        Args:
+            ocp_obj (OCP): The OCP object of the resource kind
+            resource_name (str): The resource name to fetch
+            selector (str): The label selector to look for
+            field_selector (str): Selector (field query) to filter on
+            all_namespaces (bool): Equal to oc get <resource> -A
+            silent (bool): If True will silent errors from the server
+            skip_tls_verify (bool): Skip the TLS verification of the server
+        Raises:
+            CommandFailed: In case the get failed
+        Returns:
+            dict: The resource, or 'List' with the items
+        """
+        command, _, _ = ocp_obj._get_command(
+            resource_name, True, selector, all_namespaces, field_selector
+        )
+        return ocp_obj.exec_oc_cmd(
+            command, silent=silent, skip_tls_verify=skip_tls_verify
+        )
+
+    def apply(self, ocp_obj, data):
+        """
+        Apply the resource
+        Args:
+            ocp_obj (OCP): The OCP object of the resource kind
+            data (dict): The resource
+        Returns:
+            dict: The applied resource
+        """
+        return ocp_obj.exec_oc_cmd(
+            "apply -f - -o json", input=json_dumps(data).encode()
+        )
+
+    def apply_objects(self, ocp_obj, objs, timeout=600):
+        """
+        Apply the resources in a single 'oc apply' call, they are sent as
+        one 'List' through stdin
+        Args:
+            ocp_obj (OCP): The OCP object of the cluster, its namespace is used
+                for the resources without one
+            objs (list): The resources
+            timeout (int): Timeout of the apply in seconds
+        Returns:
+            list: The applied resources
+        """
+        manifest = {"apiVersion": "v1", "kind": "List", "items": objs}
+        applied = ocp_obj.exec_oc_cmd(
+            "apply -f - -o json",
+            timeout=timeout,
+            input=json_dumps(manifest).encode(),
+        )
+        if applied.get("kind") == "List":
+            return applied["items"]
+        return [applied]
+
+    def patch(self, ocp_obj, resource_name, params, format_type="json"):
+        """
+        Patch the resource
+        Args:
+            ocp_obj (OCP): The OCP object of the resource kind
+            resource_name (str): Name of the resource
+            params (str): The patch
+            format_type (str): Type of the patch: json, merge or strategic
+        Returns:
+            dict: The patched resource
+        """
+        if not isinstance(params, str):
+            params = json_dumps(params)
+        return ocp_obj.exec_oc_cmd(
+            f"patch {ocp_obj.kind} {resource_name} --type {format_type} "
+            f"-p '{params}' -o json"
+        )
+
+    def label(self, ocp_obj, resource_name, label):
+        """
+        Label the resource
+        Args:
+            ocp_obj (OCP): The OCP object of the resource kind
+            resource_name (str): Name of the resource
+            label (str): The label, e.g. "app=foo" or "app-" to remove it
+        Returns:
+            dict: The labeled resource, the 'oc' output for the oc backend
+        """
+        return ocp_obj.exec_oc_cmd(
+            f"label {ocp_obj.kind} {resource_name} {label} --overwrite "
+        )
+
+    def _raw_cmd(self, ocp_obj, command):
+        """
+        Build the 'oc' command with the kubeconfig but without the namespace,
+        which is part of the API path of the raw requests
+        Args:
+            ocp_obj (OCP): The OCP object of the resource kind
+            command (list): Arguments of the command without the initial 'oc'
+        Returns:
+            list: The full 'oc' command
+        """
+        oc_cmd = "oc "
+        kubeconfig_path = ocp_obj.get_kubeconfig_path()
+        if kubeconfig_path:
+            oc_cmd += f"--kubeconfig {kubeconfig_path} "
+        if ocp_obj.skip_tls_verify:
+            command = command + ["--insecure-skip-tls-verify"]
+        return shlex.split(oc_cmd) + command
+
+    def _run_discovery(self, ocp_obj, command):
+        """
+        Returns:
+            tuple: stdout and stderr of the 'oc' command, the return code is
+                not checked
+        """
+        completed = subprocess.run(
+            self._raw_cmd(ocp_obj, command),
+            capture_output=True,
+            stdin=subprocess.DEVNULL,
+            timeout=WATCH_LIST_TIMEOUT,
+        )
+        return (
+            completed.stdout.decode(errors="replace"),
+            completed.stderr.decode(errors="replace"),
+        )
+
+    def _get_api_resources(self, ocp_obj):
+        """
+        Get the API resources served by the cluster, discovered once per
+        kubeconfig by 'oc api-resources'
+        Raises:
+            CommandFailed: In case the API discovery failed
+        Returns:
+            tuple: list of the resources (dict of name, short_names,
+                group_version, namespaced and kind) and the default
+                namespace of the kubeconfig
+        """
+        key = (os.getpid(), ocp_obj.get_kubeconfig_path())
+        if key not in self._api_resources:
+            stdout, stderr = self._run_discovery(
+                ocp_obj, ["api-resources", "--no-headers"]
+            )
+            resources = []
+            # NAME [SHORTNAMES] APIVERSION NAMESPACED KIND, an unavailable
+            # aggregated API fails the command but the rest is still listed
+            for line in stdout.splitlines():
+                columns = line.split()
+                if len(columns) not in (4, 5) or columns[-2] not in (
+                    "true",
+                    "false",
+                ):
+                    continue
+                resources.append(
+                    {
+                        "name": columns[0],
+                        "short_names": (
+                            columns[1].split(",") if len(columns) == 5 else []
+                        ),
+                        "group_version": columns[-3],
+                        "namespaced": columns[-2] == "true",
+                        "kind": columns[-1],
+                    }
+                )
+            if not resources:
+                raise CommandFailed(
+                    f"Unable to discover the API resources: {stderr[-1000:]}"
+                )
+            namespace, _ = self._run_discovery(
+                ocp_obj,
+                ["config", "view", "--minify", "-o", "jsonpath={..namespace}"],
+            )
+            self._api_resources[key] = (resources, namespace.strip() or "default")
+        return self._api_resources[key]
+
+    def _get_api_path(self, ocp_obj):
+        """
+        Get the API path of the resources of the kind (and namespace), the
+        kind can be given the same way as for 'oc', e.g. 'csv', 'node' or
+        'subscription.operators.coreos.com'
+        Raises:
+            CommandFailed: In case the kind can't be resolved
+        Returns:
+            str: The API path, e.g. /api/v1/nodes
+        """
+        resources, default_namespace = self._get_api_resources(ocp_obj)
+        kind, _, group = ocp_obj.kind.lower().partition(".")
+        for resource in resources:
+            group_version = resource["group_version"]
+            if group and group_version.rpartition("/")[0] != group:
+                continue
+            if "/" in ocp_obj.api_version and group_version != ocp_obj.api_version:
+                continue
+            if kind not in (resource["name"], resource["kind"].lower()) and (
+                kind not in resource["short_names"]
+            ):
+                continue
+            if "/" in group_version:
+                path = f"/apis/{group_version}"
+            else:
+                path = f"/api/{group_version}"
+            if resource["namespaced"]:
+                namespace = ocp_obj.namespace or default_namespace
+                path = f"{path}/namespaces/{namespace}"
+            return f"{path}/{resource['name']}"
+        raise CommandFailed(f"Unable to resolve kind {ocp_obj.kind}")
+
+    def _list(self, ocp_obj, path, query):
+        """
+        List the resources through the API path, unlike 'oc get -o json' the
+        list has the resourceVersion to start the watch from
+        Returns:
+            dict: The list, its items have kind and apiVersion set
+        """
+        url = f"{path}?{urllib.parse.urlencode(query)}" if query else path
+        completed = subprocess.run(
+            self._raw_cmd(ocp_obj, ["get", "--raw", url]),
+            capture_output=True,
+            stdin=subprocess.DEVNULL,
+            timeout=WATCH_LIST_TIMEOUT,
+        )
+        if completed.returncode:
+            raise CommandFailed(
+                f"Unable to list {ocp_obj.kind}: "
+                f"{completed.stderr.decode(errors='replace')}"
+            )
+        data = json.loads(completed.stdout)
+        kind = data.get("kind", "")
+        for item in data.get("items") or []:
+            item.setdefault("apiVersion", data.get("apiVersion"))
+            if kind.endswith("List"):
+                item.setdefault("kind", kind[: -len("List")])
+        return data
+
+    def watch(self, ocp_obj, resource_name="", selector=None, timeout=None):
+        """
+        Watch the resources of the kind. The current resources are listed and
+        yielded as ADDED events first, followed by None, then their changes
+        are watched from the resourceVersion of the list.
+        Args:
+            ocp_obj (OCP): The OCP object of the resource kind
+            resource_name (str): Name of the resource to watch, all the
+                resources of the kind if not set
+            selector (str): The label selector to look for
+            timeout (int): Time in seconds to watch, unlimited if not set
+        Raises:
+            CommandFailed: In case the resources can't be listed or watched
+        Yields:
+            tuple: Event type (ADDED, MODIFIED, DELETED) and the resource, or
+                None after the initial list and every WATCH_HEARTBEAT seconds
+                without any event
+        """
+        path = self._get_api_path(ocp_obj)
+        query = {}
+        if selector:
+            query["labelSelector"] = selector
+        elif resource_name:
+            query["fieldSelector"] = f"metadata.name={resource_name}"
+        deadline = time.time() + timeout if timeout else None
+        resource_version = None
+        names = set()
+        while deadline is None or time.time() < deadline:
+            if resource_version is None:
+                data = self._list(ocp_obj, path, query)
+                resource_version = data["metadata"]["resourceVersion"]
+                listed = {item["metadata"]["name"]: item for item in data["items"]}
+                # Relisted after an expired resourceVersion, the resources
+                # deleted meanwhile are not in the list
+                for name in names - set(listed):
+                    yield "DELETED", {"metadata": {"name": name}}
+                for item in listed.values():
+                    yield "ADDED", item
+                names = set(listed)
+                yield None
+            watch_query = dict(
+                query,
+                watch="1",
+                resourceVersion=resource_version,
+                allowWatchBookmarks="true",
+            )
+            url = f"{path}?{urllib.parse.urlencode(watch_query)}"
+            cmd = self._raw_cmd(ocp_obj, ["get", "--raw", url])
+            log.debug(f"Watching: {cmd}")
+            proc = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                stdin=subprocess.DEVNULL,
+            )
+            # Stop the watch at exit of this (or a forked worker) process, in
+            # case the generator is not closed before
+            stop_watch = multiprocessing.util.Finalize(proc, proc.kill, exitpriority=10)
+            decoder = json.JSONDecoder()
+            buffer = ""
+            expired = False
+            try:
+                while not expired and (deadline is None or time.time() < deadline):
+                    readable, _, _ = select.select(
+                        [proc.stdout], [], [], WATCH_HEARTBEAT
+                    )
+                    if not readable:
+                        yield None
+                        continue
+                    chunk = os.read(proc.stdout.fileno(), 65536)
+                    if not chunk:
+                        break
+                    buffer += chunk.decode(errors="replace")
+                    while True:
+                        buffer = buffer.lstrip()
+                        try:
+                            event, end = decoder.raw_decode(buffer)
+                        except ValueError:
+                            break
+                        buffer = buffer[end:]
+                        obj = event["object"]
+                        if event["type"] == "ERROR":
+                            # Expired resourceVersion, list again
+                            log.debug(f"Watch of {ocp_obj.kind}: {obj.get('message')}")
+                            resource_version = None
+                            expired = True
+                            break
+                        resource_version = obj["metadata"]["resourceVersion"]
+                        if event["type"] == "BOOKMARK":
+                            continue
+                        name = obj["metadata"]["name"]
+                        if event["type"] == "DELETED":
+                            names.discard(name)
+                        else:
+                            names.add(name)
+                        yield event["type"], obj
+            finally:
+                stop_watch()
+                proc.wait()
+                proc.stdout.close()
+            stderr = proc.stderr.read().decode(errors="replace")
+            proc.stderr.close()
+            if proc.returncode > 0 and not expired:
+                if "410" in stderr or "Expired" in stderr:
+                    resource_version = None
+                    continue
+                raise CommandFailed(f"Unable to watch {ocp_obj.kind}: {stderr}")
+            # The server closed the watch (its request timeout), it is
+            # continued from the last resourceVersion
+
+
+class KubernetesBackend(OcBackend):
+    """
+    Runs the calls with a pooled DynamicClient of the kubeconfig
+    """
+
+    name = "kubernetes"
+
+    # (pid, kubeconfig, skip_tls_verify) -> (DynamicClient, default namespace)
+    _clients = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_client(cls, kubeconfig, skip_tls_verify=False):
+        """
+        Get the pooled client of the kubeconfig
+        Args:
+            kubeconfig (str): Path to the kubeconfig file
+            skip_tls_verify (bool): Skip the TLS verification of the server,
+                same as 'oc --insecure-skip-tls-verify'
+        Returns:
+            tuple: DynamicClient and the namespace of the kubeconfig context
+        """
+        key = (os.getpid(), kubeconfig, skip_tls_verify)
+        with cls._lock:
+            if key not in cls._clients:
+                log.debug(f"Creating API client for {kubeconfig}")
+                client_config = k8s_client.Configuration()
+                k8s_config.load_kube_config(
+                    config_file=kubeconfig, client_configuration=client_config
+                )
+                if skip_tls_verify:
+                    client_config.verify_ssl = False
+                api_client = k8s_client.ApiClient(configuration=client_config)
+                _, context = k8s_config.list_kube_config_contexts(
+                    config_file=kubeconfig
+                )
+                namespace = context["context"].get("namespace", "default")
+                cls._clients[key] = (DynamicClient(api_client), namespace)
+            return cls._clients[key]
+
+    def _get_api(self, ocp_obj, skip_tls_verify=False):
+        """
+        Get the API resource of the OCP object kind, the kind can be given
+        the same way as for 'oc', e.g. 'csv', 'packagemanifest' or
+        'subscription.operators.coreos.com'
+        Args:
+            ocp_obj (OCP): The OCP object of the resource kind
+            skip_tls_verify (bool): Skip the TLS verification of the server,
+                also skipped if the OCP object is set so
+        Raises:
+            BackendNotSupported: In case the kind can't be resolved
+        Returns:
+            tuple: DynamicClient, API resource and default namespace
+        """
+        if DynamicClient is None:
+            raise BackendNotSupported("kubernetes / openshift package is missing")
+        kubeconfig = ocp_obj.get_kubeconfig_path() or os.getenv("KUBECONFIG")
+        if not kubeconfig:
+            raise BackendNotSupported("No kubeconfig found")
+        client, namespace = self.get_client(
+            kubeconfig, skip_tls_verify or ocp_obj.skip_tls_verify
+        )
+        kind, _, group = ocp_obj.kind.partition(".")
+        filters = {"group": group} if group else {}
+        if "/" in ocp_obj.api_version:
+            filters["api_version"] = ocp_obj.api_version
+        for search in (
+            {"kind": kind},
+            {"name": kind.lower()},
+            {"short_names": [kind.lower()]},
+            {"singular_name": kind.lower()},
+        ):
+            try:
+                resources = client.resources.search(**search, **filters)
+            except ResourceNotFoundError:
+                continue
+            # Skip the subresources, e.g. pods/log
+            resources = [
+                resource
+                for resource in resources
+                if "/" not in resource.name
+                and (resource.kind.lower() == kind.lower() or "kind" not in search)
+            ]
+            if resources:
+                return client, resources[0], namespace
+        raise BackendNotSupported(f"Unable to resolve kind {ocp_obj.kind}")
+
+    @staticmethod
+    def _to_dict(result, api):
+        data = result.to_dict()
+        if "items" in data:
+            # Same as the 'oc' output, which lists any kind as 'List' and sets
+            # kind and apiVersion of every item
+            data["kind"] = "List"
+            for item in data["items"]:
+                item.setdefault("kind", api.kind)
+                item.setdefault("apiVersion", api.group_version)
+        return data
+
+    @staticmethod
+    def _api_error(ex):
+        return CommandFailed(
+            f"Error from server: {ex.status} {ex.reason} {ex.summary()}"
+        )
+
+    def _get_namespace(self, ocp_obj, api, default_namespace, all_namespaces=False):
+        if not api.namespaced or (all_namespaces and not ocp_obj.namespace):
+            return None
+        return ocp_obj.namespace or default_namespace
+
+    def get(
+        self,
+        ocp_obj,
+        resource_name="",
+        selector=None,
+        field_selector=None,
+        all_namespaces=False,
+        silent=False,
+        skip_tls_verify=False,
+    ):
+        try:
+            client, api, default_namespace = self._get_api(ocp_obj, skip_tls_verify)
+        except BackendNotSupported as ex:
+            log.debug(f"Falling back to oc: {ex}")
+            return super().get(
+                ocp_obj,
+                resource_name,
+                selector,
+                field_selector,
+                all_namespaces,
+                silent,
+                skip_tls_verify,
+            )
+        resource_name = resource_name or ocp_obj.resource_name
+        selector = selector or ocp_obj.selector
+        field_selector = field_selector or ocp_obj.field_selector
+        kwargs = {
+            "namespace": self._get_namespace(
+                ocp_obj, api, default_namespace, all_namespaces
+            )
+        }
+        if selector or field_selector:
+            kwargs["label_selector"] = selector
+            kwargs["field_selector"] = field_selector
+        else:
+            kwargs["name"] = resource_name or None
+        try:
+            return self._to_dict(api.get(**kwargs), api)
+        except NotFoundError as ex:
+            if not silent:
+                log.warning(f"{ocp_obj.kind} {resource_name} not found")
+            raise self._api_error(ex)
+        except DynamicApiError as ex:
+            raise self._api_error(ex)
+
+    def apply(self, ocp_obj, data):
+        try:
+            client, api, default_namespace = self._get_api(ocp_obj)
+        except BackendNotSupported as ex:
+            log.debug(f"Falling back to oc: {ex}")
+            return super().apply(ocp_obj, data)
+        metadata = data["metadata"]
+        namespace = None
+        if api.namespaced:
+            namespace = (
+                metadata.get("namespace") or ocp_obj.namespace or default_namespace
+            )
+        try:
+            # Server side apply creates the resource or updates it, the fields
+            # of the previous apply missing from the data are removed, like
+            # 'oc apply' does. The conflicts with the other field managers are
+            # forced, the applied values win as with 'oc apply'.
+            return self._to_dict(
+                api.patch(
+                    body=json_dumps(data),
+                    name=metadata["name"],
+                    namespace=namespace,
+                    content_type="application/apply-patch+yaml",
+                    field_manager=FIELD_MANAGER,
+                    force_conflicts=True,
+                ),
+                api,
+            )
+        except DynamicApiError as ex:
+            raise self._api_error(ex)
+
+    def apply_objects(self, ocp_obj, objs, timeout=600):
+        # No process to spawn, every resource is applied by its own request
+        return [
+            self.apply(
+                type(ocp_obj)(
+                    api_version=obj.get("apiVersion", "v1"),
+                    kind=obj["kind"],
+                    namespace=ocp_obj.namespace,
+                    cluster_kubeconfig=ocp_obj.cluster_kubeconfig,
+                    skip_tls_verify=ocp_obj.skip_tls_verify,
+                ),
+                obj,
+            )
+            for obj in objs
+        ]
+
+    def patch(self, ocp_obj, resource_name, params, format_type="json"):
+        try:
+            client, api, default_namespace = self._get_api(ocp_obj)
+        except BackendNotSupported as ex:
+            log.debug(f"Falling back to oc: {ex}")
+            return super().patch(ocp_obj, resource_name, params, format_type)
+        content_types = {
+            "json": "application/json-patch+json",
+            "merge": "application/merge-patch+json",
+            "strategic": "application/strategic-merge-patch+json",
+        }
+        try:
+            return self._to_dict(
+                api.patch(
+                    body=json.loads(params) if isinstance(params, str) else params,
+                    name=resource_name,
+                    namespace=self._get_namespace(ocp_obj, api, default_namespace),
+                    content_type=content_types[format_type],
+                ),
+                api,
+            )
+        except DynamicApiError as ex:
+            raise self._api_error(ex)
+
+    def label(self, ocp_obj, resource_name, label):
+        labels = {}
+        for item in label.split():
+            if item.endswith("-"):
+                labels[item[:-1]] = None
+            else:
+                key, _, value = item.partition("=")
+                labels[key] = value.strip("'\"")
+        return self.patch(
+            ocp_obj,
+            resource_name,
+            {"metadata": {"labels": labels}},
+            format_type="merge",
+        )
+
+    def watch(self, ocp_obj, resource_name="", selector=None, timeout=None):
+        try:
+            client, api, default_namespace = self._get_api(ocp_obj)
+        except BackendNotSupported as ex:
+            log.debug(f"Falling back to oc: {ex}")
+            yield from super().watch(ocp_obj, resource_name, selector, timeout)
+            return
+        kwargs = {"namespace": self._get_namespace(ocp_obj, api, default_namespace)}
+        if selector:
+            kwargs["label_selector"] = selector
+        elif resource_name:
+            kwargs["field_selector"] = f"metadata.name={resource_name}"
+        deadline = time.time() + timeout if timeout else None
+        resource_version = None
+        while deadline is None or time.time() < deadline:
+            try:
+                if resource_version is None:
+                    # List, then watch the changes from the list resourceVersion
+                    data = self._to_dict(api.get(**kwargs), api)
+                    resource_version = data["metadata"]["resourceVersion"]
+                    for item in data["items"]:
+                        yield "ADDED", item
+                    yield None
+                # Short server side timeout to yield the heartbeat
+                for event in api.watch(
+                    resource_version=resource_version,
+                    timeout=WATCH_HEARTBEAT * 5,
+                    **kwargs,
+                ):
+                    obj = event["raw_object"]
+                    if event["type"] == "ERROR":
+                        # Expired resourceVersion, list again
+                        resource_version = None
+                        break
+                    resource_version = obj["metadata"]["resourceVersion"]
+                    if event["type"] != "BOOKMARK":
+                        yield event["type"], obj
+                yield None
+            except DynamicApiError as ex:
+                if ex.status == 410:
+                    resource_version = None
+                    continue
+                raise self._api_error(ex)
+
+
+BACKENDS = {backend.name: backend for backend in (OcBackend, KubernetesBackend)}
+_backends = {}
+
+
+def get_backend(name=None):
+    """
+    Get the OCP backend
+    Args:
+        name (str): Name of the backend, defaults to RUN['ocp_backend']
+    Returns:
+        OcBackend: The backend instance
+    """
+    name = name or config.RUN.get("ocp_backend", "oc")
+    if name not in _backends:
+        if name == KubernetesBackend.name and DynamicClient is None:
+            log.warning("kubernetes / openshift package is missing, using oc backend")
+            name = OcBackend.name
+        _backends[name] = BACKENDS[name]()
+    return _backends[name]
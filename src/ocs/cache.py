@@ -0,0 +1,319 @@
+"""
+Informer style cache of the OCP resources.
+
+For the kinds listed in RUN['cached_kinds'], a single list + watch stream per
+cluster, kind and namespace keeps a local copy of the resources. OCP.get and
+the watch based waits read from it instead of listing the resources again.
+The stores are per process, a forked child starts its own streams. Our own
+changes (apply, patch, label) invalidate the store, it is listed again before
+the next read is served from it.
+"""
+
+import logging
+import os
+import re
+import threading
+
+from src.framework import config
+from src.ocs.backends import get_backend
+from src.utility.exceptions import CommandFailed
+
+log = logging.getLogger(__name__)
+
+# Seconds to wait for the initial list of a new store, the live backend is
+# used if it takes longer
+SYNC_TIMEOUT = 30
+
+# Seconds to wait before restarting the failed watch of a store, doubled after
+# every failure in a row up to WATCH_RESTART_MAX_DELAY
+WATCH_RESTART_DELAY = 1
+WATCH_RESTART_MAX_DELAY = 60
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+_SELECTOR_TERM = re.compile(r"^(!?)([\w./-]+)(?:\s*(==|=|!=)\s*([\w.-]*))?$")
+
+
+def parse_selector(selector):
+    """
+    Parse equality based label selector, e.g. 'app=foo,tier!=db,!canary'
+    Args:
+        selector (str): The label selector
+    Returns:
+        list: (negated, key, operator, value) terms, None if the selector is
+            not supported (e.g. set based 'app in (a, b)')
+    """
+    terms = []
+    for term in selector.split(","):
+        match = _SELECTOR_TERM.match(term.strip())
+        if not match:
+            return None
+        terms.append(match.groups())
+    return terms
+
+
+def match_selector(obj, terms):
+    """
+    Check the resource labels match the parsed selector
+    Args:
+        obj (dict): The resource
+        terms (list): Terms returned by parse_selector()
+    Returns:
+        bool: True if the resource matches
+    """
+    labels = obj.get("metadata", {}).get("labels") or {}
+    for negated, key, operator, value in terms:
+        if operator is None:
+            if (key in labels) == bool(negated):
+                return False
+        elif operator == "!=":
+            if labels.get(key) == value:
+                return False
+        elif labels.get(key) != value:
+            return False
+    return True
+
+
+class ResourceStore(object):
+    """
+    Local copy of the resources of a kind in a namespace of a cluster, kept
+    up to date by a watch in a background thread
+    """
+
+    def __init__(self, ocp_obj):
+        """
+        Args:
+            ocp_obj (OCP): The OCP object of the resource kind, the watch runs
+                against its cluster and namespace
+        """
+        self.ocp_obj = ocp_obj
+        self.objects = {}
+        self.version = 0
+        self.synced = False
+        self.failed = False
+        self.generation = 0
+        self.restart_delay = WATCH_RESTART_DELAY
+        self.condition = threading.Condition()
+        self.start()
+
+    def start(self):
+        with self.condition:
+            self.generation += 1
+            self.synced = False
+            self.failed = False
+            self.objects = {}
+        threading.Thread(
+            target=self._run, args=(self.generation,), daemon=True
+        ).start()
+
+    def _run(self, generation):
+        try:
+            for event in get_backend().watch(self.ocp_obj):
+                with self.condition:
+                    if generation != self.generation:
+                        # Invalidated, a new watch was started
+                        return
+                    if event is None:
+                        # The backends yield the first None only once the
+                        # initial list was yielded completely
+                        self.synced = True
+                        self.restart_delay = WATCH_RESTART_DELAY
+                    else:
+                        event_type, obj = event
+                        name = obj.get("metadata", {}).get("name")
+                        if event_type == "DELETED":
+                            self.objects.pop(name, None)
+                        else:
+                            self.objects[name] = obj
+                    self.version += 1
+                    self.condition.notify_all()
+        except Exception as ex:
+            log.info(
+                f"Watch of {self.ocp_obj.kind} failed, not caching it for "
+                f"{self.restart_delay}s: {ex}"
+            )
+        with self.condition:
+            if generation != self.generation:
+                return
+            # The reads are served by the live backend until the restarted
+            # watch listed the resources again
+            self.failed = True
+            self.synced = False
+            self.condition.notify_all()
+            delay = self.restart_delay
+            self.restart_delay = min(delay * 2, WATCH_RESTART_MAX_DELAY)
+        timer = threading.Timer(delay, self._restart, args=(generation,))
+        timer.daemon = True
+        timer.start()
+
+    def _restart(self, generation):
+        with self.condition:
+            if generation != self.generation:
+                # Already restarted by an invalidation
+                return
+        self.start()
+
+    def invalidate(self):
+        """
+        Drop the local copy and list the resources again
+        """
+        with self.condition:
+            if not self.synced:
+                # Not read from until listed again anyway
+                return
+        log.debug(f"Invalidating cache of {self.ocp_obj.kind}")
+        self.start()
+
+    def wait_synced(self, timeout=SYNC_TIMEOUT):
+        """
+        Wait for the initial list of the resources
+        Returns:
+            bool: True if the store can be read
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.synced or self.failed, timeout)
+            return self.synced
+
+    def snapshot(self, resource_name="", terms=None):
+        """
+        Get the current resources
+        Args:
+            resource_name (str): Name of the resource, all if not set
+            terms (list): Parsed label selector
+        Returns:
+            tuple: name -> resource dict and the store version, None instead
+                of the dict if the store can't be read
+        """
+        with self.condition:
+            if not self.synced:
+                return None, self.version
+            objects = {
+                name: obj
+                for name, obj in self.objects.items()
+                if (not resource_name or name == resource_name)
+                and (terms is None or match_selector(obj, terms))
+            }
+            return objects, self.version
+
+    def wait_for_change(self, version, timeout):
+        """
+        Wait until the store changes
+        Args:
+            version (int): Store version the caller already saw
+            timeout (float): Maximum time to wait in seconds
+        Returns:
+            int: The current store version
+        """
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.version != version or self.failed, timeout
+            )
+            return self.version
+
+
+def _get_key(ocp_obj):
+    return (
+        os.getpid(),
+        ocp_obj.get_kubeconfig_path(),
+        ocp_obj.kind.lower(),
+        ocp_obj.namespace,
+    )
+
+
+def get_store(ocp_obj):
+    """
+    Get the store of the OCP object kind and namespace, it is created on the
+    first use
+    Args:
+        ocp_obj (OCP): The OCP object
+    Returns:
+        ResourceStore: The store, None if the kind is not cached
+    """
+    cached_kinds = [kind.lower() for kind in config.RUN.get("cached_kinds") or []]
+    if ocp_obj.kind.lower() not in cached_kinds:
+        return None
+    key = _get_key(ocp_obj)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            # Plain OCP object, so that the watch doesn't depend on the
+            # resource name or selector of the first caller
+            from src.ocs.ocp import OCP
+
+            store = ResourceStore(
+                OCP(
+                    kind=ocp_obj.kind,
+                    namespace=ocp_obj.namespace,
+                    cluster_kubeconfig=ocp_obj.cluster_kubeconfig,
+                )
+            )
+            _stores[key] = store
+    return store
+
+
+def get_cached(ocp_obj, resource_name="", selector=None):
+    """
+    Get the resource(s) from the cache, the same way 'oc get -o yaml' returns
+    them
+    Args:
+        ocp_obj (OCP): The OCP object of the resource kind
+        resource_name (str): The resource name, all resources if not set
+        selector (str): The label selector to look for
+    Raises:
+        CommandFailed: In case the named resource doesn't exist
+    Returns:
+        dict: The resource or 'List' of the resources, None if the request
+            can't be served from the cache
+    """
+    store = get_store(ocp_obj)
+    if store is None or store.failed or not store.wait_synced():
+        return None
+    terms = None
+    if selector:
+        terms = parse_selector(selector)
+        if terms is None:
+            return None
+        resource_name = ""
+    objects, _ = store.snapshot(resource_name, terms)
+    if objects is None:
+        return None
+    if resource_name:
+        if resource_name not in objects:
+            raise CommandFailed(
+                f'Error from server (NotFound): {ocp_obj.kind} "{resource_name}" '
+                f"not found"
+            )
+        return objects[resource_name]
+    return {
+        "apiVersion": "v1",
+        "kind": "List",
+        "items": list(objects.values()),
+        "metadata": {"resourceVersion": ""},
+    }
+
+
+def invalidate(ocp_obj=None):
+    """
+    Invalidate the cached resources after a change made by us
+    Args:
+        ocp_obj (OCP): The OCP object of the changed resource kind and
+            namespace, all the stores of this process are invalidated if not
+            set. The stores of the kind in any namespace are invalidated if
+            its namespace is not set.
+    """
+    with _stores_lock:
+        if ocp_obj is None:
+            stores = [
+                store for key, store in _stores.items() if key[0] == os.getpid()
+            ]
+        else:
+            key = _get_key(ocp_obj)
+            stores = [
+                store
+                for store_key, store in _stores.items()
+                if store_key[:3] == key[:3]
+                and (key[3] is None or store_key[3] in (key[3], None))
+            ]
+    for store in stores:
+        store.invalidate()
@@ -0,0 +1,218 @@
+"""
+Offline index of the operator catalog.
+
+The file based catalog (FBC) of the catalog image is extracted once per run,
+parsed into packages, their default channel and the head CSV of every
+channel, and stored as index.json shared by all the processes of the run.
+The package queries (default channel, channels, current CSV) of the clusters
+whose catalog source runs this image are answered from the index, without
+waiting for the catalog pod and the packagemanifest API. Catalogs which are
+not file based (SQLite index) are not indexed, the API is used for them.
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+
+from src.framework import config
+from src.ocs.resources.catalog_source import CatalogSource
+from src.utility import constants
+from src.utility.exceptions import CommandFailed
+from src.utility.image_cache import extract_image_path
+from src.utility.serialization import (
+    json_dumps,
+    json_loads,
+    json_loads_all,
+    yaml_load_all,
+)
+
+log = logging.getLogger(__name__)
+
+# Directory of the file based catalog in the catalog image
+CATALOG_CONFIGS_PATH = "/configs/"
+
+# image -> CatalogIndex (None if the image has no file based catalog)
+_indexes = {}
+
+
+def is_catalog_index_enabled():
+    """
+    Returns:
+        bool: True if the package queries are answered from the catalog
+            image, RUN['catalog_index']
+    """
+    return config.RUN.get("catalog_index", True)
+
+
+def _get_channel_head(entries):
+    """
+    Get the CSV at the head of the channel, the one no other entry replaces
+    or skips
+    Args:
+        entries (list): Entries of the olm.channel
+    Returns:
+        str: Name of the head CSV, None if the channel is empty
+    """
+    replaced = set()
+    for entry in entries:
+        if entry.get("replaces"):
+            replaced.add(entry["replaces"])
+        replaced.update(entry.get("skips") or [])
+    heads = [entry["name"] for entry in entries if entry["name"] not in replaced]
+    if len(heads) > 1:
+        log.warning(f"Channel has more heads {heads}, using {heads[-1]}")
+    return heads[-1] if heads else None
+
+
+def _load_documents(path):
+    with open(path) as f:
+        data = f.read()
+    if path.endswith(".json"):
+        return list(json_loads_all(data))
+    return [doc for doc in yaml_load_all(data) if doc]
+
+
+def parse_catalog(configs_dir):
+    """
+    Parse the file based catalog
+    Args:
+        configs_dir (str): Directory with the extracted catalog
+    Returns:
+        dict: package name -> {"defaultChannel": str, "channels": [{"name":
+            str, "currentCSV": str}]}, the same structure as the status of
+            the package manifest
+    """
+    packages = {}
+    channels = {}
+    for root, _, files in os.walk(configs_dir):
+        for file_name in sorted(files):
+            if not file_name.endswith((".json", ".yaml", ".yml")):
+                continue
+            for doc in _load_documents(os.path.join(root, file_name)):
+                schema = doc.get("schema")
+                if schema == "olm.package":
+                    packages[doc["name"]] = doc.get("defaultChannel")
+                elif schema == "olm.channel":
+                    head = _get_channel_head(doc.get("entries", []))
+                    channels.setdefault(doc["package"], []).append(
+                        {"name": doc["name"], "currentCSV": head}
+                    )
+    return {
+        package: {
+            "defaultChannel": default_channel,
+            "channels": channels.get(package, []),
+        }
+        for package, default_channel in packages.items()
+    }
+
+
+class CatalogIndex(object):
+    """
+    Packages of a catalog image
+    """
+
+    def __init__(self, image, packages):
+        """
+        Args:
+            image (str): The catalog image
+            packages (dict): Packages returned by parse_catalog()
+        """
+        self.image = image
+        self.packages = packages
+
+    def __contains__(self, package):
+        return package in self.packages
+
+    def get_default_channel(self, package):
+        return self.packages[package]["defaultChannel"]
+
+    def get_channels(self, package):
+        return self.packages[package]["channels"]
+
+    @classmethod
+    def build(cls, image):
+        """
+        Extract the catalog of the image and index it, the index is reused
+        by all the processes of the run
+        Args:
+            image (str): The catalog image
+        Returns:
+            CatalogIndex: The index, None if the image has no file based
+                catalog
+        """
+        index_dir = os.path.join(
+            os.path.expanduser(config.RUN.get("catalog_index_dir", "logs")),
+            f"catalogs_{config.run_id}",
+            hashlib.sha256(image.encode()).hexdigest()[:16],
+        )
+        os.makedirs(index_dir, exist_ok=True)
+        index_path = os.path.join(index_dir, "index.json")
+        with open(os.path.join(index_dir, ".lock"), "w") as lock:
+            # Only one process extracts the image, the others wait for it
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if not os.path.exists(index_path):
+                configs_dir = os.path.join(index_dir, "configs")
+                log.info(f"Extracting catalog of {image}")
+                try:
+                    extract_image_path(
+                        image, CATALOG_CONFIGS_PATH, configs_dir, insecure=True
+                    )
+                    packages = parse_catalog(configs_dir)
+                except (CommandFailed, ValueError, KeyError) as ex:
+                    log.warning(f"Unable to index catalog of {image}: {ex}")
+                    packages = {}
+                with open(index_path, "w") as f:
+                    f.write(json_dumps({"image": image, "packages": packages}))
+            with open(index_path) as f:
+                packages = json_loads(f.read())["packages"]
+        if not packages:
+            log.info(f"No file based catalog in {image}, using packagemanifests")
+            return None
+        log.info(f"Catalog of {image} indexed, {len(packages)} packages")
+        return cls(image, packages)
+
+
+def get_catalog_index(image):
+    """
+    Get the index of the catalog image, it is built on the first use
+    Args:
+        image (str): The catalog image
+    Returns:
+        CatalogIndex: The index, None if the image has no file based catalog
+    """
+    if image not in _indexes:
+        _indexes[image] = CatalogIndex.build(image)
+    return _indexes[image]
+
+
+def get_cluster_catalog_index(cluster_kubeconfig=""):
+    """
+    Get the index of the catalog the cluster installs the operators from. It
+    is only used for the custom catalog source running the
+    ENV_DATA['ocs_registry_image'] of one of the clusters, the default
+    catalogs are queried through the API.
+    Args:
+        cluster_kubeconfig (str): Path to the kubeconfig of the cluster, the
+            current cluster context if not set
+    Returns:
+        CatalogIndex: The index, None if the packages have to be queried
+            through the API
+    """
+    if not is_catalog_index_enabled():
+        return None
+    try:
+        catalog_source = CatalogSource(
+            resource_name=constants.OPERATOR_CATALOG_SOURCE_NAME,
+            namespace=constants.MARKETPLACE_NAMESPACE,
+            cluster_kubeconfig=cluster_kubeconfig,
+        ).get(silent=True)
+    except CommandFailed:
+        return None
+    image = (catalog_source.get("spec") or {}).get("image")
+    for cluster in config.clusters:
+        registry_image = cluster.ENV_DATA.get("ocs_registry_image")
+        # The catalog source gets the 'latest' tag if the image has none
+        if registry_image and image in (registry_image, f"{registry_image}:latest"):
+            return get_catalog_index(image)
+    return None
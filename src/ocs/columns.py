@@ -0,0 +1,385 @@
+"""
+Column values of the OCP resources evaluated from their JSON representation.
+
+'oc get' prints the columns of a kind from the server side printer columns,
+for the custom resources they are JSONPath expressions defined in the
+additionalPrinterColumns of the CRD. The same values are evaluated here from
+the resources returned by a single 'oc get -o yaml' list, so waiting for many
+resources doesn't need an 'oc get' call per resource. The columns of the core
+kinds are computed the way 'oc get' prints them, the printer columns of the
+CRDs are fetched once per cluster and kind.
+"""
+
+import json
+import logging
+import re
+import threading
+
+from src.utility.exceptions import CommandFailed
+
+log = logging.getLogger(__name__)
+
+# Kind, group and version -> column -> JSONPath of the custom resources
+_printer_columns = {}
+_printer_columns_lock = threading.Lock()
+
+_PATH_STEP = re.compile(
+    r"""
+    \.(?P<field>[\w-]+|\*)
+    | \[\s*(?P<quote>['"])(?P<key>.*?)(?P=quote)\s*\]
+    | \[\s*(?P<index>-?\d+|\*)\s*\]
+    | \[\?\(\s*@(?P<filter>(?:\.[\w-]+)+)
+        (?:\s*(?P<op>==|!=)\s*(?P<fquote>['"]?)(?P<value>.*?)(?P=fquote))?
+        \s*\)\]
+    """,
+    re.VERBOSE,
+)
+
+
+def parse_jsonpath(path):
+    """
+    Parse the JSONPath expression of a printer column, e.g.
+    '.status.conditions[?(@.type=="Ready")].status'
+    Args:
+        path (str): The JSONPath, optionally in braces
+    Raises:
+        ValueError: In case the expression is not supported
+    Returns:
+        list: The steps of the path
+    """
+    path = path.strip()
+    if path.startswith("{") and path.endswith("}"):
+        path = path[1:-1].strip()
+    if path.startswith("$"):
+        path = path[1:]
+    steps = []
+    position = 0
+    while position < len(path):
+        match = _PATH_STEP.match(path, position)
+        if not match:
+            raise ValueError(f"Unsupported JSONPath: {path}")
+        if match.group("field") == "*" or match.group("index") == "*":
+            steps.append(("all",))
+        elif match.group("field"):
+            steps.append(("field", match.group("field")))
+        elif match.group("quote"):
+            steps.append(("field", match.group("key")))
+        elif match.group("index"):
+            steps.append(("index", int(match.group("index"))))
+        else:
+            steps.append(
+                (
+                    "filter",
+                    match.group("filter").split(".")[1:],
+                    match.group("op"),
+                    match.group("value"),
+                )
+            )
+        position = match.end()
+    return steps
+
+
+def _lookup(node, keys):
+    for key in keys:
+        if not isinstance(node, dict) or key not in node:
+            return None
+        node = node[key]
+    return node
+
+
+def evaluate_jsonpath(obj, steps):
+    """
+    Evaluate the parsed JSONPath
+    Args:
+        obj (dict): The resource
+        steps (list): Steps returned by parse_jsonpath()
+    Returns:
+        list: The matched values
+    """
+    nodes = [obj]
+    for step in steps:
+        matched = []
+        for node in nodes:
+            if step[0] == "field":
+                if isinstance(node, dict) and step[1] in node:
+                    matched.append(node[step[1]])
+            elif step[0] == "index":
+                if isinstance(node, list) and -len(node) <= step[1] < len(node):
+                    matched.append(node[step[1]])
+            elif step[0] == "all":
+                if isinstance(node, dict):
+                    matched.extend(node.values())
+                elif isinstance(node, list):
+                    matched.extend(node)
+            else:
+                _, keys, op, expected = step
+                for item in node if isinstance(node, list) else []:
+                    value = _lookup(item, keys)
+                    if op is None:
+                        keep = value is not None
+                    else:
+                        keep = (format_value([value]) == expected) == (op == "==")
+                    if keep:
+                        matched.append(item)
+        nodes = matched
+    return nodes
+
+
+def format_value(values):
+    """
+    Format the values of a column the way 'oc get' prints them
+    Args:
+        values (list): The values matched by the column JSONPath
+    Returns:
+        str: The column value, empty string if nothing matched
+    """
+    formatted = []
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            formatted.append(str(value).lower())
+        elif isinstance(value, (dict, list)):
+            formatted.append(json.dumps(value))
+        else:
+            formatted.append(str(value))
+    return ",".join(formatted)
+
+
+def _pod_status(pod):
+    """
+    The pod STATUS column, following the kubectl pod printer
+    """
+    status = pod.get("status", {})
+    reason = status.get("reason") or status.get("phase") or ""
+    init_statuses = status.get("initContainerStatuses") or []
+    initializing = False
+    for index, container in enumerate(init_statuses):
+        state = container.get("state", {})
+        terminated = state.get("terminated")
+        waiting = state.get("waiting")
+        if terminated and terminated.get("exitCode") == 0:
+            continue
+        initializing = True
+        if terminated:
+            if terminated.get("reason"):
+                reason = f"Init:{terminated['reason']}"
+            elif terminated.get("signal"):
+                reason = f"Init:Signal:{terminated['signal']}"
+            else:
+                reason = f"Init:ExitCode:{terminated.get('exitCode')}"
+        elif waiting and waiting.get("reason") not in (None, "", "PodInitializing"):
+            reason = f"Init:{waiting['reason']}"
+        else:
+            reason = f"Init:{index}/{len(init_statuses)}"
+        break
+    if not initializing:
+        has_running = False
+        for container in reversed(status.get("containerStatuses") or []):
+            state = container.get("state", {})
+            waiting = state.get("waiting")
+            terminated = state.get("terminated")
+            if waiting and waiting.get("reason"):
+                reason = waiting["reason"]
+            elif terminated and terminated.get("reason"):
+                reason = terminated["reason"]
+            elif terminated and terminated.get("signal"):
+                reason = f"Signal:{terminated['signal']}"
+            elif terminated:
+                reason = f"ExitCode:{terminated.get('exitCode')}"
+            elif state.get("running") and container.get("ready"):
+                has_running = True
+        if reason == "Completed" and has_running:
+            reason = "Running"
+    if pod.get("metadata", {}).get("deletionTimestamp"):
+        reason = "Unknown" if status.get("reason") == "NodeLost" else "Terminating"
+    return reason
+
+
+def _pod_ready(pod):
+    statuses = pod.get("status", {}).get("containerStatuses") or []
+    ready = len([container for container in statuses if container.get("ready")])
+    return f"{ready}/{len(pod.get('spec', {}).get('containers') or [])}"
+
+
+def _pod_restarts(pod):
+    statuses = pod.get("status", {}).get("containerStatuses") or []
+    return str(sum(container.get("restartCount", 0) for container in statuses))
+
+
+def _node_status(node):
+    conditions = node.get("status", {}).get("conditions") or []
+    status = "Unknown"
+    for condition in conditions:
+        if condition.get("type") == "Ready":
+            status = "Ready" if condition.get("status") == "True" else "NotReady"
+    if node.get("spec", {}).get("unschedulable"):
+        status += ",SchedulingDisabled"
+    return status
+
+
+def _node_roles(node):
+    roles = set()
+    for label, value in (node.get("metadata", {}).get("labels") or {}).items():
+        if label.startswith("node-role.kubernetes.io/"):
+            roles.add(label.split("/", 1)[1])
+        elif label == "kubernetes.io/role" and value:
+            roles.add(value)
+    return ",".join(sorted(role for role in roles if role)) or "<none>"
+
+
+def _deployment_ready(deployment):
+    status = deployment.get("status", {})
+    replicas = deployment.get("spec", {}).get("replicas", 1)
+    return f"{status.get('readyReplicas', 0)}/{replicas}"
+
+
+def _count(path):
+    """
+    Integer column which is printed as 0 when not set
+    """
+    steps = parse_jsonpath(path)
+    return lambda obj: format_value(evaluate_jsonpath(obj, steps)) or "0"
+
+
+# Kind -> column -> JSONPath or function computing the column value of the
+# kinds 'oc get' prints by the server side printers
+BUILTIN_COLUMNS = {
+    "pod": {
+        "STATUS": _pod_status,
+        "READY": _pod_ready,
+        "RESTARTS": _pod_restarts,
+        "IP": ".status.podIP",
+        "NODE": ".spec.nodeName",
+    },
+    "node": {
+        "STATUS": _node_status,
+        "ROLES": _node_roles,
+        "VERSION": ".status.nodeInfo.kubeletVersion",
+    },
+    "persistentvolumeclaim": {
+        "STATUS": ".status.phase",
+        "VOLUME": ".spec.volumeName",
+        "STORAGECLASS": ".spec.storageClassName",
+    },
+    "persistentvolume": {
+        "STATUS": ".status.phase",
+        "RECLAIMPOLICY": ".spec.persistentVolumeReclaimPolicy",
+        "STORAGECLASS": ".spec.storageClassName",
+    },
+    "namespace": {"STATUS": ".status.phase"},
+    "deployment": {
+        "READY": _deployment_ready,
+        "UP-TO-DATE": _count(".status.updatedReplicas"),
+        "AVAILABLE": _count(".status.availableReplicas"),
+    },
+    "machineconfigpool": {
+        "CONFIG": ".status.configuration.name",
+        "UPDATED": '.status.conditions[?(@.type=="Updated")].status',
+        "UPDATING": '.status.conditions[?(@.type=="Updating")].status',
+        "DEGRADED": '.status.conditions[?(@.type=="Degraded")].status',
+        "MACHINECOUNT": ".status.machineCount",
+        "READYMACHINECOUNT": ".status.readyMachineCount",
+        "UPDATEDMACHINECOUNT": ".status.updatedMachineCount",
+        "DEGRADEDMACHINECOUNT": ".status.degradedMachineCount",
+    },
+    "clusterserviceversion": {
+        "VERSION": ".spec.version",
+        "PHASE": ".status.phase",
+    },
+}
+
+
+def _normalize(column):
+    return column.upper().replace(" ", "")
+
+
+def _guess_plural(kind):
+    """
+    Plural resource name of the kind, the same guess the API server uses for
+    the CRDs without an explicit plural name
+    """
+    kind = kind.lower()
+    if kind.endswith("s"):
+        return f"{kind}es"
+    if kind.endswith("y"):
+        return f"{kind[:-1]}ies"
+    return f"{kind}s"
+
+
+def get_printer_columns(ocp_obj, obj):
+    """
+    Get the printer columns defined by the CRD of the custom resource, they
+    are cached per cluster and kind
+    Args:
+        ocp_obj (OCP): The OCP object the resource was fetched by, the CRD is
+            fetched from its cluster
+        obj (dict): The resource
+    Returns:
+        dict: Normalized column name -> JSONPath, empty if the resource is not
+            a custom resource or the CRD was not found
+    """
+    group, _, version = obj.get("apiVersion", "").rpartition("/")
+    kind = obj.get("kind", "")
+    if not group or not kind:
+        return {}
+    key = (ocp_obj.get_kubeconfig_path(), group, version, kind)
+    with _printer_columns_lock:
+        if key in _printer_columns:
+            return _printer_columns[key]
+    # Imported here, the OCP class uses this module
+    from src.ocs.ocp import OCP
+
+    crd_name = f"{_guess_plural(kind)}.{group}"
+    try:
+        crd = OCP(
+            kind="CustomResourceDefinition",
+            cluster_kubeconfig=ocp_obj.cluster_kubeconfig,
+        ).get(resource_name=crd_name, silent=True)
+    except CommandFailed:
+        log.debug(f"No CRD {crd_name} found, {kind} columns are not known")
+        crd = {}
+    spec = (crd or {}).get("spec", {})
+    definitions = spec.get("additionalPrinterColumns") or []
+    for crd_version in spec.get("versions") or []:
+        if crd_version.get("name") == version:
+            definitions = crd_version.get("additionalPrinterColumns") or definitions
+    columns = {
+        _normalize(definition["name"]): definition.get("jsonPath")
+        or definition.get("JSONPath")
+        for definition in definitions
+        if definition.get("name")
+    }
+    with _printer_columns_lock:
+        _printer_columns[key] = columns
+    return columns
+
+
+def get_column_getter(ocp_obj, obj, column):
+    """
+    Get function which evaluates the column from the resources of the kind
+    Args:
+        ocp_obj (OCP): The OCP object the resource was fetched by
+        obj (dict): A resource of the kind
+        column (str): The column name as printed by 'oc get', e.g. STATUS
+    Returns:
+        function: Called with a resource, returns the column value as str.
+            None if the column can't be evaluated from the resource.
+    """
+    column = _normalize(column)
+    if column == "NAME":
+        return lambda resource: resource.get("metadata", {}).get("name", "")
+    columns = BUILTIN_COLUMNS.get(obj.get("kind", "").lower())
+    if columns is None:
+        columns = get_printer_columns(ocp_obj, obj)
+    source = columns.get(column)
+    if source is None:
+        return None
+    if callable(source):
+        return source
+    try:
+        steps = parse_jsonpath(source)
+    except ValueError as ex:
+        log.debug(f"Column {column} of {obj.get('kind')}: {ex}")
+        return None
+    return lambda resource: format_value(evaluate_jsonpath(resource, steps))
@@ -0,0 +1,342 @@
+"""
+Diagnostics of the failed waits and deployment phases.
+
+On a failure the state of the cluster is collected by parallel 'oc' commands:
+- describes of the resources we were waiting for
+- events
+- CSVs, subscriptions, install plans and catalog sources
+- operator pod logs, limited to their last lines
+- nodes and machine config pools
+
+It is written to a compressed bundle per cluster:
+<diagnostics_dir>/diagnostics_<run_id>/<cluster_name>-<time>-<reason>.tar.gz
+The clusters are collected at the same time and the whole collection is
+capped by RUN['diagnostics_timeout'], the commands still running then are
+recorded as timed out in the bundle summary.
+"""
+
+import contextvars
+import glob
+import io
+import logging
+import os
+import re
+import shlex
+import subprocess
+import tarfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from src.framework import config
+from src.utility.cmd import exec_cmd
+from src.utility.serialization import json_loads
+
+log = logging.getLogger(__name__)
+
+OLM_KINDS = ["csv", "subscription", "installplan", "catalogsource"]
+
+
+def is_diagnostics_enabled():
+    """
+    Returns:
+        bool: True if the diagnostics are collected on failures,
+            RUN['diagnostics']
+    """
+    return config.RUN.get("diagnostics", True)
+
+
+def _get_cluster_kubeconfig(cluster):
+    return os.path.join(
+        cluster.ENV_DATA["cluster_path"], cluster.RUN.get("kubeconfig_location")
+    )
+
+
+def _get_cluster_name(kubeconfig):
+    """
+    Get name of the cluster of the kubeconfig, for the bundle name
+    """
+    if kubeconfig:
+        for cluster in config.clusters:
+            if os.path.abspath(_get_cluster_kubeconfig(cluster)) == os.path.abspath(
+                kubeconfig
+            ):
+                return cluster.ENV_DATA["cluster_name"]
+    return config.ENV_DATA["cluster_name"]
+
+
+def get_bundle_dir():
+    """
+    Returns:
+        str: Directory the diagnostics bundles of this run are written to
+    """
+    return os.path.join(
+        os.path.expanduser(config.RUN.get("diagnostics_dir", "logs")),
+        f"diagnostics_{config.run_id}",
+    )
+
+
+def collected_since(cluster_name, since):
+    """
+    Check a bundle of the cluster was already written, e.g. by the failed
+    wait of a phase, so that the phase failure doesn't collect it again
+    Args:
+        cluster_name (str): Name of the cluster
+        since (float): Time (epoch) from which the bundles count
+    Returns:
+        bool: True if a bundle of the cluster was written since then
+    """
+    pattern = os.path.join(get_bundle_dir(), f"{cluster_name}-*.tar.gz")
+    return any(os.path.getmtime(path) >= since for path in glob.glob(pattern))
+
+
+class _Collection(object):
+    """
+    Commands and outputs of the bundle of a single cluster
+    """
+
+    def __init__(self, cluster_name, kubeconfig, reason):
+        self.cluster_name = cluster_name
+        self.kubeconfig = kubeconfig
+        self.reason = reason
+        self.files = {}
+        self.summary = []
+
+    def oc(self, command):
+        oc_cmd = "oc "
+        if self.kubeconfig:
+            oc_cmd += f"--kubeconfig {self.kubeconfig} "
+        return oc_cmd + command
+
+    def run(self, file_name, command, timeout):
+        """
+        Run the 'oc' command and keep its output as the file of the bundle
+        Returns:
+            str: The standard output, None if the command failed
+        """
+        cmd = self.oc(command)
+        start_time = time.time()
+        try:
+            completed = exec_cmd(cmd, timeout=timeout, ignore_error=True, silent=True)
+        except subprocess.TimeoutExpired:
+            self.summary.append(f"{file_name}: timed out after {timeout:.0f}s: {cmd}")
+            return None
+        except Exception as ex:
+            self.summary.append(f"{file_name}: failed ({ex}): {cmd}")
+            return None
+        stdout = completed.stdout.decode(errors="replace")
+        stderr = completed.stderr.decode(errors="replace")
+        self.files[file_name] = stdout
+        if stderr:
+            self.files[file_name] += f"\n--- stderr ---\n{stderr}"
+        self.summary.append(
+            f"{file_name}: rc={completed.returncode} in "
+            f"{time.time() - start_time:.1f}s: {cmd}"
+        )
+        return stdout if completed.returncode == 0 else None
+
+    def tasks(self, resources):
+        """
+        Get the commands of the first stage of the collection
+        Args:
+            resources (list): (kind, resource_name, selector, namespace) of
+                the resources to describe
+        Returns:
+            list: (file name, command, follow up function) tuples, the follow
+                up function gets the output and returns more tasks
+        """
+        tasks = []
+        for kind, resource_name, selector, namespace in resources:
+            command = f"describe {kind}"
+            file_name = kind
+            if selector:
+                command += f" -l {shlex.quote(selector)}"
+                file_name += f"-{selector}"
+            elif resource_name:
+                command += f" {resource_name}"
+                file_name += f"-{resource_name}"
+            if namespace:
+                command += f" -n {namespace}"
+                file_name = f"{namespace}/{file_name}"
+            tasks.append((f"describe/{_sanitize(file_name)}.txt", command, None))
+        tasks.append(
+            ("events.txt", "get events -A --sort-by=.lastTimestamp -o wide", None)
+        )
+        for kind in OLM_KINDS:
+            tasks.append((f"olm/{kind}.txt", f"get {kind} -A -o wide", None))
+            tasks.append((f"olm/{kind}.yaml", f"get {kind} -A -o yaml", None))
+        tasks.append(("nodes.txt", "get nodes -o wide", None))
+        tasks.append(("nodes-describe.txt", "describe nodes", None))
+        tasks.append(("machineconfigpools.yaml", "get mcp -o yaml", None))
+        for namespace in config.RUN.get("diagnostics_namespaces") or []:
+            tasks.append(
+                (
+                    f"pods/{namespace}.json",
+                    f"get pods -n {namespace} -o json",
+                    self._log_tasks,
+                )
+            )
+        return tasks
+
+    def _log_tasks(self, output):
+        """
+        Get the log commands of the pods listed by 'oc get pods -o json'
+        """
+        tail = config.RUN.get("diagnostics_log_tail", 500)
+        tasks = []
+        for pod in json_loads(output).get("items", []):
+            name = pod["metadata"]["name"]
+            namespace = pod["metadata"]["namespace"]
+            tasks.append(
+                (
+                    f"logs/{namespace}/{name}.log",
+                    f"logs {name} -n {namespace} --all-containers "
+                    f"--tail {tail} --timestamps",
+                    None,
+                )
+            )
+        return tasks
+
+    def write(self, directory):
+        """
+        Write the bundle
+        Returns:
+            str: Path to the bundle
+        """
+        os.makedirs(directory, exist_ok=True)
+        reason = re.sub(r"[^\w.-]+", "_", self.reason)[:60]
+        path = os.path.join(
+            directory,
+            f"{self.cluster_name}-{time.strftime('%Y%m%d_%H%M%S')}-{reason}.tar.gz",
+        )
+        files = dict(self.files)
+        files["summary.txt"] = "\n".join([f"Reason: {self.reason}"] + self.summary)
+        prefix = os.path.basename(path)[: -len(".tar.gz")]
+        with tarfile.open(path, "w:gz") as bundle:
+            for file_name, content in sorted(files.items()):
+                data = content.encode()
+                info = tarfile.TarInfo(f"{prefix}/{file_name}")
+                info.size = len(data)
+                info.mtime = time.time()
+                bundle.addfile(info, io.BytesIO(data))
+        return path
+
+
+def _sanitize(name):
+    return re.sub(r"[^\w./-]+", "_", name).replace("..", "_")
+
+
+def collect_diagnostics(reason, clusters=None, resources=None, timeout=None):
+    """
+    Collect the diagnostics bundles of the clusters
+    Args:
+        reason (str): What failed, e.g. 'phase ocs[cluster1]'
+        clusters (list): Indexes of the clusters, if not set the clusters of
+            the resources or the current cluster context
+        resources (list): (ocp_obj, resource_name, selector) of the resources
+            we were waiting for, they are described in the bundle of the
+            cluster of the OCP object
+        timeout (int): Time cap of the collection in seconds, defaults to
+            RUN['diagnostics_timeout']
+    Returns:
+        list: Paths to the written bundles
+    """
+    if not is_diagnostics_enabled():
+        return []
+    timeout = timeout or config.RUN.get("diagnostics_timeout", 120)
+    end_time = time.time() + timeout
+    collections = {}
+    if clusters is None:
+        clusters = [] if resources else [config.cur_index]
+    for index in clusters:
+        kubeconfig = _get_cluster_kubeconfig(config.clusters[index])
+        collections[kubeconfig] = _Collection(
+            config.clusters[index].ENV_DATA["cluster_name"], kubeconfig, reason
+        )
+    described = {}
+    for ocp_obj, resource_name, selector in resources or []:
+        kubeconfig = ocp_obj.get_kubeconfig_path() or ""
+        if kubeconfig not in collections:
+            collections[kubeconfig] = _Collection(
+                _get_cluster_name(kubeconfig), kubeconfig, reason
+            )
+        described.setdefault(kubeconfig, []).append(
+            (ocp_obj.kind, resource_name, selector, ocp_obj.namespace)
+        )
+    log.info(
+        f"Collecting diagnostics of {reason} from "
+        f"{', '.join(c.cluster_name for c in collections.values())}"
+    )
+    pool = ThreadPoolExecutor(
+        max_workers=config.RUN.get("diagnostics_workers", 8),
+        thread_name_prefix="diagnostics",
+    )
+
+    def submit(collection, task):
+        file_name, command, follow_up = task
+        # Empty context, so that the deadline of the failed work doesn't
+        # apply to the collection
+        future = pool.submit(
+            contextvars.Context().run,
+            collection.run,
+            file_name,
+            command,
+            max(end_time - time.time(), 1),
+        )
+        futures[future] = (collection, task)
+        pending.add(future)
+
+    futures = {}
+    pending = set()
+    for kubeconfig, collection in collections.items():
+        for task in collection.tasks(described.get(kubeconfig, [])):
+            submit(collection, task)
+    while pending and time.time() < end_time:
+        done, pending = wait(
+            pending, timeout=end_time - time.time(), return_when=FIRST_COMPLETED
+        )
+        for future in done:
+            collection, (file_name, _, follow_up) = futures[future]
+            output = future.result()
+            if not follow_up or not output:
+                continue
+            try:
+                tasks = follow_up(output)
+            except Exception as ex:
+                collection.summary.append(f"{file_name}: unexpected output: {ex}")
+                continue
+            for task in tasks:
+                submit(collection, task)
+    for future in pending:
+        collection, (file_name, command, _) = futures[future]
+        collection.summary.append(
+            f"{file_name}: not finished within the {timeout}s time cap: "
+            f"{collection.oc(command)}"
+        )
+    pool.shutdown(wait=False, cancel_futures=True)
+    paths = []
+    for collection in collections.values():
+        try:
+            path = collection.write(get_bundle_dir())
+        except OSError as ex:
+            log.error(f"Failed to write diagnostics of {collection.cluster_name}: {ex}")
+            continue
+        log.warning(f"Diagnostics of {reason} written to {path}")
+        paths.append(path)
+    return paths
+
+
+def collect_diagnostics_in_background(reason, clusters=None, resources=None):
+    """
+    Start collect_diagnostics() in a thread, see collect_diagnostics() for the
+    arguments
+    Returns:
+        threading.Thread: The collecting thread, to be joined before exit
+    """
+    thread = threading.Thread(
+        target=collect_diagnostics,
+        args=(reason, clusters, resources),
+        name=f"diagnostics {reason}",
+    )
+    thread.start()
+    return thread
@@ -1,6 +1,6 @@
+import asyncio
 import logging
 import os
-import yaml
 import time
 import shlex
 import re
@@ -15,10 +15,19 @@ from src.utility.exceptions import (
     TimeoutExpiredError,
     NotSupportedFunctionError,
 )
-from src.utility.cmd import exec_cmd
+from src.utility.cmd import async_exec_cmd, exec_cmd
+from src.utility.serialization import load_output
+from src.ocs.backends import get_backend
+from src.ocs.cache import get_cached, invalidate
+from src.ocs.columns import get_column_getter
+from src.ocs.diagnostics import collect_diagnostics
+from src.ocs.watch import ResourceWatcher, wait_for_condition
 
 log = logging.getLogger(__name__)
 
+# 'oc' commands changing the resources, they invalidate the resource cache
+MUTATING_COMMANDS = ("apply", "create", "delete", "label", "patch", "replace")
+
 
 class OCP(object):
     """
@@ -132,7 +141,8 @@ class OCP(object):
         Get command - 'oc get <resource>'
         Args:
             resource_name (str): The resource name to fetch
-            out_yaml_format (bool): Adding '-o yaml' to oc command
+            out_yaml_format (bool): Adding '-o json' to oc command and
+                returning the parsed resource
             selector (str): The label selector to look for.
             all_namespaces (bool): Equal to oc get <resource> -A
             retry (int): Number of attempts to retry to get resource
@@ -147,6 +157,66 @@ class OCP(object):
             dict: Dictionary represents a returned yaml file
             None: Incase dont_raise is True and get is not found
         """
+        command, resource_name, selector = self._get_command(
+            resource_name, out_yaml_format, selector, all_namespaces, field_selector
+        )
+        retry += 1
+        while retry:
+            try:
+                if out_yaml_format:
+                    if not (all_namespaces or field_selector):
+                        cached = get_cached(self, resource_name, selector)
+                        if cached is not None:
+                            return cached
+                    return get_backend().get(
+                        self,
+                        resource_name,
+                        selector,
+                        field_selector,
+                        all_namespaces,
+                        silent=silent,
+                        skip_tls_verify=skip_tls_verify,
+                    )
+                return self.exec_oc_cmd(
+                    command,
+                    silent=silent,
+                    skip_tls_verify=skip_tls_verify,
+                )
+            except CommandFailed as ex:
+                if not silent:
+                    log.warning(
+                        f"Failed to get resource: {resource_name} of kind: "
+                        f"{self.kind}, selector: {selector}, Error: {ex}"
+                    )
+                retry -= 1
+                if not retry:
+                    if not silent:
+                        log.warning("Number of attempts to get resource reached!")
+                    if not dont_raise:
+                        raise
+                    else:
+                        return None
+                else:
+                    log.info(
+                        f"Number of attempts: {retry} to get resource: "
+                        f"{resource_name}, selector: {selector}, remain! "
+                        f"Trying again in {wait} sec."
+                    )
+                    time.sleep(wait if wait else 1)
+
+    def _get_command(
+        self,
+        resource_name="",
+        out_yaml_format=True,
+        selector=None,
+        all_namespaces=False,
+        field_selector=None,
+    ):
+        """
+        Build the 'oc get' command, see get() for the arguments
+        Returns:
+            tuple: The command, resource name and selector used
+        """
         resource_name = resource_name if resource_name else self.resource_name
         selector = selector if selector else self.selector
         field_selector = field_selector if field_selector else self.field_selector
@@ -162,11 +232,35 @@ class OCP(object):
         if field_selector is not None:
             command += f" --field-selector={field_selector}"
         if out_yaml_format:
-            command += " -o yaml"
+            command += " -o json"
+        return command, resource_name, selector
+
+    async def async_get(
+        self,
+        resource_name="",
+        out_yaml_format=True,
+        selector=None,
+        all_namespaces=False,
+        retry=0,
+        wait=3,
+        dont_raise=False,
+        silent=False,
+        field_selector=None,
+        skip_tls_verify=False,
+    ):
+        """
+        Asyncio counterpart of get(), see get() for the arguments
+        Returns:
+            dict: Dictionary represents a returned yaml file
+            None: Incase dont_raise is True and get is not found
+        """
+        command, resource_name, selector = self._get_command(
+            resource_name, out_yaml_format, selector, all_namespaces, field_selector
+        )
         retry += 1
         while retry:
             try:
-                return self.exec_oc_cmd(
+                return await self.async_exec_oc_cmd(
                     command,
                     silent=silent,
                     skip_tls_verify=skip_tls_verify,
@@ -179,19 +273,10 @@ class OCP(object):
                     )
                 retry -= 1
                 if not retry:
-                    if not silent:
-                        log.warning("Number of attempts to get resource reached!")
                     if not dont_raise:
                         raise
-                    else:
-                        return None
-                else:
-                    log.info(
-                        f"Number of attempts: {retry} to get resource: "
-                        f"{resource_name}, selector: {selector}, remain! "
-                        f"Trying again in {wait} sec."
-                    )
-                    time.sleep(wait if wait else 1)
+                    return None
+                await asyncio.sleep(wait if wait else 1)
 
     @retry(ResourceWrongStatusException, tries=4, delay=5, backoff=1)
     def wait_for_phase(self, phase, timeout=300, sleep=5):
@@ -211,12 +296,71 @@ class OCP(object):
         """
         self.check_function_supported(self._has_phase)
         self.check_name_is_specified()
-        sampler = TimeoutSampler(timeout, sleep, func=self.check_phase, phase=phase)
-        if not sampler.wait_for_func_status(True):
+
+        def in_phase(objects):
+            data = objects.get(self.resource_name)
+            if not data:
+                log.info(f"Cannot find resource object {self.resource_name}")
+                return False
+            current_phase = data.get("status", {}).get("phase")
+            log.info(f"Resource {self.resource_name} is in phase: {current_phase}!")
+            return current_phase == phase
+
+        try:
+            wait_for_condition(
+                self,
+                in_phase,
+                timeout,
+                sleep,
+                resource_name=self.resource_name,
+                description=f"{self.kind} {self.resource_name} phase {phase}",
+            )
+        except TimeoutExpiredError:
             raise ResourceWrongStatusException(
                 f"Resource: {self.resource_name} is not in expected phase: " f"{phase}"
             )
 
+    @retry(ResourceWrongStatusException, tries=4, delay=5, backoff=1)
+    async def async_wait_for_phase(self, phase, timeout=300, sleep=5):
+        """
+        Asyncio counterpart of wait_for_phase(), see wait_for_phase() for the
+        arguments
+        Raises:
+            ResourceWrongStatusException: In case the resource is not in expected
+                phase.
+        """
+        self.check_function_supported(self._has_phase)
+        self.check_name_is_specified()
+        loop = asyncio.get_running_loop()
+        end_time = loop.time() + timeout
+        while True:
+            if await self.async_check_phase(phase):
+                return
+            if loop.time() + sleep > end_time:
+                raise ResourceWrongStatusException(
+                    f"Resource: {self.resource_name} is not in expected phase: "
+                    f"{phase}"
+                )
+            await asyncio.sleep(sleep)
+
+    async def async_check_phase(self, phase):
+        """
+        Asyncio counterpart of check_phase()
+        Args:
+            phase (str): Phase of resource object
+        Returns:
+            bool: True if phase of object is the same as passed one, False
+                otherwise.
+        """
+        try:
+            data = await self.async_get()
+        except CommandFailed:
+            log.info(f"Cannot find resource object {self.resource_name}")
+            return False
+        current_phase = (data.get("status") or {}).get("phase")
+        log.info(f"Resource {self.resource_name} is in phase: {current_phase}!")
+        return current_phase == phase
+
     def check_phase(self, phase):
         """
         Check phase of resource
@@ -263,6 +407,29 @@ class OCP(object):
                 "Resource name doesn't support this functionality!"
             )
 
+    def get_kubeconfig_path(self):
+        """
+        Get kubeconfig of the cluster the 'oc' commands are executed against.
+        It is cluster_kubeconfig if set, otherwise the kubeconfig of the
+        cluster bound to the current thread / asyncio task, otherwise the
+        KUBECONFIG env variable or the current cluster context.
+        Returns:
+            str: Path to the kubeconfig file, None if the 'oc' default should
+                be used
+        """
+        if os.path.exists(self.cluster_kubeconfig):
+            return self.cluster_kubeconfig
+        env_kubeconfig = os.getenv("KUBECONFIG")
+        if (
+            config.is_ctx_bound()
+            or not env_kubeconfig
+            or not os.path.exists(env_kubeconfig)
+        ):
+            cluster_dir_kubeconfig = config.get_kubeconfig_path()
+            if os.path.exists(cluster_dir_kubeconfig):
+                return cluster_dir_kubeconfig
+        return None
+
     def exec_oc_cmd(
         self,
         command,
@@ -278,8 +445,8 @@ class OCP(object):
         Args:
             command (str): The command to execute (e.g. create -f file.yaml)
                 without the initial 'oc' at the beginning
-            out_yaml_format (bool): whether to return  yaml loaded python
-                object or raw output
+            out_yaml_format (bool): whether to return the parsed (JSON or
+                yaml) python object or raw output
             secrets (list): A list of secrets to be masked with asterisks
                 This kwarg is popped in order to not interfere with
                 subprocess.run(``**kwargs``)
@@ -292,36 +459,92 @@ class OCP(object):
             dict: Dictionary represents a returned yaml file.
             str: If out_yaml_format is False.
         """
-        oc_cmd = "oc "
-        env_kubeconfig = os.getenv("KUBECONFIG")
-        kubeconfig_path = (
-            self.cluster_kubeconfig if os.path.exists(self.cluster_kubeconfig) else None
+        oc_cmd = self._build_oc_cmd(command, skip_tls_verify)
+        out = exec_cmd(
+            cmd=oc_cmd,
+            timeout=timeout,
+            ignore_error=ignore_error,
+            threading_lock=self.threading_lock,
+            silent=silent,
+            **kwargs,
         )
+        if command.split()[0] in MUTATING_COMMANDS:
+            invalidate(self)
+        if out_yaml_format:
+            return load_output(out.stdout)
+        return out
 
-        if kubeconfig_path or not env_kubeconfig or not os.path.exists(env_kubeconfig):
-            cluster_dir_kubeconfig = kubeconfig_path or os.path.join(
-                config.ENV_DATA["cluster_path"], config.RUN.get("kubeconfig_location")
-            )
-            if os.path.exists(cluster_dir_kubeconfig):
-                oc_cmd += f"--kubeconfig {cluster_dir_kubeconfig} "
+    def _build_oc_cmd(self, command, skip_tls_verify=False):
+        """
+        Prefix the command with 'oc' and the kubeconfig and namespace options
+        Args:
+            command (str): The command without the initial 'oc'
+            skip_tls_verify (bool): Adding '--insecure-skip-tls-verify'
+        Returns:
+            str: The full 'oc' command
+        """
+        oc_cmd = "oc "
+        kubeconfig_path = self.get_kubeconfig_path()
+        if kubeconfig_path:
+            oc_cmd += f"--kubeconfig {kubeconfig_path} "
 
         if self.namespace:
             oc_cmd += f"-n {self.namespace} "
         if skip_tls_verify or self.skip_tls_verify:
             command += " --insecure-skip-tls-verify"
 
-        oc_cmd += command
-        out = exec_cmd(
-            cmd=oc_cmd,
+        return oc_cmd + command
+
+    async def async_exec_oc_cmd(
+        self,
+        command,
+        out_yaml_format=True,
+        timeout=600,
+        ignore_error=False,
+        silent=False,
+        skip_tls_verify=False,
+        **kwargs,
+    ):
+        """
+        Asyncio counterpart of exec_oc_cmd(), see exec_oc_cmd() for the
+        arguments. The commands are limited per cluster by
+        RUN['max_concurrent_commands_per_cluster']
+        Returns:
+            dict: Dictionary represents a returned yaml file.
+            str: If out_yaml_format is False.
+        """
+        out = await async_exec_cmd(
+            cmd=self._build_oc_cmd(command, skip_tls_verify),
             timeout=timeout,
             ignore_error=ignore_error,
-            threading_lock=self.threading_lock,
             silent=silent,
+            cluster=self.get_kubeconfig_path(),
             **kwargs,
         )
         if out_yaml_format:
-            return yaml.safe_load(out.stdout)
-        return out
+            return load_output(out.stdout)
+        return out.stdout.decode()
+
+    def get_column_values(self, sample, column):
+        """
+        Evaluate the column of the resources returned by a single get(), from
+        their printer columns instead of the 'oc get' table
+        Args:
+            sample (dict): The resource or 'List' of the resources
+            column (str): The name of the column to evaluate
+        Returns:
+            dict: Resource name -> column value, None if the column can't be
+                evaluated from the resources
+        """
+        if not sample:
+            return {}
+        items = sample.get("items", []) if sample.get("kind") == "List" else [sample]
+        if not items:
+            return {}
+        getter = get_column_getter(self, items[0], column)
+        if getter is None:
+            return None
+        return {item["metadata"]["name"]: getter(item) for item in items}
 
     def get_resource(self, resource_name, column, retry=0, wait=3, selector=None):
         """
@@ -339,7 +562,16 @@ class OCP(object):
         """
         resource_name = resource_name if resource_name else self.resource_name
         selector = selector if selector else self.selector
-        # Get the resource in str format
+        sample = self.get(
+            resource_name=resource_name,
+            retry=retry,
+            wait=wait,
+            selector=selector,
+        )
+        values = self.get_column_values(sample, column)
+        if values:
+            return values.get(resource_name, next(iter(values.values())))
+        # The column is not known, scrape it from the 'oc get' table
         resource = self.get(
             resource_name=resource_name,
             out_yaml_format=False,
@@ -347,6 +579,61 @@ class OCP(object):
             wait=wait,
             selector=selector,
         )
+        column_index, resource_info = self._parse_column(resource, column)
+
+        # WA, Failed to parse "oc get build" command
+        # https://github.com/red-hat-storage/ocs-ci/issues/2312
+        try:
+            if self.data["items"][0]["kind"].lower() == "build" and (
+                "jax-rs-build" in self.data["items"][0].get("metadata").get("name")
+            ):
+                return resource_info[column_index - 1]
+        except Exception:
+            pass
+
+        return resource_info[column_index]
+
+    async def async_get_resource(
+        self, resource_name, column, retry=0, wait=3, selector=None
+    ):
+        """
+        Asyncio counterpart of get_resource(), see get_resource() for the
+        arguments
+        Returns:
+            str: The column value
+        """
+        resource_name = resource_name if resource_name else self.resource_name
+        selector = selector if selector else self.selector
+        sample = await self.async_get(
+            resource_name=resource_name,
+            retry=retry,
+            wait=wait,
+            selector=selector,
+        )
+        # The CRD printer columns may be fetched, don't block the loop
+        values = await asyncio.to_thread(self.get_column_values, sample, column)
+        if values:
+            return values.get(resource_name, next(iter(values.values())))
+        resource = await self.async_get(
+            resource_name=resource_name,
+            out_yaml_format=False,
+            retry=retry,
+            wait=wait,
+            selector=selector,
+        )
+        column_index, resource_info = self._parse_column(resource, column)
+        return resource_info[column_index]
+
+    @staticmethod
+    def _parse_column(resource, column):
+        """
+        Parse the 'oc get' output not in the 'yaml' format
+        Args:
+            resource (str): The 'oc get' output
+            column (str): The name of the column to retrieve
+        Returns:
+            tuple: Index of the column and the list of the values
+        """
         resource = re.split(r"\s{2,}", resource)
         exception_list = ["RWO", "RWX", "ROX"]
         # get the list of titles
@@ -380,19 +667,7 @@ class OCP(object):
             titles[-1] = " ".join(updated_last_title_item)
 
         # Get the index of column
-        column_index = titles.index(column)
-
-        # WA, Failed to parse "oc get build" command
-        # https://github.com/red-hat-storage/ocs-ci/issues/2312
-        try:
-            if self.data["items"][0]["kind"].lower() == "build" and (
-                "jax-rs-build" in self.data["items"][0].get("metadata").get("name")
-            ):
-                return resource_info[column_index - 1]
-        except Exception:
-            pass
-
-        return resource_info[column_index]
+        return titles.index(column), resource_info
 
     def wait_for_resource(
         self,
@@ -459,19 +734,28 @@ class OCP(object):
         # now prevents UnboundLocalError raised when waiting timeouts
         actual_status = None
 
+        sampler = TimeoutSampler(
+            timeout, sleep, self.get, resource_name, True, selector
+        )
+        # Sample again as soon as the resources changed, not only after sleep
+        watcher = ResourceWatcher(self, resource_name, selector).start()
+        sampler.wait = watcher.wait_for_change
         try:
-            for sample in TimeoutSampler(
-                timeout, sleep, self.get, resource_name, True, selector
-            ):
+            for sample in sampler:
                 # Only 1 resource expected to be returned
+                # All the resources are evaluated from the single sample
+                values = self.get_column_values(sample, column)
                 if resource_name:
-                    retry = int(timeout / sleep if sleep else timeout / 1)
-                    status = self.get_resource(
-                        resource_name,
-                        column,
-                        retry=retry,
-                        wait=sleep,
-                    )
+                    if values and resource_name in values:
+                        status = values[resource_name]
+                    else:
+                        retry = int(timeout / sleep if sleep else timeout / 1)
+                        status = self.get_resource(
+                            resource_name,
+                            column,
+                            retry=retry,
+                            wait=sleep,
+                        )
                     if status == condition:
                         log.info(
                             f"status of {resource_name} at {column}"
@@ -502,7 +786,10 @@ class OCP(object):
                     for item in sample:
                         try:
                             item_name = item.get("metadata").get("name")
-                            status = self.get_resource(item_name, column)
+                            if values is not None:
+                                status = values[item_name]
+                            else:
+                                status = self.get_resource(item_name, column)
                             actual_status.append(status)
                             if status == condition:
                                 in_condition.append(item)
@@ -556,11 +843,11 @@ class OCP(object):
                     )
         except TimeoutExpiredError as ex:
             log.error(f"timeout expired: {ex}")
-            # run `oc describe` on the resources we were waiting for to provide
-            # evidence so that we can understand what was wrong
-            output = self.describe(resource_name, selector=selector)
-            log.warning(
-                "Description of the resource(s) we were waiting for:\n%s", output
+            # describe the resources we were waiting for and collect the
+            # cluster state to provide evidence of what was wrong
+            collect_diagnostics(
+                f"wait for {self._kind} {resource_name or selector}",
+                resources=[(self, resource_name, selector)],
             )
             log.error(
                 (
@@ -571,9 +858,9 @@ class OCP(object):
             )
             raise (ex)
         except ResourceWrongStatusException:
-            output = self.describe(resource_name, selector=selector)
-            log.warning(
-                "Description of the resource(s) we were waiting for:\n%s", output
+            collect_diagnostics(
+                f"{self._kind} {resource_name or selector} in {error_condition}",
+                resources=[(self, resource_name, selector)],
             )
             log.error(
                 (
@@ -588,9 +875,128 @@ class OCP(object):
                 error_condition,
             )
             raise
+        finally:
+            watcher.stop()
 
         return False
 
+    async def async_wait_for_resource(
+        self,
+        condition,
+        resource_name="",
+        column="STATUS",
+        selector=None,
+        resource_count=0,
+        timeout=60,
+        sleep=3,
+        dont_allow_other_resources=False,
+        error_condition=None,
+    ):
+        """
+        Asyncio counterpart of wait_for_resource(), see wait_for_resource()
+        for the arguments
+        Raises:
+            TimeoutExpiredError: In case the resources did not reach the
+                condition in time
+            ResourceWrongStatusException: In case a resource reached the
+                error_condition
+        Returns:
+            bool: True in case all resources reached desired condition
+        """
+        if condition == error_condition:
+            raise ValueError(
+                f"Condition '{condition}' we are waiting for must be different"
+                f" from error condition '{error_condition}'"
+                " which describes unexpected error state."
+            )
+        resource_name = resource_name if resource_name else self.resource_name
+        selector = selector if selector else self.selector
+        log.info(
+            f"Waiting for a resource(s) of kind {self._kind}"
+            f" identified by name '{resource_name}'"
+            f" using selector {selector}"
+            f" at column name {column}"
+            f" to reach desired condition {condition}"
+        )
+        loop = asyncio.get_running_loop()
+        end_time = loop.time() + timeout
+        actual_status = None
+        while True:
+            try:
+                sample = await self.async_get(resource_name, True, selector)
+            except CommandFailed as ex:
+                log.info(f"Exception raised during iteration: {ex}")
+                sample = {}
+            if resource_name:
+                items = [resource_name] if sample else []
+            elif sample.get("kind") == "List":
+                items = [item["metadata"]["name"] for item in sample["items"]]
+            else:
+                items = []
+            values = None
+            if items:
+                values = await asyncio.to_thread(
+                    self.get_column_values, sample, column
+                )
+            if values is not None and all(item in values for item in items):
+                statuses = [values[item] for item in items]
+            else:
+                statuses = await asyncio.gather(
+                    *[self.async_get_resource(item, column) for item in items],
+                    return_exceptions=True,
+                )
+            actual_status = []
+            in_condition = 0
+            for item, status in zip(items, statuses):
+                if isinstance(status, CommandFailed):
+                    log.info(
+                        f"Failed to get status of resource: {item} at column "
+                        f"{column}, Error: {status}"
+                    )
+                    continue
+                if isinstance(status, Exception):
+                    raise status
+                actual_status.append(status)
+                if status == condition:
+                    in_condition += 1
+                elif error_condition is not None and status == error_condition:
+                    raise ResourceWrongStatusException(
+                        item, column=column, expected=condition, got=status
+                    )
+            if items:
+                if resource_count:
+                    if in_condition >= resource_count and not (
+                        dont_allow_other_resources and len(items) != in_condition
+                    ):
+                        log.info(f"{in_condition} resources reached condition!")
+                        return True
+                elif in_condition == len(items):
+                    log.info(
+                        f"status of {resource_name} at {column} reached condition!"
+                    )
+                    return True
+            log.info(
+                f"status of {resource_name} at column {column} was {actual_status},"
+                f" but we were waiting for {condition}"
+            )
+            if loop.time() + sleep > end_time:
+                log.error(
+                    f"Wait for {self._kind} resource {resource_name} at column "
+                    f"{column} to reach desired condition {condition} failed,"
+                    f" last actual status was {actual_status}"
+                )
+                await asyncio.to_thread(
+                    collect_diagnostics,
+                    f"wait for {self._kind} {resource_name or selector}",
+                    resources=[(self, resource_name, selector)],
+                )
+                raise TimeoutExpiredError(
+                    timeout,
+                    f"Timed out after {timeout}s waiting for {self._kind} "
+                    f"{resource_name} to reach {condition}",
+                )
+            await asyncio.sleep(sleep)
+
     def add_label(self, resource_name, label):
         """
         Adds a new label for this pod
@@ -599,6 +1005,75 @@ class OCP(object):
             label (str): New label to be assigned for this pod
                 E.g: "label=app='rook-ceph-mds'"
         """
-        command = f"label {self.kind} {resource_name} {label} --overwrite "
-        status = self.exec_oc_cmd(command)
+        status = get_backend().label(self, resource_name, label)
+        invalidate(self)
         return status
+
+    def apply(self, data):
+        """
+        Apply the resource of this kind
+        Args:
+            data (dict): The resource
+        Returns:
+            dict: The applied resource
+        """
+        applied = get_backend().apply(self, data)
+        invalidate(self)
+        return applied
+
+    def patch(self, resource_name="", params=None, format_type="json"):
+        """
+        Patch the resource
+        Args:
+            resource_name (str): Name of the resource to patch
+            params (str): The patch, json string or dict
+            format_type (str): Type of the patch: json, merge or strategic
+        Returns:
+            dict: The patched resource
+        """
+        resource_name = resource_name if resource_name else self.resource_name
+        patched = get_backend().patch(self, resource_name, params, format_type)
+        invalidate(self)
+        return patched
+
+
+def apply_objects(objs, cluster_kubeconfig="", namespace=None, timeout=600):
+    """
+    Apply the in-memory resources together, by a single 'oc apply -f -' call
+    or through the API of the kubernetes backend, no manifest file is written
+    Args:
+        objs (dict or list): The resource or the list of resources
+        cluster_kubeconfig (str): Path to the kubeconfig of the cluster, the
+            current cluster context is used if not set
+        namespace (str): Namespace of the resources without one
+        timeout (int): Timeout of the apply in seconds
+    Returns:
+        list: The applied resources
+    """
+    if isinstance(objs, dict):
+        objs = [objs]
+    objs = list(objs)
+    if not objs:
+        return []
+    log.info(
+        "Applying "
+        + ", ".join(f"{obj['kind']}/{obj['metadata']['name']}" for obj in objs)
+    )
+    ocp_obj = OCP(
+        kind="List", namespace=namespace, cluster_kubeconfig=cluster_kubeconfig
+    )
+    applied = get_backend().apply_objects(ocp_obj, objs, timeout)
+    # The stores are per kind and namespace, the resources without a namespace
+    # were applied to the given one
+    changed = {
+        (obj["kind"], obj["metadata"].get("namespace") or namespace) for obj in objs
+    }
+    for kind, obj_namespace in changed:
+        invalidate(
+            OCP(
+                kind=kind,
+                namespace=obj_namespace,
+                cluster_kubeconfig=cluster_kubeconfig,
+            )
+        )
+    return applied
@@ -3,7 +3,6 @@ General OCS object
 """
 
 import logging
-import tempfile
 
 from src.ocs.ocp import OCP
 
@@ -47,10 +46,6 @@ class OCS(object):
             namespace=self._namespace,
             threading_lock=self.threading_lock,
         )
-        with tempfile.NamedTemporaryFile(
-            mode="w+", prefix=self._kind, delete=False
-        ) as temp_file_info:
-            self.temp_yaml = temp_file_info.name
         # This _is_delete flag is set to True if the delete method was called
         # on object of this class and was successfull.
         self._is_deleted = False
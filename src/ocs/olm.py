@@ -0,0 +1,202 @@
+"""
+Tracking of the OLM operator installs.
+
+An operator install goes Subscription -> InstallPlan -> CSV. Instead of
+sleeping for a fixed time after subscribing, InstallTracker watches the status
+of each of them, moves to the next step as soon as the current one is done
+and records how long every step took.
+"""
+
+import logging
+import time
+
+from src.ocs.ocp import OCP
+from src.ocs.watch import wait_for_condition
+from src.utility import constants
+from src.utility.deadline import deadline
+from src.utility.exceptions import OperatorInstallFailed
+from src.utility.tracing import span
+
+log = logging.getLogger(__name__)
+
+
+def _get_condition_messages(status, types):
+    """
+    Get the messages of the true conditions of the given types
+    """
+    return [
+        f"{condition['type']}: {condition.get('message', '')}"
+        for condition in status.get("conditions") or []
+        if condition.get("type") in types and condition.get("status") == "True"
+    ]
+
+
+class InstallTracker(object):
+    """
+    Follows the install of an operator from its subscription to the
+    succeeded CSV
+    Example::
+        tracker = InstallTracker("odf-operator", "openshift-storage")
+        tracker.track(timeout=900)
+        log.info(tracker.timings)
+    """
+
+    def __init__(self, subscription_name, namespace, cluster_kubeconfig=""):
+        """
+        Args:
+            subscription_name (str): Name of the subscription
+            namespace (str): Namespace of the subscription
+            cluster_kubeconfig (str): Path to the kubeconfig of the cluster,
+                the current cluster context if not set
+        """
+        self.subscription_name = subscription_name
+        self.namespace = namespace
+        self.cluster_kubeconfig = cluster_kubeconfig
+        self.install_plan = None
+        self.csv_name = None
+        self.timings = {}
+        self._last_status = None
+
+    def _ocp(self, kind):
+        return OCP(
+            kind=kind,
+            namespace=self.namespace,
+            cluster_kubeconfig=self.cluster_kubeconfig,
+        )
+
+    def _log_status(self, status):
+        """
+        Log the status only when it changed since the last sample
+        """
+        if status != self._last_status:
+            log.info(f"Install of {self.subscription_name}: {status}")
+            self._last_status = status
+
+    def subscription_resolved(self, objects):
+        """
+        Condition of the subscription step, the CSV to install is resolved
+        and its install plan created, unless the CSV is already installed
+        Args:
+            objects (dict): name -> subscription
+        Returns:
+            bool: True once the step is done
+        """
+        subscription = objects.get(self.subscription_name)
+        if not subscription:
+            self._log_status("waiting for the subscription")
+            return False
+        status = subscription.get("status") or {}
+        current_csv = status.get("currentCSV")
+        if current_csv and status.get("installedCSV") == current_csv:
+            self.csv_name = current_csv
+            return True
+        plan_ref = status.get("installPlanRef") or status.get("installplan")
+        if current_csv and plan_ref:
+            self.csv_name = current_csv
+            self.install_plan = plan_ref["name"]
+            return True
+        messages = _get_condition_messages(
+            status,
+            ("ResolutionFailed", "CatalogSourcesUnhealthy", "InstallPlanMissing"),
+        )
+        self._log_status(
+            f"subscription state {status.get('state')}"
+            + (f", {'; '.join(messages)}" if messages else "")
+        )
+        return False
+
+    def install_plan_complete(self, objects):
+        """
+        Condition of the install plan step
+        Args:
+            objects (dict): name -> install plan
+        Raises:
+            OperatorInstallFailed: In case the install plan failed
+        Returns:
+            bool: True once the step is done
+        """
+        install_plan = objects.get(self.install_plan)
+        if not install_plan:
+            return False
+        status = install_plan.get("status") or {}
+        phase = status.get("phase")
+        if phase == "Failed":
+            messages = [
+                condition.get("message", "")
+                for condition in status.get("conditions") or []
+            ]
+            raise OperatorInstallFailed(
+                f"InstallPlan {self.install_plan} of {self.subscription_name} "
+                f"failed: {'; '.join(messages)}"
+            )
+        self._log_status(f"install plan {self.install_plan} phase {phase}")
+        return phase == "Complete"
+
+    def csv_succeeded(self, objects):
+        """
+        Condition of the CSV step. A failed CSV is only logged, OLM keeps
+        retrying it (e.g. until the requirements are met)
+        Args:
+            objects (dict): name -> CSV
+        Returns:
+            bool: True once the step is done
+        """
+        csv = objects.get(self.csv_name)
+        if not csv:
+            return False
+        status = csv.get("status") or {}
+        phase = status.get("phase")
+        self._log_status(
+            f"CSV {self.csv_name} phase {phase}"
+            + (f" ({status.get('message')})" if phase == "Failed" else "")
+        )
+        return phase == "Succeeded"
+
+    def _step(self, step, kind, resource_name, condition, timeout):
+        """
+        Wait for a single step and record its duration
+        """
+        start_time = time.time()
+        with span(f"olm {step}", resource=resource_name):
+            wait_for_condition(
+                self._ocp(kind),
+                condition,
+                timeout,
+                resource_name=resource_name,
+                description=f"{step} of {self.subscription_name}",
+            )
+        self.timings[step] = time.time() - start_time
+
+    def track(self, timeout=900):
+        """
+        Wait until the operator is installed
+        Args:
+            timeout (int): Timeout in seconds of the whole install
+        Raises:
+            TimeoutExpiredError: In case the install did not finish in time
+            OperatorInstallFailed: In case the install plan failed
+        Returns:
+            str: Name of the installed CSV
+        """
+        with deadline(timeout, f"install of {self.subscription_name}"):
+            self._step(
+                "subscription",
+                constants.SUBSCRIPTION_WITH_ACM,
+                self.subscription_name,
+                self.subscription_resolved,
+                timeout,
+            )
+            if self.install_plan:
+                self._step(
+                    "installplan",
+                    "installplan",
+                    self.install_plan,
+                    self.install_plan_complete,
+                    timeout,
+                )
+            self._step("csv", "csv", self.csv_name, self.csv_succeeded, timeout)
+        log.info(
+            f"Operator {self.subscription_name} installed CSV {self.csv_name}: "
+            + ", ".join(f"{step} {took:.0f}s" for step, took in self.timings.items())
+        )
+        return self.csv_name
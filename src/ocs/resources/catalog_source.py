@@ -8,9 +8,13 @@ from time import sleep
 from src.utility.cmd import exec_cmd
 from src.utility import constants
 from src.ocs.ocp import OCP
-from src.utility.exceptions import ResourceWrongStatusException, CommandFailed
+from src.ocs.watch import wait_for_condition
+from src.utility.exceptions import (
+    ResourceWrongStatusException,
+    CommandFailed,
+    TimeoutExpiredError,
+)
 from src.utility.retry import retry
-from src.utility.timeout import TimeoutSampler
 from src.utility.openshift_ops import OpenshiftOps
 
 logger = logging.getLogger(__name__)
@@ -54,8 +58,29 @@ class CatalogSource(OCP):
                 expected state.
         """
         self.check_name_is_specified()
-        sampler = TimeoutSampler(timeout, sleep, self.check_state, state=state)
-        if not sampler.wait_for_func_status(True):
+
+        def in_state(objects):
+            data = objects.get(self.resource_name)
+            if not data:
+                logger.info(f"Cannot find CatalogSource object {self.resource_name}")
+                return False
+            connection_state = data.get("status", {}).get("connectionState", {})
+            current_state = connection_state.get("lastObservedState")
+            logger.info(
+                f"Catalog source {self.resource_name} is in state: {current_state}!"
+            )
+            return current_state == state
+
+        try:
+            wait_for_condition(
+                self,
+                in_state,
+                timeout,
+                sleep,
+                resource_name=self.resource_name,
+                description=f"catalog source {self.resource_name} state {state}",
+            )
+        except TimeoutExpiredError:
             raise ResourceWrongStatusException(
                 f"Catalog source: {self.resource_name} is not in expected "
                 f"state: {state}"
@@ -0,0 +1,279 @@
+"""
+MachineConfigPool related functionalities
+"""
+
+import logging
+import time
+
+from src.ocs.ocp import OCP
+from src.ocs.watch import WaitCondition, wait_all
+from src.utility import constants
+
+log = logging.getLogger(__name__)
+
+# Node annotations of the machine config daemon
+CURRENT_CONFIG_ANNOTATION = "machineconfiguration.openshift.io/currentConfig"
+DESIRED_CONFIG_ANNOTATION = "machineconfiguration.openshift.io/desiredConfig"
+STATE_ANNOTATION = "machineconfiguration.openshift.io/state"
+
+
+def _is_condition_true(status, condition_type):
+    return any(
+        condition.get("type") == condition_type and condition.get("status") == "True"
+        for condition in status.get("conditions") or []
+    )
+
+
+class MachineConfigPoolRollout(object):
+    """
+    Follows the rollout of a machine config change (e.g. an ICSP) to the
+    pools. Create it before the change, so that the rendered configs of the
+    pools before the change are known, and wait for it after the change.
+    Example::
+        rollout = MachineConfigPoolRollout(["worker", "master"])
+        exec_cmd("oc apply -f icsp.yaml")
+        rollout.wait(timeout=1900)
+    """
+
+    def __init__(
+        self,
+        pools,
+        cluster_kubeconfig="",
+        skip_tls_verify=False,
+        baseline=True,
+        cluster_name="",
+    ):
+        """
+        Args:
+            pools (list): Names of the pools, e.g. ['worker', 'master']
+            cluster_kubeconfig (str): Path to the kubeconfig of the cluster,
+                the current cluster context if not set
+            skip_tls_verify (bool): Skip the TLS verification of the server
+            baseline (bool): Record the rendered configs of the pools, the
+                rollout is started once they change. Without it the rollout
+                is started once a pool reports Updating.
+            cluster_name (str): Name of the cluster for the log messages, when
+                the rollouts of more clusters are followed together
+        """
+        self.pools = pools
+        self.cluster_kubeconfig = cluster_kubeconfig
+        self.skip_tls_verify = skip_tls_verify
+        self.prefix = f"{cluster_name}: " if cluster_name else ""
+        self.start_configs = self.get_rendered_configs() if baseline else {}
+        self.target_configs = {}
+        self.start_time = None
+        self._reported = {}
+
+    def get_rendered_configs(self):
+        """
+        Returns:
+            dict: pool name -> name of its rendered config
+        """
+        pools = OCP(
+            kind=constants.MACHINECONFIGPOOL,
+            cluster_kubeconfig=self.cluster_kubeconfig,
+            skip_tls_verify=self.skip_tls_verify,
+        ).get()
+        return {
+            pool["metadata"]["name"]: pool["spec"].get("configuration", {}).get("name")
+            for pool in pools.get("items", [])
+        }
+
+    def _report(self, key, message):
+        """
+        Log the progress only when it changed since the last sample
+        """
+        if self._reported.get(key) != message:
+            log.info(f"{self.prefix}{message}")
+            self._reported[key] = message
+
+    def _is_started(self, name, pool, start_timeout):
+        """
+        Check the rollout reached the pool, its rendered config changed, it
+        has a generation not observed yet or it reports Updating. If neither
+        happens within the start timeout, the change doesn't need a rollout
+        of the pool.
+        """
+        config_name = pool["spec"].get("configuration", {}).get("name")
+        if name in self.start_configs and config_name != self.start_configs[name]:
+            log.info(
+                f"{self.prefix}Rollout of {config_name} to machineconfigpool "
+                f"{name} started, the previous config was {self.start_configs[name]}"
+            )
+            return True
+        status = pool.get("status") or {}
+        if status.get("observedGeneration", 0) < pool["metadata"].get("generation", 0):
+            log.info(f"{self.prefix}Machineconfigpool {name} has a new generation")
+            return True
+        if _is_condition_true(status, "Updating"):
+            log.info(
+                f"{self.prefix}Rollout of {config_name} to machineconfigpool "
+                f"{name} started"
+            )
+            return True
+        if time.time() - self.start_time >= start_timeout:
+            log.info(
+                f"{self.prefix}No rollout of machineconfigpool {name} started within "
+                f"{start_timeout}s, the rendered config is still {config_name}"
+            )
+            return True
+        return False
+
+    def pool_updated(self, name, start_timeout):
+        """
+        Get the condition of the pool rollout for wait_all()
+        Args:
+            name (str): Name of the pool
+            start_timeout (int): Seconds to wait for the rollout to start
+        Returns:
+            function: Predicate which is True once the pool is updated
+        """
+
+        def predicate(pools):
+            pool = pools.get(name)
+            if not pool:
+                return False
+            if name not in self.target_configs:
+                if not self._is_started(name, pool, start_timeout):
+                    return False
+                self.target_configs[name] = pool["spec"]["configuration"]["name"]
+            status = pool.get("status") or {}
+            machine_count = status.get("machineCount", 0)
+            self._report(
+                name,
+                f"machineconfigpool {name}: "
+                f"{status.get('updatedMachineCount', 0)}/{machine_count} updated, "
+                f"{status.get('readyMachineCount', 0)} ready, "
+                f"{status.get('degradedMachineCount', 0)} degraded",
+            )
+            if _is_condition_true(status, "Degraded"):
+                self._report(
+                    f"{name} degraded",
+                    f"machineconfigpool {name} is degraded: "
+                    + "; ".join(
+                        condition.get("message", "")
+                        for condition in status.get("conditions") or []
+                        if condition.get("type").endswith("Degraded")
+                        and condition.get("status") == "True"
+                    ),
+                )
+            return (
+                status.get("observedGeneration", 0)
+                >= pool["metadata"].get("generation", 0)
+                and status.get("configuration", {}).get("name")
+                == self.target_configs[name]
+                and _is_condition_true(status, "Updated")
+                and status.get("updatedMachineCount") == machine_count
+                and status.get("readyMachineCount") == machine_count
+            )
+
+        return predicate
+
+    def nodes_updated(self, name):
+        """
+        Get the condition of the nodes of the pool for wait_all(), it reports
+        the progress of every node
+        Args:
+            name (str): Name of the pool
+        Returns:
+            function: Predicate which is True once all the nodes of the pool
+                run its new rendered config
+        """
+
+        def predicate(nodes):
+            target = self.target_configs.get(name)
+            if target is None:
+                # The rollout of the pool didn't start yet
+                return False
+            done = True
+            for node_name, node in nodes.items():
+                annotations = node["metadata"].get("annotations") or {}
+                current = annotations.get(CURRENT_CONFIG_ANNOTATION)
+                desired = annotations.get(DESIRED_CONFIG_ANNOTATION)
+                state = annotations.get(STATE_ANNOTATION)
+                self._report(
+                    f"node {node_name}",
+                    f"node {node_name} ({name}): {state}, config {current}"
+                    + (f" -> {desired}" if desired != current else ""),
+                )
+                if state != "Done" or current != target:
+                    done = False
+            return done
+
+        return predicate
+
+    def get_conditions(self, start_timeout=120):
+        """
+        Get the wait_all() conditions of the rollout, the pools are followed
+        at the same time
+        Args:
+            start_timeout (int): Seconds to wait for the rollout to start,
+                the pools which don't start rolling out by then don't need to
+        Returns:
+            list: WaitCondition of every pool and of the nodes of every pool
+        """
+        self.start_time = time.time()
+        conditions = []
+        for name in self.pools:
+            conditions.append(
+                WaitCondition(
+                    kind=constants.MACHINECONFIGPOOL,
+                    resource_name=name,
+                    predicate=self.pool_updated(name, start_timeout),
+                    cluster_kubeconfig=self.cluster_kubeconfig,
+                    skip_tls_verify=self.skip_tls_verify,
+                    description=f"{self.prefix}machineconfigpool {name}",
+                )
+            )
+        # After the pools, so that a started rollout is seen by the nodes of
+        # the same sample
+        for name in self.pools:
+            conditions.append(
+                WaitCondition(
+                    kind="node",
+                    selector=f"node-role.kubernetes.io/{name}",
+                    predicate=self.nodes_updated(name),
+                    cluster_kubeconfig=self.cluster_kubeconfig,
+                    skip_tls_verify=self.skip_tls_verify,
+                    description=f"{self.prefix}nodes of machineconfigpool {name}",
+                )
+            )
+        return conditions
+
+    def wait(self, timeout=900, start_timeout=120, sleep=5):
+        """
+        Wait until all the pools and their nodes are updated
+        Args:
+            timeout (int): Timeout in seconds
+            start_timeout (int): Seconds to wait for the rollout to start,
+                the pools which don't start rolling out by then don't need to
+            sleep (int): Sampling interval in seconds
+        Raises:
+            TimeoutExpiredError: In case the pools were not updated in time
+        """
+        wait_for_rollouts([self], timeout, start_timeout, sleep)
+
+
+def wait_for_rollouts(rollouts, timeout=900, start_timeout=120, sleep=5):
+    """
+    Wait for the rollouts of more clusters together, so that their nodes are
+    updated (and rebooted) at the same time
+    Args:
+        rollouts (list): MachineConfigPoolRollout of every cluster
+        timeout (int): Timeout in seconds
+        start_timeout (int): Seconds to wait for the rollouts to start
+        sleep (int): Sampling interval in seconds
+    Raises:
+        TimeoutExpiredError: In case the pools were not updated in time
+    """
+    start_time = time.time()
+    conditions = []
+    for rollout in rollouts:
+        conditions.extend(rollout.get_conditions(start_timeout))
+    names = [f"{rollout.prefix}{rollout.pools}" for rollout in rollouts]
+    log.info(f"Waiting for the rollout to machineconfigpools {', '.join(names)}")
+    wait_all(conditions, timeout=timeout, sleep=sleep)
+    log.info(
+        f"Machineconfigpools {', '.join(names)} updated in "
+        f"{time.time() - start_time:.0f}s"
+    )
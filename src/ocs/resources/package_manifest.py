@@ -9,11 +9,15 @@ from src.utility.exceptions import (
     ChannelNotFound,
 )
 from src.utility.retry import retry
-from src.utility.timeout import TimeoutSampler
+from src.ocs.watch import wait_for_condition
+from src.ocs.catalog_index import get_cluster_catalog_index
 from src.ocs.resources.catalog_source import CatalogSource
 
 logger = logging.getLogger(__name__)
 
+# Clusters (kubeconfig paths) found to use the internal catalog source
+_internal_catalog_clusters = set()
+
 
 class PackageManifest(OCP):
     """
@@ -36,6 +40,8 @@ class PackageManifest(OCP):
                 Automatic or Manual
         """
         self.subscription_plan_approval = subscription_plan_approval
+        self._catalog_index = None
+        self._catalog_index_checked = False
         super(PackageManifest, self).__init__(
             namespace=namespace,
             resource_name=resource_name,
@@ -43,6 +49,21 @@ class PackageManifest(OCP):
             **kwargs,
         )
 
+    @property
+    def catalog_index(self):
+        """
+        Offline index of the catalog which answers the queries of the
+        package instead of the packagemanifest API
+        Returns:
+            CatalogIndex: The index, None if the API has to be used
+        """
+        if not self._catalog_index_checked:
+            index = get_cluster_catalog_index(self.cluster_kubeconfig)
+            if index is not None and self.resource_name in index:
+                self._catalog_index = index
+            self._catalog_index_checked = True
+        return self._catalog_index
+
     @retry(ResourceNotFoundError, tries=10, delay=10, backoff=1)
     def get(self, **kwargs):
         """
@@ -93,6 +114,8 @@ class PackageManifest(OCP):
                 specified.
         """
         self.check_name_is_specified()
+        if self.catalog_index is not None:
+            return self.catalog_index.get_default_channel(self.resource_name)
         try:
             return self.data["status"]["defaultChannel"]
         except KeyError as ex:
@@ -113,6 +136,8 @@ class PackageManifest(OCP):
                 specified.
         """
         self.check_name_is_specified()
+        if self.catalog_index is not None:
+            return self.catalog_index.get_channels(self.resource_name)
         try:
             return self.data["status"]["channels"]
         except KeyError as ex:
@@ -197,11 +222,22 @@ class PackageManifest(OCP):
         selector = selector if selector else self.selector
         self.check_name_is_specified(resource_name)
 
-        for sample in TimeoutSampler(timeout=timeout, sleep=sleep, func=self.get):
-            if sample.get("metadata", {}).get("name") == resource_name:
+        def found(objects):
+            if resource_name in objects:
                 logger.info(f"package manifest {resource_name} found!")
-                return
+                return True
             logger.info(f"package manifest {resource_name} not found!")
+            return False
+
+        wait_for_condition(
+            self,
+            found,
+            timeout,
+            sleep,
+            resource_name=resource_name,
+            selector=selector,
+            description=f"package manifest {resource_name}",
+        )
 
 
 def get_selector_for_ocs_operator():
@@ -220,9 +256,15 @@ def get_selector_for_ocs_operator():
         namespace=constants.MARKETPLACE_NAMESPACE,
         selector=constants.OPERATOR_INTERNAL_SELECTOR,
     )
+    # Only the internal catalog is remembered, it may be created later in
+    # the run by create_catalog_source()
+    cluster = catalog_source.get_kubeconfig_path()
+    if cluster in _internal_catalog_clusters:
+        return constants.OPERATOR_INTERNAL_SELECTOR
     try:
         cs_data = catalog_source.get()
         if cs_data["items"]:
+            _internal_catalog_clusters.add(cluster)
             return constants.OPERATOR_INTERNAL_SELECTOR
     except CommandFailed:
         logger.info("Internal catalog source not found!")
@@ -233,6 +275,7 @@ def get_selector_for_ocs_operator():
     )
     try:
         operator_source.get()
+        _internal_catalog_clusters.add(cluster)
         return constants.OPERATOR_INTERNAL_SELECTOR
     except CommandFailed:
         logger.info("Catalog source not found!")
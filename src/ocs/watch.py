@@ -0,0 +1,415 @@
+"""
+Watch based waits for the OCP resources.
+
+Instead of sampling the resources every few seconds, the resources are listed
+and watched and the condition is evaluated on every change, so a wait ends as
+soon as the condition is met. When watching is not available (e.g. the API
+doesn't support it for the kind), the waits fall back to polling.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+from src.framework import config
+from src.ocs.backends import get_backend
+from src.ocs.cache import get_store, match_selector, parse_selector
+from src.utility.deadline import clamp_timeout, get_deadline
+from src.utility.exceptions import (
+    CommandFailed,
+    DeadlineExceeded,
+    TimeoutExpiredError,
+)
+from src.utility.timeout import TimeoutSampler, get_poll_strategy
+
+log = logging.getLogger(__name__)
+
+
+def is_watch_enabled():
+    """
+    Returns:
+        bool: True if the waits should watch the resources, RUN['watch_waits']
+    """
+    return config.RUN.get("watch_waits", True)
+
+
+def _get_name(obj):
+    return obj.get("metadata", {}).get("name")
+
+
+def _poll_objects(ocp_obj, resource_name, selector):
+    """
+    Get the resources as a name -> resource dict
+    """
+    try:
+        data = ocp_obj.get(resource_name=resource_name, selector=selector, silent=True)
+    except CommandFailed:
+        return {}
+    if not data:
+        return {}
+    if isinstance(data, list):
+        items = data
+    elif data.get("kind") == "List":
+        items = data["items"]
+    else:
+        items = [data]
+    return {_get_name(item): item for item in items}
+
+
+def _timeout_error(timeout, description):
+    """
+    Returns:
+        TimeoutExpiredError: The error of the timed out wait, DeadlineExceeded
+            if it was cut short by the spent time budget
+    """
+    current = get_deadline()
+    if current is not None and current.expired():
+        return DeadlineExceeded(
+            timeout, f"Time budget {current} spent waiting for {description}"
+        )
+    return TimeoutExpiredError(timeout, f"Timed out waiting for {description}")
+
+
+def _wait_in_store(store, condition, deadline, resource_name="", selector=None):
+    """
+    Wait until the condition is met for the resources of the cache store
+    Returns:
+        bool: True once the condition is met, False if the store can't be used
+    """
+    terms = parse_selector(selector) if selector else None
+    if selector and terms is None:
+        return False
+    version = None
+    while True:
+        objects, version = store.snapshot(resource_name, terms)
+        if objects is None:
+            # Invalidated, wait for the new list
+            if not store.wait_synced(max(deadline - time.time(), 0)):
+                return False
+            continue
+        if condition(objects):
+            return True
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            raise TimeoutExpiredError
+        store.wait_for_change(version, remaining)
+
+
+def wait_for_condition(
+    ocp_obj,
+    condition,
+    timeout,
+    sleep=5,
+    resource_name="",
+    selector=None,
+    description="",
+):
+    """
+    Wait until the condition is met for the watched resources
+    Args:
+        ocp_obj (OCP): The OCP object of the resource kind
+        condition (function): Called with the resources as a name -> resource
+            dict on every change, returns True once the wait is done. It can
+            raise an exception to abort the wait.
+        timeout (int): Timeout in seconds
+        sleep (int): Sampling time in seconds of the polling fallback
+        resource_name (str): Name of the resource to watch
+        selector (str): The label selector to look for
+        description (str): Description of the wait for the log messages
+    Raises:
+        TimeoutExpiredError: In case the condition was not met in time
+        DeadlineExceeded: In case the time budget was spent
+    Returns:
+        bool: True once the condition is met
+    """
+    description = description or f"{ocp_obj.kind} {resource_name or selector}"
+    deadline = time.time() + clamp_timeout(timeout)
+    store = get_store(ocp_obj) if is_watch_enabled() else None
+    if store is not None and not store.failed:
+        try:
+            if _wait_in_store(store, condition, deadline, resource_name, selector):
+                log.info(f"Wait for {description} finished")
+                return True
+        except TimeoutExpiredError:
+            raise _timeout_error(timeout, description)
+    if is_watch_enabled() and time.time() < deadline:
+        objects = {}
+        try:
+            for event in get_backend().watch(
+                ocp_obj, resource_name, selector, timeout=deadline - time.time()
+            ):
+                if event is not None:
+                    event_type, obj = event
+                    if event_type == "DELETED":
+                        objects.pop(_get_name(obj), None)
+                    else:
+                        objects[_get_name(obj)] = obj
+                    if condition(objects):
+                        log.info(f"Wait for {description} finished")
+                        return True
+                if time.time() >= deadline:
+                    break
+        except CommandFailed as ex:
+            log.info(f"Unable to watch {description}, polling instead: {ex}")
+    remaining = deadline - time.time()
+    if remaining > 0:
+        # Sampled at least once, also when less than sleep seconds are left
+        for objects in TimeoutSampler(
+            remaining,
+            min(sleep, remaining),
+            _poll_objects,
+            ocp_obj,
+            resource_name,
+            selector,
+        ):
+            if condition(objects):
+                log.info(f"Wait for {description} finished")
+                return True
+    raise _timeout_error(timeout, description)
+
+
+class ResourceWatcher(object):
+    """
+    Watches the resources in a background thread and notifies about their
+    changes, it wakes up sampling loops as soon as something changed
+    Example::
+        with ResourceWatcher(ocp_obj, selector="app=foo") as watcher:
+            sampler = TimeoutSampler(300, 10, func)
+            sampler.wait = watcher.wait_for_change
+    """
+
+    def __init__(self, ocp_obj, resource_name="", selector=None):
+        """
+        Args:
+            ocp_obj (OCP): The OCP object of the resource kind
+            resource_name (str): Name of the resource to watch
+            selector (str): The label selector to look for
+        """
+        self.ocp_obj = ocp_obj
+        self.resource_name = resource_name
+        self.selector = selector
+        self.changed = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.store = None
+        self.store_version = None
+
+    def _watch(self):
+        try:
+            for event in get_backend().watch(
+                self.ocp_obj, self.resource_name, self.selector
+            ):
+                if self.stopped.is_set():
+                    return
+                if event is not None:
+                    self.changed.set()
+        except Exception as ex:
+            log.debug(f"Watch of {self.ocp_obj.kind} ended: {ex}")
+
+    def start(self):
+        if not is_watch_enabled():
+            return self
+        self.store = get_store(self.ocp_obj)
+        if self.store is not None:
+            # The cache store is already watching the kind
+            self.store_version = self.store.version
+        else:
+            self.thread = threading.Thread(target=self._watch, daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+
+    def wait_for_change(self, timeout):
+        """
+        Wait until the watched resources change
+        Args:
+            timeout (int): Maximum time to wait in seconds
+        Returns:
+            bool: True if something changed, False after the timeout
+        """
+        if self.store is not None and not self.store.failed:
+            version = self.store.wait_for_change(self.store_version, timeout)
+            changed = version != self.store_version
+            self.store_version = version
+            return changed
+        changed = self.changed.wait(timeout)
+        self.changed.clear()
+        return changed
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+@dataclass
+class WaitCondition:
+    """
+    Condition of wait_all()
+    Args:
+        kind (str): Kind of the resources
+        predicate (function): Called with the matching resources as a name ->
+            resource dict, returns True once the condition is met. It can
+            raise an exception to fail the condition.
+        resource_name (str): Name of the resource, all of the kind if not set
+        selector (str): The label selector to look for
+        namespace (str): Namespace of the resources
+        cluster_kubeconfig (str): Path to the kubeconfig of the cluster, the
+            current cluster context if not set
+        skip_tls_verify (bool): Skip the TLS verification of the server
+        description (str): Description of the condition for the log messages
+    """
+
+    kind: str
+    predicate: Callable
+    resource_name: str = ""
+    selector: str = None
+    namespace: str = None
+    cluster_kubeconfig: str = ""
+    skip_tls_verify: bool = False
+    description: str = ""
+
+    def __post_init__(self):
+        self.description = self.description or (
+            f"{self.kind} {self.resource_name or self.selector or ''}".strip()
+        )
+
+
+@dataclass
+class WaitResult:
+    """
+    Outcome of a wait_all() condition
+    """
+
+    condition: WaitCondition
+    done: bool = False
+    duration: float = None
+    error: Exception = None
+    resources: dict = field(default_factory=dict)
+
+
+def _get_list_key(condition):
+    """
+    Get the key of the list the condition is evaluated from, the conditions
+    with the same key share the list
+    """
+    selector = condition.selector
+    if selector and parse_selector(selector) is not None:
+        # Matched locally, so the whole kind is listed once
+        selector = None
+    return (
+        condition.cluster_kubeconfig,
+        condition.kind,
+        condition.namespace,
+        selector,
+        condition.skip_tls_verify,
+    )
+
+
+def _match(condition, objects):
+    """
+    Get the listed resources the condition is about
+    """
+    terms = parse_selector(condition.selector) if condition.selector else None
+    matched = {}
+    for name, obj in objects.items():
+        if condition.selector:
+            if terms is not None and not match_selector(obj, terms):
+                continue
+        elif condition.resource_name and name != condition.resource_name:
+            continue
+        matched[name] = obj
+    return matched
+
+
+def wait_all(conditions, timeout, sleep=5, raise_on_failure=True):
+    """
+    Wait for many conditions at once, possibly on different clusters. Every
+    tick lists each distinct kind once per cluster and namespace, in parallel
+    for the clusters, and evaluates all the pending conditions of the kind
+    from the list, so the wait takes about as long as the slowest condition.
+    Args:
+        conditions (list): WaitCondition objects
+        timeout (int): Timeout in seconds for all the conditions
+        sleep (int): Sampling interval in seconds, see get_poll_strategy()
+        raise_on_failure (bool): Raise if any condition was not met
+    Raises:
+        TimeoutExpiredError: In case a condition was not met in time
+        DeadlineExceeded: In case the time budget was spent
+        Exception: The first exception raised by a predicate
+    Returns:
+        list: WaitResult of every condition, in the order of the conditions
+    """
+    # Imported here, ocp module uses this module
+    from src.ocs.ocp import OCP
+
+    start_time = time.time()
+    budget = clamp_timeout(timeout)
+    results = [WaitResult(condition) for condition in conditions]
+    poll_strategy = get_poll_strategy(sleep)
+
+    def list_objects(key):
+        cluster_kubeconfig, kind, namespace, selector, skip_tls_verify = key
+        ocp_obj = OCP(
+            kind=kind,
+            namespace=namespace,
+            cluster_kubeconfig=cluster_kubeconfig,
+            skip_tls_verify=skip_tls_verify,
+        )
+        return _poll_objects(ocp_obj, "", selector)
+
+    logged_pending = None
+    with ThreadPoolExecutor(max_workers=config.RUN.get("max_workers", 4)) as pool:
+        while True:
+            pending = [result for result in results if result.duration is None]
+            keys = {_get_list_key(result.condition) for result in pending}
+            # Copy of the context per call, so that the spans of the commands
+            # are children of the current span
+            futures = {
+                key: pool.submit(contextvars.copy_context().run, list_objects, key)
+                for key in keys
+            }
+            listed = {key: future.result() for key, future in futures.items()}
+            for result in pending:
+                condition = result.condition
+                result.resources = _match(condition, listed[_get_list_key(condition)])
+                try:
+                    result.done = bool(condition.predicate(result.resources))
+                except Exception as ex:
+                    log.error(f"Wait for {condition.description} failed: {ex}")
+                    result.error = ex
+                if result.done or result.error:
+                    result.duration = time.time() - start_time
+                    if result.done:
+                        log.info(
+                            f"Wait for {condition.description} finished after "
+                            f"{result.duration:.1f}s"
+                        )
+            pending = [result for result in results if result.duration is None]
+            elapsed = time.time() - start_time
+            if not pending or elapsed >= budget:
+                break
+            # Logged again only once some of the conditions were met
+            log.log(
+                logging.INFO if len(pending) != logged_pending else logging.DEBUG,
+                f"Waiting for {len(pending)} of {len(results)} conditions: "
+                + ", ".join(result.condition.description for result in pending),
+            )
+            logged_pending = len(pending)
+            time.sleep(min(poll_strategy.next_sleep(elapsed), budget - elapsed))
+    for result in results:
+        if result.duration is None:
+            result.duration = time.time() - start_time
+            result.error = _timeout_error(timeout, result.condition.description)
+    if raise_on_failure:
+        for result in results:
+            if result.error:
+                raise result.error
+    return results
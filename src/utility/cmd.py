@@ -1,11 +1,149 @@
+import asyncio
+import itertools
+import os
 import shlex
 import subprocess
 import logging
+import threading
+import time
+import weakref
+from collections import deque
 
-from src.utility.exceptions import CommandFailed
+from src.framework import config
+from src.utility.deadline import clamp_timeout, get_deadline
+from src.utility.exceptions import CommandFailed, DeadlineExceeded
+from src.utility.tracing import span
 
 logger = logging.getLogger(__name__)
 
+# Sequence number of the streamed commands of this process
+_command_counter = itertools.count(1)
+
+# Seconds to wait for the output of a streamed command once it exited, the
+# processes it left behind (e.g. ssh control masters) can keep its pipes open
+STREAM_DRAIN_TIMEOUT = 10
+
+
+def get_command_log_path(cmd):
+    """
+    Get path of the file the full output of a streamed command is written to
+    Args:
+        cmd (list): The command
+    Returns:
+        str: Path to the output file
+    """
+    log_dir = os.path.join(
+        os.path.expanduser(config.RUN.get("command_log_dir", "logs")),
+        f"commands_{config.run_id}",
+    )
+    os.makedirs(log_dir, exist_ok=True)
+    name = os.path.basename(cmd[0])
+    if len(cmd) > 1 and not cmd[1].startswith("-"):
+        name = f"{name}-{cmd[1]}"
+    file_name = (
+        f"{time.strftime('%Y%m%d_%H%M%S')}-{os.getpid()}-"
+        f"{next(_command_counter)}-{name}.log"
+    )
+    return os.path.join(log_dir, file_name)
+
+
+def _stream_cmd(cmd, timeout, silent=False, **kwargs):
+    """
+    Run the command and forward its output line by line to the logger while
+    it runs. Only the last RUN['stream_tail_lines'] lines of each stream are
+    kept in memory, the full output is written to a per command file.
+    Args:
+        cmd (list): command to run
+        timeout (int): Timeout for the command
+        silent (bool): If True the stderr lines are logged in debug level
+    Raises:
+        subprocess.TimeoutExpired: In case the command does not finish in time
+    Returns:
+        (CompletedProcess) A CompletedProcess object of the command, its
+            stdout and stderr hold only the tail of the output
+    """
+    tail_lines = config.RUN.get("stream_tail_lines", 200)
+    output_path = get_command_log_path(cmd)
+    logger.info(f"Full output of the command is written to {output_path}")
+    tails = {"stdout": deque(maxlen=tail_lines), "stderr": deque(maxlen=tail_lines)}
+    output_lock = threading.Lock()
+    prefix = os.path.basename(cmd[0])
+
+    def forward(pipe, stream, output):
+        log_level = logging.DEBUG if silent and stream == "stderr" else logging.INFO
+        for raw_line in iter(pipe.readline, b""):
+            line = raw_line.decode(errors="replace").rstrip("\n")
+            tails[stream].append(line)
+            with output_lock:
+                output.write(f"{line}\n")
+                output.flush()
+            logger.log(log_level, f"[{prefix}] {line}")
+        pipe.close()
+
+    with open(output_path, "w") as output:
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            stdin=subprocess.DEVNULL,
+            **kwargs,
+        )
+        readers = [
+            threading.Thread(target=forward, args=(pipe, stream, output), daemon=True)
+            for pipe, stream in ((proc.stdout, "stdout"), (proc.stderr, "stderr"))
+        ]
+        for reader in readers:
+            reader.start()
+        try:
+            proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            raise
+        finally:
+            # The command is in the process group of the phase, so cancelling
+            # the phase kills it, its children holding the pipes are not
+            # waited for
+            for reader in readers:
+                reader.join(STREAM_DRAIN_TIMEOUT)
+                if reader.is_alive():
+                    logger.warning(
+                        f"Output of {prefix} still open {STREAM_DRAIN_TIMEOUT}s "
+                        "after it exited, its child processes keep it open"
+                    )
+                    break
+    return subprocess.CompletedProcess(
+        cmd,
+        proc.returncode,
+        stdout="\n".join(tails["stdout"]).encode(),
+        stderr="\n".join(tails["stderr"]).encode(),
+    )
+
+
+def _check_deadline(ex):
+    """
+    Raise DeadlineExceeded instead of the command timeout if the command was
+    stopped because the time budget of the bound deadline was spent
+    Args:
+        ex (subprocess.TimeoutExpired): The command timeout
+    """
+    current = get_deadline()
+    if current is not None and current.expired():
+        raise DeadlineExceeded(
+            current.timeout, f"Time budget {current} spent running {ex.cmd}"
+        ) from ex
+
+
+def _set_bound_kubeconfig(kwargs):
+    """
+    KUBECONFIG env variable belongs to the process wide context, point the
+    command to the cluster bound to this thread / task instead
+    Args:
+        kwargs (dict): Keyword arguments for the subprocess
+    """
+    if config.is_ctx_bound() and "env" not in kwargs:
+        kwargs["env"] = dict(os.environ, KUBECONFIG=config.get_kubeconfig_path())
+
 
 def exec_cmd(
     cmd,
@@ -13,12 +151,14 @@ def exec_cmd(
     ignore_error=False,
     threading_lock=None,
     silent=False,
+    stream=False,
     **kwargs,
 ):
     """
     Run an arbitrary command locally
     If the command is grep and matching pattern is not found, then this function
     returns "command terminated with exit code 1" in stderr.
+    The timeout is limited by the time budget of the bound deadline.
     Args:
         cmd (str): command to run
         timeout (int): Timeout for the command, defaults to 600 seconds.
@@ -27,8 +167,14 @@ def exec_cmd(
         threading_lock (threading.Lock): threading.Lock object that is used
             for handling concurrent oc commands
         silent (bool): If True will silent errors from the server, default false
+        stream (bool): If True the output is forwarded to the logger line by
+            line while the command runs and written to a per command file,
+            only its tail is kept in the returned stdout and stderr
+        input (bytes): Data sent to the stdin of the command, e.g. the
+            manifests for 'oc apply -f -'
     Raises:
         CommandFailed: In case the command execution fails
+        DeadlineExceeded: In case the time budget is spent
     Returns:
         (CompletedProcess) A CompletedProcess object of the command that was executed
         CompletedProcess attributes:
@@ -41,29 +187,66 @@ def exec_cmd(
     logger.info(f"Executing command: {cmd}")
     if isinstance(cmd, str):
         cmd = shlex.split(cmd)
+    timeout = clamp_timeout(timeout)
+    _set_bound_kubeconfig(kwargs)
     if threading_lock and cmd[0] == "oc":
         threading_lock.acquire()
-    completed_process = subprocess.run(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        stdin=subprocess.PIPE,
-        timeout=timeout,
-        **kwargs,
-    )
+    with span("exec_cmd", command=" ".join(cmd)[:1000]) as cmd_span:
+        try:
+            if stream:
+                completed_process = _stream_cmd(cmd, timeout, silent, **kwargs)
+            else:
+                if "input" not in kwargs:
+                    # Nothing to read, subprocess.run() creates the stdin pipe
+                    # only for the input
+                    kwargs.setdefault("stdin", subprocess.DEVNULL)
+                completed_process = subprocess.run(
+                    cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    timeout=timeout,
+                    **kwargs,
+                )
+        except subprocess.TimeoutExpired as ex:
+            _check_deadline(ex)
+            raise
+        cmd_span.set(exit_code=completed_process.returncode)
     if threading_lock and cmd[0] == "oc":
         threading_lock.release()
+    return _check_completed_process(
+        cmd, completed_process, ignore_error, silent, logged=stream
+    )
+
+
+def _check_completed_process(
+    cmd, completed_process, ignore_error=False, silent=False, logged=False
+):
+    """
+    Log the output of the finished command and check its return code
+    Args:
+        cmd (list): The executed command
+        completed_process (CompletedProcess): The finished command
+        ignore_error (bool): True if ignore non zero return code and do not
+            raise the exception.
+        silent (bool): If True will silent errors from the server
+        logged (bool): True if the output was already forwarded to the log
+    Raises:
+        CommandFailed: In case the command execution failed
+    Returns:
+        CompletedProcess: The finished command
+    """
     stdout = completed_process.stdout.decode()
     stdout_err = completed_process.stderr.decode()
-    if len(completed_process.stdout) > 0:
-        logger.debug(f"Command stdout: {stdout}")
-    else:
-        logger.debug("Command stdout is empty")
-    if len(completed_process.stderr) > 0:
-        if not silent:
-            logger.warning(f"Command stderr: {stdout_err}")
-    else:
-        logger.debug("Command stderr is empty")
+    if not logged:
+        if len(completed_process.stdout) > 0:
+            logger.debug(f"Command stdout: {stdout}")
+        else:
+            logger.debug("Command stdout is empty")
+        if len(completed_process.stderr) > 0:
+            if not silent:
+                logger.warning(f"Command stderr: {stdout_err}")
+        else:
+            logger.debug("Command stderr is empty")
     logger.debug(f"Command return code: {completed_process.returncode}")
     if completed_process.returncode and not ignore_error:
         if (
@@ -76,3 +259,91 @@ def exec_cmd(
                 f"Error during execution of command: {cmd}." f"\nError is {stdout_err}"
             )
     return completed_process
+
+
+# Event loop -> cluster -> asyncio.Semaphore limiting the commands running
+# against a single cluster at the same time
+_cluster_semaphores = weakref.WeakKeyDictionary()
+
+
+def get_cluster_semaphore(cluster):
+    """
+    Get semaphore limiting the number of commands running at the same time
+    against the cluster to RUN['max_concurrent_commands_per_cluster']
+    Args:
+        cluster (str): Cluster identifier, e.g. path to its kubeconfig
+    Returns:
+        asyncio.Semaphore: Semaphore of the cluster in the running event loop
+    """
+    semaphores = _cluster_semaphores.setdefault(asyncio.get_running_loop(), {})
+    if cluster not in semaphores:
+        semaphores[cluster] = asyncio.Semaphore(
+            config.RUN.get("max_concurrent_commands_per_cluster", 8)
+        )
+    return semaphores[cluster]
+
+
+async def async_exec_cmd(
+    cmd,
+    timeout=600,
+    ignore_error=False,
+    silent=False,
+    cluster=None,
+    **kwargs,
+):
+    """
+    Run an arbitrary command locally without blocking the event loop, the
+    asyncio counterpart of exec_cmd
+    Args:
+        cmd (str): command to run
+        timeout (int): Timeout for the command, defaults to 600 seconds.
+        ignore_error (bool): True if ignore non zero return code and do not
+            raise the exception.
+        silent (bool): If True will silent errors from the server, default false
+        cluster (str): Cluster the command runs against, used for the per
+            cluster concurrency limit, defaults to the kubeconfig of the
+            current cluster context
+    Raises:
+        CommandFailed: In case the command execution fails
+        DeadlineExceeded: In case the time budget is spent
+        subprocess.TimeoutExpired: In case the command does not finish in time
+    Returns:
+        (CompletedProcess) A CompletedProcess object of the command that was executed
+    """
+    logger.info(f"Executing command: {cmd}")
+    if isinstance(cmd, str):
+        cmd = shlex.split(cmd)
+    timeout = clamp_timeout(timeout)
+    _set_bound_kubeconfig(kwargs)
+    cluster = cluster or kwargs.get("env", {}).get("KUBECONFIG")
+    if not cluster:
+        try:
+            cluster = config.get_kubeconfig_path()
+        except Exception:
+            cluster = "default"
+    async with get_cluster_semaphore(cluster):
+        with span("exec_cmd", command=" ".join(cmd)[:1000]) as cmd_span:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                stdin=asyncio.subprocess.DEVNULL,
+                **kwargs,
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                ex = subprocess.TimeoutExpired(cmd, timeout)
+                _check_deadline(ex)
+                raise ex
+            except asyncio.CancelledError:
+                proc.kill()
+                await proc.wait()
+                raise
+            cmd_span.set(exit_code=proc.returncode)
+    completed_process = subprocess.CompletedProcess(
+        cmd, proc.returncode, stdout=stdout, stderr=stderr
+    )
+    return _check_completed_process(cmd, completed_process, ignore_error, silent)
@@ -94,6 +94,10 @@ ACM_HUB_UNRELEASED_ICSP_YAML = os.path.join(
 ACM_MANAGEDCLUSTER = "managedclusters.cluster.open-cluster-management.io"
 ACM_LOCAL_CLUSTER = "local-cluster"
 ACM_CLUSTERSET_LABEL = "cluster.open-cluster-management.io/clusterset"
+ACM_MANAGEDCLUSTER_AVAILABLE = "ManagedClusterConditionAvailable"
+
+# Run journal file, relative from cluster_dir
+JOURNAL_FILE_NAME = "ocp4mcoci-journal.json"
 
 # Statuses
 STATUS_RUNNING = "Running"
@@ -130,6 +134,7 @@ STORAGE_CLUSTER_NAME = "ocs-storagecluster"
 
 # Resources / Kinds
 MACHINECONFIGPOOL = "MachineConfigPool"
+IMAGECONTENTSOURCEPOLICY = "ImageContentSourcePolicy"
 
 # Provisioners
 SUBSCRIPTION_WITH_ACM = "Subscription.operators.coreos.com"
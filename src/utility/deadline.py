@@ -0,0 +1,123 @@
+"""
+Time budgets of the deployment work.
+
+A Deadline is the point in time by which a piece of work (e.g. a deployment
+phase) has to be finished. It is bound to the current context by the
+deadline() context manager, a nested deadline can only shorten the bound one.
+retry, TimeoutSampler, the waits and exec_cmd clamp their sleeps and timeouts
+to the remaining budget and raise DeadlineExceeded once it is spent, so the
+worst case duration of the work is bounded no matter how the timeouts and
+retries of the calls inside multiply.
+"""
+
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+
+from src.utility.exceptions import DeadlineExceeded
+
+log = logging.getLogger(__name__)
+
+_current_deadline = contextvars.ContextVar("current_deadline", default=None)
+
+
+class Deadline(object):
+    """
+    Point in time the work has to be finished by
+    Args:
+        timeout (float): Budget in seconds from now
+        name (str): Name of the budgeted work for the error messages
+    """
+
+    def __init__(self, timeout, name=""):
+        self.timeout = timeout
+        self.name = name
+        self.expires = time.monotonic() + timeout
+
+    def remaining(self):
+        """
+        Returns:
+            float: Seconds left of the budget, 0 once it is spent
+        """
+        return max(self.expires - time.monotonic(), 0)
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def check(self):
+        """
+        Raises:
+            DeadlineExceeded: In case the budget is spent
+        """
+        if self.expired():
+            raise DeadlineExceeded(
+                self.timeout, f"Deadline of {self.timeout}s of {self.name} exceeded"
+            )
+
+    def clamp(self, timeout):
+        """
+        Limit the timeout by the remaining budget
+        Args:
+            timeout (float): The timeout in seconds, None for no timeout
+        Returns:
+            float: The smaller of the timeout and the remaining budget
+        """
+        if timeout is None:
+            return self.remaining()
+        return min(timeout, self.remaining())
+
+    def __repr__(self):
+        return f"Deadline({self.name!r}, remaining={self.remaining():.0f}s)"
+
+
+def get_deadline():
+    """
+    Returns:
+        Deadline: The deadline bound to the current context, None if the work
+            has no budget
+    """
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline(timeout, name=""):
+    """
+    Bind a deadline to the work done in the with block
+    Args:
+        timeout (float): Budget in seconds, no budget if None
+        name (str): Name of the budgeted work
+    Yields:
+        Deadline: The effective deadline, the bound one if it expires sooner
+    """
+    current = _current_deadline.get()
+    if timeout is None:
+        yield current
+        return
+    new = Deadline(timeout, name)
+    if current is not None and current.expires <= new.expires:
+        new = current
+    else:
+        log.info(f"Time budget of {name or 'the work'} is {timeout} seconds")
+    token = _current_deadline.set(new)
+    try:
+        yield new
+    finally:
+        _current_deadline.reset(token)
+
+
+def clamp_timeout(timeout):
+    """
+    Limit the timeout by the remaining budget of the bound deadline
+    Args:
+        timeout (float): The timeout in seconds, None for no timeout
+    Raises:
+        DeadlineExceeded: In case the budget is already spent
+    Returns:
+        float: The timeout to use
+    """
+    current = _current_deadline.get()
+    if current is None:
+        return timeout
+    current.check()
+    return current.clamp(timeout)
@@ -38,6 +38,10 @@ class TimeoutExpiredError(Exception):
     pass
 
 
+class DeadlineExceeded(TimeoutExpiredError):
+    pass
+
+
 class CommandFailed(Exception):
     pass
 
@@ -72,3 +76,7 @@ class NotSupportedFunctionError(Exception):
 
 class UnexpectedDeploymentConfiguration(Exception):
     pass
+
+
+class OperatorInstallFailed(Exception):
+    pass
@@ -0,0 +1,293 @@
+"""
+Bounded pool of worker processes.
+
+Every task runs in its own forked process (so that switching the cluster
+context in a task is safe), at most `max_workers` of them at the same time.
+The outcome of each task is sent back to the parent over a pipe and returned
+as a TaskResult, tasks exceeding their timeout are terminated together with
+the commands they started.
+"""
+
+import logging
+import multiprocessing as mp
+import os
+import signal
+import sys
+import time
+import traceback
+from collections import OrderedDict
+from dataclasses import dataclass
+from multiprocessing.connection import wait
+
+from src import framework
+from src.utility.tracing import span
+
+log = logging.getLogger(__name__)
+
+# Seconds to wait for a terminated task to exit before killing it
+TERMINATE_GRACE_PERIOD = 10
+
+
+@dataclass
+class TaskResult:
+    """
+    Outcome of a task
+    Args:
+        name (str): Name of the task
+        success (bool): True if the task function returned without exception
+        duration (float): Run time of the task in seconds
+        error (str): Formatted exception of a failed task
+        exitcode (int): Exit code of the task process
+        value (object): Return value of the task function
+        timed_out (bool): True if the task was terminated after its timeout
+        cancelled (bool): True if the task was cancelled
+    """
+
+    name: str
+    success: bool = False
+    duration: float = 0
+    error: str = None
+    exitcode: int = None
+    value: object = None
+    timed_out: bool = False
+    cancelled: bool = False
+
+
+@dataclass
+class _Task:
+    name: str
+    func: object
+    args: tuple
+    kwargs: dict
+    timeout: float = None
+    proc: object = None
+    conn: object = None
+    start_time: float = None
+    message: dict = None
+
+
+def _run_task(task, conn):
+    """
+    Entry point of the forked process which runs a single task
+    """
+    # Own process group, so that the commands started by the task are
+    # terminated together with it
+    os.setpgid(0, 0)
+    message = {"success": False}
+    try:
+        with span(f"task {task.name}"):
+            message["value"] = task.func(*task.args, **task.kwargs)
+        message["success"] = True
+    except BaseException as ex:
+        log.error(f"Task {task.name} failed", exc_info=True)
+        message["error"] = "".join(
+            traceback.format_exception(type(ex), ex, ex.__traceback__)
+        )
+    try:
+        conn.send(message)
+    except Exception:
+        # The return value is not picklable
+        message.pop("value", None)
+        conn.send(message)
+    conn.close()
+    # Exit through multiprocessing, which runs the exit finalizers
+    sys.exit(0 if message["success"] else 1)
+
+
+class ProcessExecutor(object):
+    """
+    Runs the submitted tasks in a bounded number of worker processes
+    """
+
+    def __init__(self, max_workers=None, timeout=None):
+        """
+        Args:
+            max_workers (int): Maximum number of tasks running at the same time,
+                defaults to RUN['max_workers']
+            timeout (int): Default timeout of a task in seconds, defaults to
+                RUN['task_timeout'], None means no timeout
+        """
+        self.max_workers = max_workers or framework.config.RUN.get("max_workers", 4)
+        self.timeout = timeout or framework.config.RUN.get("task_timeout")
+        self.ctx = mp.get_context("fork")
+        self.pending = OrderedDict()
+        self.running = {}
+        self.results = {}
+
+    def submit(self, name, func, *args, timeout=None, **kwargs):
+        """
+        Queue a task, it is started as soon as a worker is free
+        Args:
+            name (str): Unique name of the task
+            func (function): The function to run
+            args: Arguments for the function
+            timeout (int): Timeout of the task in seconds
+            kwargs: Keyword arguments for the function
+        Returns:
+            str: Name of the task
+        """
+        if name in self.pending or name in self.running or name in self.results:
+            raise ValueError(f"Task {name} is already submitted")
+        self.pending[name] = _Task(
+            name=name,
+            func=func,
+            args=args,
+            kwargs=kwargs,
+            timeout=timeout or self.timeout,
+        )
+        self._start_pending()
+        return name
+
+    @property
+    def idle_workers(self):
+        return self.max_workers - len(self.running)
+
+    def _start_pending(self):
+        while self.pending and len(self.running) < self.max_workers:
+            _, task = self.pending.popitem(last=False)
+            log.debug(f"Starting task {task.name}")
+            reader, writer = self.ctx.Pipe(duplex=False)
+            task.proc = self.ctx.Process(
+                target=_run_task, args=(task, writer), name=task.name
+            )
+            task.start_time = time.time()
+            task.proc.start()
+            writer.close()
+            task.conn = reader
+            self.running[task.name] = task
+
+    def _finish(self, task, error=None, **kwargs):
+        task.proc.join()
+        if task.message is None and task.conn.poll():
+            try:
+                task.message = task.conn.recv()
+            except EOFError:
+                pass
+        task.conn.close()
+        message = task.message or {}
+        result = TaskResult(
+            name=task.name,
+            success=message.get("success", False) and task.proc.exitcode == 0,
+            duration=time.time() - task.start_time,
+            error=error or message.get("error"),
+            exitcode=task.proc.exitcode,
+            value=message.get("value"),
+            **kwargs,
+        )
+        if not result.success and not result.error:
+            result.error = f"Task process exited with code {task.proc.exitcode}"
+        del self.running[task.name]
+        self.results[task.name] = result
+        return result
+
+    def _terminate(self, task):
+        try:
+            os.killpg(task.proc.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        task.proc.join(TERMINATE_GRACE_PERIOD)
+        if task.proc.is_alive():
+            try:
+                os.killpg(task.proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def cancel(self, name):
+        """
+        Cancel a task, a running one is terminated
+        Args:
+            name (str): Name of the task
+        Returns:
+            TaskResult: Result of the cancelled task, None if it already finished
+        """
+        if name in self.pending:
+            self.pending.pop(name)
+            result = TaskResult(name=name, error="Task cancelled", cancelled=True)
+            self.results[name] = result
+            return result
+        if name in self.running:
+            log.warning(f"Cancelling task {name}")
+            task = self.running[name]
+            self._terminate(task)
+            result = self._finish(task, cancelled=True)
+            self._start_pending()
+            return result
+
+    def wait(self, timeout=None):
+        """
+        Wait until at least one running task finishes
+        Args:
+            timeout (int): Maximum time to wait in seconds
+        Returns:
+            list: TaskResult of the finished tasks, empty if nothing finished
+                in the given time
+        """
+        finished = []
+        end_time = time.time() + timeout if timeout is not None else None
+        try:
+            while self.running and not finished:
+                now = time.time()
+                deadlines = [
+                    task.start_time + task.timeout
+                    for task in self.running.values()
+                    if task.timeout
+                ]
+                if end_time is not None:
+                    deadlines.append(end_time)
+                wait_time = max(min(deadlines) - now, 0) if deadlines else None
+                objects = {}
+                for task in self.running.values():
+                    objects[task.proc.sentinel] = task
+                    if task.message is None:
+                        objects[task.conn] = task
+                for obj in wait(list(objects), wait_time):
+                    task = objects[obj]
+                    if obj is task.conn:
+                        try:
+                            task.message = task.conn.recv()
+                        except EOFError:
+                            task.message = {}
+                for task in list(self.running.values()):
+                    if not task.proc.is_alive():
+                        finished.append(self._finish(task))
+                    elif task.timeout and time.time() > task.start_time + task.timeout:
+                        log.error(
+                            f"Task {task.name} timed out after {task.timeout} seconds"
+                        )
+                        self._terminate(task)
+                        finished.append(
+                            self._finish(
+                                task,
+                                timed_out=True,
+                                error=f"Timed out after {task.timeout} seconds",
+                            )
+                        )
+                if end_time is not None and time.time() >= end_time:
+                    break
+        except KeyboardInterrupt:
+            self.shutdown()
+            raise
+        for result in finished:
+            log.debug(
+                f"Task {result.name} finished in {int(result.duration)} seconds, "
+                f"success: {result.success}"
+            )
+        self._start_pending()
+        return finished
+
+    def wait_all(self):
+        """
+        Wait for all the submitted tasks
+        Returns:
+            dict: task name -> TaskResult
+        """
+        while self.running or self.pending:
+            self.wait()
+        return dict(self.results)
+
+    def shutdown(self):
+        """
+        Cancel all pending and running tasks
+        """
+        for name in list(self.pending) + list(self.running):
+            self.cancel(name)
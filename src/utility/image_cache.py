@@ -0,0 +1,159 @@
+"""
+Content addressed cache of the files extracted from the container images.
+
+An image reference is resolved to its digest once per run, every cluster of
+the run then uses the same content even if the tag moves meanwhile. The files
+extracted from the image are kept in <image_cache_dir>/<digest>/<path hash>/,
+so a repeated extraction of the same image, in this run or a later one, is a
+local copy. The processes of the run share a single extraction through file
+locks.
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+from contextlib import contextmanager
+
+from src.framework import config
+from src.utility import constants
+from src.utility.cmd import exec_cmd
+from src.utility.exceptions import CommandFailed
+from src.utility.serialization import json_dumps, json_loads
+
+log = logging.getLogger(__name__)
+
+# Marker of a finished extraction in the cache entry
+COMPLETE_MARKER = ".complete"
+
+
+def get_cache_dir():
+    """
+    Returns:
+        str: Directory of the image cache, RUN['image_cache_dir']
+    """
+    cache_dir = os.path.expanduser(
+        config.RUN.get("image_cache_dir") or "~/.cache/ocp4mco/images"
+    )
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Exclusive lock shared by the processes, held in the with block
+    Args:
+        path (str): Path of the lock file
+    """
+    with open(path, "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _get_registry_options(insecure=False):
+    pull_secret_path = os.path.join(constants.TOP_DIR, "data", "pull-secret")
+    options = f"--filter-by-os linux/amd64 --registry-config {pull_secret_path}"
+    if insecure:
+        options += " --insecure"
+    return options
+
+
+def resolve_image_digest(image, insecure=False):
+    """
+    Resolve the image to its digest, the first resolution in the run is used
+    for all the clusters
+    Args:
+        image (str): The image reference
+        insecure (bool): Allow HTTP registries
+    Returns:
+        str: The digest (sha256:...), None if it can't be resolved
+    """
+    if "@" in image:
+        return image.split("@", 1)[1]
+    digests_path = os.path.join(get_cache_dir(), f"digests_{config.run_id}.json")
+    with file_lock(f"{digests_path}.lock"):
+        digests = {}
+        if os.path.exists(digests_path):
+            with open(digests_path) as f:
+                digests = json_loads(f.read())
+        if image not in digests:
+            try:
+                info = exec_cmd(
+                    f"oc image info {_get_registry_options(insecure)} -o json {image}"
+                )
+                digests[image] = json_loads(info.stdout)["digest"]
+            except (CommandFailed, ValueError, KeyError) as ex:
+                log.warning(f"Unable to resolve digest of {image}: {ex}")
+                return None
+            log.info(f"Image {image} resolved to {digests[image]}")
+            with open(digests_path, "w") as f:
+                f.write(json_dumps(digests, indent=2))
+        return digests[image]
+
+
+def pin_image(image, digest):
+    """
+    Get the reference of the image by its digest
+    Args:
+        image (str): The image reference, e.g. quay.io/org/repo:tag
+        digest (str): The digest of the image
+    Returns:
+        str: The pinned reference, e.g. quay.io/org/repo@sha256:...
+    """
+    repository = image.split("@", 1)[0]
+    name = repository.rsplit("/", 1)[-1]
+    if ":" in name:
+        repository = repository.rsplit(":", 1)[0]
+    return f"{repository}@{digest}"
+
+
+def extract_image_path(image, path, dest_dir, insecure=False):
+    """
+    Extract the path of the image to the directory through the cache
+    Args:
+        image (str): The image reference
+        path (str): Path in the image, a file or a directory ending with /
+        dest_dir (str): Directory to extract the path to
+        insecure (bool): Allow HTTP registries
+    Raises:
+        CommandFailed: In case the extraction failed
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    digest = resolve_image_digest(image, insecure)
+    if digest is None:
+        exec_cmd(
+            f"oc image extract {_get_registry_options(insecure)} {image} "
+            f"--confirm --path {path}:{dest_dir}"
+        )
+        return
+    entry = os.path.join(
+        get_cache_dir(),
+        digest.replace(":", "-"),
+        hashlib.sha256(path.encode()).hexdigest()[:16],
+    )
+    os.makedirs(os.path.dirname(entry), exist_ok=True)
+    with file_lock(f"{entry}.lock"):
+        if os.path.exists(os.path.join(entry, COMPLETE_MARKER)):
+            log.info(f"Using cached {path} of {image} ({digest})")
+        else:
+            partial = f"{entry}.partial"
+            shutil.rmtree(partial, ignore_errors=True)
+            os.makedirs(partial)
+            exec_cmd(
+                f"oc image extract {_get_registry_options(insecure)} "
+                f"{pin_image(image, digest)} --confirm --path {path}:{partial}"
+            )
+            open(os.path.join(partial, COMPLETE_MARKER), "w").close()
+            shutil.rmtree(entry, ignore_errors=True)
+            os.rename(partial, entry)
+    shutil.copytree(
+        entry,
+        dest_dir,
+        dirs_exist_ok=True,
+        ignore=shutil.ignore_patterns(COMPLETE_MARKER),
+    )
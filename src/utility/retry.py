@@ -1,7 +1,12 @@
+import asyncio
+import inspect
 import logging
 import time
 from functools import wraps
 
+from src.utility.deadline import get_deadline
+from src.utility.exceptions import DeadlineExceeded
+
 logger = logging.getLogger(__name__)
 
 
@@ -14,9 +19,45 @@ def retry(exception_to_check, tries=4, delay=3, backoff=2, text_in_exception=Non
         delay: initial delay between retries in seconds
         backoff: backoff multiplier e.g. value of 2 will double the delay each retry
         text_in_exception: Retry only when text_in_exception is in the text of exception
+    The retries stop once the time budget of the bound deadline (see
+    src.utility.deadline) would be spent by the delay.
     """
 
+    def should_retry(e, mdelay):
+        if isinstance(e, DeadlineExceeded):
+            return False
+        current = get_deadline()
+        if current is not None and current.remaining() <= mdelay:
+            logger.warning(f"{e}, not retrying, the time budget {current} is spent")
+            return False
+        if text_in_exception:
+            if text_in_exception in str(e):
+                logger.debug(f"Text: {text_in_exception} found in exception: {e}")
+            else:
+                logger.debug(f"Text: {text_in_exception} not found in exception: {e}")
+                return False
+        logger.warning("%s, Retrying in %d seconds..." % (str(e), mdelay))
+        return True
+
     def deco_retry(f):
+        if inspect.iscoroutinefunction(f):
+
+            @wraps(f)
+            async def async_f_retry(*args, **kwargs):
+                mtries, mdelay = tries, delay
+                while mtries > 1:
+                    try:
+                        return await f(*args, **kwargs)
+                    except exception_to_check as e:
+                        if not should_retry(e, mdelay):
+                            raise
+                        await asyncio.sleep(mdelay)
+                        mtries -= 1
+                        mdelay *= backoff
+                return await f(*args, **kwargs)
+
+            return async_f_retry
+
         @wraps(f)
         def f_retry(*args, **kwargs):
             mtries, mdelay = tries, delay
@@ -24,17 +65,8 @@ def retry(exception_to_check, tries=4, delay=3, backoff=2, text_in_exception=Non
                 try:
                     return f(*args, **kwargs)
                 except exception_to_check as e:
-                    if text_in_exception:
-                        if text_in_exception in str(e):
-                            logger.debug(
-                                f"Text: {text_in_exception} found in exception: {e}"
-                            )
-                        else:
-                            logger.debug(
-                                f"Text: {text_in_exception} not found in exception: {e}"
-                            )
-                            raise
-                    logger.warning("%s, Retrying in %d seconds..." % (str(e), mdelay))
+                    if not should_retry(e, mdelay):
+                        raise
                     time.sleep(mdelay)
                     mtries -= 1
                     mdelay *= backoff
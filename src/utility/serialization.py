@@ -0,0 +1,151 @@
+"""
+Serialization of the data exchanged with 'oc' and kept in the YAML files.
+
+The resources are requested from 'oc' as JSON, which is parsed by orjson when
+it is installed and by the json module otherwise. The YAML which remains
+(config files, templates, manifests) is loaded and dumped by the libyaml based
+CSafeLoader / CSafeDumper when PyYAML is built with libyaml, the pure Python
+safe loader and dumper are used otherwise.
+"""
+
+import json
+import logging
+
+import yaml
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+log = logging.getLogger(__name__)
+
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+SafeDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+def json_loads(data):
+    """
+    Parse the JSON document
+    Args:
+        data (str or bytes): The JSON document
+    Raises:
+        ValueError: In case the document is not a valid JSON
+    Returns:
+        The parsed data
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # e.g. integers orjson can't represent, json handles them
+            pass
+    return json.loads(data)
+
+
+def json_loads_all(data):
+    """
+    Parse the stream of concatenated JSON documents, e.g. a file based
+    catalog
+    Args:
+        data (str): The JSON documents
+    Raises:
+        ValueError: In case a document is not a valid JSON
+    Returns:
+        generator: The parsed documents
+    """
+    decoder = json.JSONDecoder()
+    position = 0
+    while True:
+        while position < len(data) and data[position].isspace():
+            position += 1
+        if position == len(data):
+            return
+        document, position = decoder.raw_decode(data, position)
+        yield document
+
+
+def json_dumps(data, indent=None):
+    """
+    Serialize the data to a JSON document
+    Args:
+        data: The data to serialize
+        indent (int): Indentation of the document, compact if not set
+    Returns:
+        str: The JSON document
+    """
+    if orjson is not None and indent in (None, 2):
+        try:
+            option = orjson.OPT_INDENT_2 if indent else None
+            return orjson.dumps(data, option=option).decode()
+        except TypeError:
+            pass
+    return json.dumps(data, indent=indent)
+
+
+def yaml_load(stream):
+    """
+    Load the YAML document
+    Args:
+        stream (str, bytes or file): The YAML document
+    Returns:
+        The loaded data
+    """
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def yaml_load_all(stream):
+    """
+    Load all the documents of the YAML stream
+    Args:
+        stream (str, bytes or file): The YAML documents
+    Returns:
+        generator: The loaded documents
+    """
+    return yaml.load_all(stream, Loader=SafeLoader)
+
+
+def yaml_dump(data, stream=None, **kwargs):
+    """
+    Dump the data to a YAML document
+    Args:
+        data: The data to dump
+        stream (file): File to write the document to, returned as str if not
+            set
+        kwargs: Other arguments passed to yaml.dump (e.g. indent)
+    Returns:
+        str: The YAML document, None if it was written to the stream
+    """
+    return yaml.dump(data, stream, Dumper=SafeDumper, **kwargs)
+
+
+def yaml_dump_all(documents, stream=None, **kwargs):
+    """
+    Dump the documents to a YAML stream
+    Args:
+        documents (list): The data of the documents
+        stream (file): File to write the documents to, returned as str if not
+            set
+        kwargs: Other arguments passed to yaml.dump_all
+    Returns:
+        str: The YAML documents, None if they were written to the stream
+    """
+    return yaml.dump_all(documents, stream, Dumper=SafeDumper, **kwargs)
+
+
+def load_output(output):
+    """
+    Parse the output of an 'oc' command, JSON if the command was run with
+    '-o json', YAML otherwise (e.g. the plain text messages)
+    Args:
+        output (str or bytes): The command output
+    Returns:
+        The parsed output
+    """
+    stripped = output.lstrip()
+    if stripped[:1] in ("{", "[", b"{", b"["):
+        try:
+            return json_loads(stripped)
+        except ValueError:
+            log.debug("Output of the command is not JSON, loading it as YAML")
+    return yaml_load(output)
@@ -1,10 +1,14 @@
-import yaml
 import logging
-import yaml
 
 from jinja2 import Environment, FileSystemLoader
 
 from src.utility.constants import TEMPLATE_DIR
+from src.utility.serialization import (
+    yaml_dump,
+    yaml_dump_all,
+    yaml_load,
+    yaml_load_all,
+)
 from src.utility.utils import get_url_content
 
 logger = logging.getLogger(__name__)
@@ -23,9 +27,8 @@ def to_nice_yaml(a, indent=2, *args, **kw):
     Returns:
         str: transformed yaml data in string format
     """
-    transformed = yaml.dump(
+    transformed = yaml_dump(
         a,
-        Dumper=yaml.Dumper,
         indent=indent,
         allow_unicode=True,
         default_flow_style=False,
@@ -46,7 +49,7 @@ def load_yaml(file, multi_document=False):
         generator: If multi_document == True, returns generator which each
             iteration returns dict from one loaded document from a file.
     """
-    loader = yaml.safe_load_all if multi_document else yaml.safe_load
+    loader = yaml_load_all if multi_document else yaml_load
     if file.startswith("http"):
         return loader(get_url_content(file))
     else:
@@ -64,7 +67,7 @@ def dump_data_to_temp_yaml(data, temp_yaml):
     Returns:
         str: dumped yaml data
     """
-    dumper = yaml.dump if isinstance(data, dict) else yaml.dump_all
+    dumper = yaml_dump if isinstance(data, dict) else yaml_dump_all
     yaml_data = dumper(data)
     with open(temp_yaml, "w") as yaml_file:
         yaml_file.write(yaml_data)
@@ -1,10 +1,110 @@
 import logging
+import random
 import time
 
-from src.utility.exceptions import TimeoutExpiredError
+from src.framework import config
+from src.utility.deadline import get_deadline
+from src.utility.exceptions import DeadlineExceeded, TimeoutExpiredError
+from src.utility.tracing import start_span
 
 log = logging.getLogger(__name__)
 
+# Minimum number of seconds between the per iteration INFO messages of a
+# sampler, the other ones are logged in DEBUG level
+LOG_INTERVAL = 60
+
+
+class PollStrategy(object):
+    """
+    Decides how long TimeoutSampler sleeps between the samples
+    """
+
+    def next_sleep(self, elapsed):
+        """
+        Args:
+            elapsed (float): Seconds since the first sample
+        Returns:
+            float: Seconds to sleep before the next sample
+        """
+        raise NotImplementedError
+
+
+class FixedPoll(PollStrategy):
+    """
+    Sleep the same interval between all the samples
+    Args:
+        sleep (float): Sleep interval in seconds
+    """
+
+    def __init__(self, sleep):
+        self.sleep = sleep
+
+    def next_sleep(self, elapsed):
+        return self.sleep
+
+    def __repr__(self):
+        return f"FixedPoll({self.sleep})"
+
+
+class BackoffPoll(PollStrategy):
+    """
+    Sample fast at the start and back off exponentially with jitter, so that
+    quick conditions are noticed quickly and long waits are not over-polled.
+    With the expected duration hint the samples are sparse (every maximum
+    seconds) until the expected time, then the fast start begins again.
+    Args:
+        maximum (float): The longest sleep in seconds
+        initial (float): The first sleep in seconds
+        factor (float): Growth of the sleep after every sample
+        jitter (float): Random fraction the sleeps are shortened by, so that
+            parallel waits don't sample at the same moments
+        expected (float): Seconds the wait is expected to take
+    """
+
+    def __init__(self, maximum, initial=1, factor=2, jitter=0.2, expected=None):
+        self.maximum = maximum
+        self.initial = min(initial, maximum)
+        self.factor = factor
+        self.jitter = jitter
+        self.expected = expected
+
+    def next_sleep(self, elapsed):
+        backoff_start = 0
+        if self.expected:
+            if elapsed < self.expected:
+                return min(self.maximum, self.expected - elapsed)
+            backoff_start = self.expected
+        # The sleeps initial, initial * factor, ... add up to the elapsed time,
+        # so the next one is computed from it without keeping any state
+        sleep = self.initial + (self.factor - 1) * (elapsed - backoff_start)
+        sleep = min(sleep, self.maximum)
+        return sleep * random.uniform(1 - self.jitter, 1)
+
+    def __repr__(self):
+        return (
+            f"BackoffPoll(maximum={self.maximum}, initial={self.initial}, "
+            f"expected={self.expected})"
+        )
+
+
+def get_poll_strategy(sleep):
+    """
+    Get the poll strategy for the sleep interval chosen by the caller,
+    according to RUN['poll_strategy']
+    Args:
+        sleep (float or PollStrategy): Sleep interval in seconds or the
+            strategy to use
+    Returns:
+        PollStrategy: 'fixed' sleeps the interval between the samples,
+            'backoff' starts by 1 second sleeps and backs off up to the
+            interval, so the samples are never sparser than the caller asked
+    """
+    if isinstance(sleep, PollStrategy):
+        return sleep
+    if not sleep or config.RUN.get("poll_strategy", "fixed") == "fixed":
+        return FixedPoll(sleep)
+    return BackoffPoll(maximum=sleep, initial=min(1, sleep))
+
 
 class TimeoutSampler(object):
     """
@@ -14,9 +114,14 @@ class TimeoutSampler(object):
     sleeps `sleep` seconds.
     Yielding the output allows you to handle every value as you wish.
     Feel free to set the instance variables.
+    The last sleep is shortened to end at the timeout, so the function is
+    sampled once more right before the timeout expires. The sampling stops by
+    DeadlineExceeded once the time budget of the bound deadline is spent.
     Args:
         timeout (int): Timeout in seconds
-        sleep (int): Sleep interval in seconds
+        sleep (int or PollStrategy): Sleep interval in seconds, the actual
+            sleeps are decided by get_poll_strategy(). A PollStrategy, e.g.
+            BackoffPoll(60, expected=600), is used as it is.
         func (function): The function to sample
         func_args: Arguments for the function
         func_kwargs: Keyword arguments for the function
@@ -26,13 +131,17 @@ class TimeoutSampler(object):
         self.timeout = timeout
         self.sleep = sleep
         # check that given timeout and sleep values makes sense
-        if self.timeout < self.sleep:
+        if not isinstance(sleep, PollStrategy) and self.timeout < self.sleep:
             raise ValueError("timeout should be larger than sleep time")
+        self.poll_strategy = get_poll_strategy(sleep)
 
         self.func = func
         self.func_args = func_args
         self.func_kwargs = func_kwargs
 
+        # Called with the sleep interval between the samples, can be replaced
+        # by a function returning earlier, e.g. once the sampled resource changed
+        self.wait = time.sleep
         # Timestamps of the first and most recent samples
         self.start_time = None
         self.last_sample_time = None
@@ -63,19 +172,66 @@ class TimeoutSampler(object):
     def __iter__(self):
         if self.start_time is None:
             self.start_time = time.time()
-        while True:
-            self.last_sample_time = time.time()
-            if self.timeout <= (self.last_sample_time - self.start_time):
-                raise self.timeout_exc_cls(*self.timeout_exc_args)
-            try:
-                yield self.func(*self.func_args, **self.func_kwargs)
-            except Exception as ex:
-                msg = f"Exception raised during iteration: {ex}"
-                log.exception(msg)
+        # The generator is suspended between the samples, so the wait span is
+        # not made the current one
+        wait_span = start_span(
+            "wait",
+            func=self.func.__name__,
+            timeout=self.timeout,
+            sleep=repr(self.poll_strategy),
+        )
+        budget = get_deadline()
+        samples = 0
+        last_log_time = None
+        last_error = None
+        try:
             if self.timeout <= (time.time() - self.start_time):
                 raise self.timeout_exc_cls(*self.timeout_exc_args)
-            log.info("Going to sleep for %d seconds before next iteration", self.sleep)
-            time.sleep(self.sleep)
+            while True:
+                self.last_sample_time = time.time()
+                samples += 1
+                try:
+                    yield self.func(*self.func_args, **self.func_kwargs)
+                except Exception as ex:
+                    msg = f"Exception raised during iteration: {ex}"
+                    if msg != last_error:
+                        log.exception(msg)
+                    else:
+                        # The same error again, the traceback was already logged
+                        log.info(msg)
+                    last_error = msg
+                elapsed = time.time() - self.start_time
+                if self.timeout <= elapsed:
+                    raise self.timeout_exc_cls(*self.timeout_exc_args)
+                sleep = min(
+                    self.poll_strategy.next_sleep(elapsed), self.timeout - elapsed
+                )
+                if budget is not None:
+                    budget.check()
+                    sleep = budget.clamp(sleep)
+                now = time.time()
+                if last_log_time is None or now - last_log_time >= LOG_INTERVAL:
+                    last_log_time = now
+                    log_level = logging.INFO
+                else:
+                    log_level = logging.DEBUG
+                log.log(
+                    log_level,
+                    "Going to sleep for %.1f seconds before next iteration "
+                    "(sample %d, %d seconds left)",
+                    sleep,
+                    samples,
+                    self.timeout - elapsed,
+                )
+                self.wait(sleep)
+        except self.timeout_exc_cls as ex:
+            wait_span.set(samples=samples, timed_out=True)
+            wait_span.end(error=ex)
+            raise
+        finally:
+            # Closed by the caller once the expected value was sampled
+            wait_span.set(samples=samples)
+            wait_span.end()
 
     def wait_for_func_value(self, value):
         """
@@ -111,10 +267,15 @@ class TimeoutSampler(object):
             )
             if not sample.wait_for_func_status(result=True):
                 raise Exception
+        Raises:
+            DeadlineExceeded: In case the time budget of the bound deadline
+                is spent, so the phase fails instead of going on
         """
         try:
             self.wait_for_func_value(result)
             return True
+        except DeadlineExceeded:
+            raise
         except self.timeout_exc_cls:
             return False
 
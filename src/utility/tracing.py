@@ -0,0 +1,276 @@
+"""
+Lightweight span tracing of the deployment.
+
+A span records the name, cluster, start time, duration and attributes of a
+piece of work, e.g. a deployment phase, a wait or an external command. Spans
+are nested through a context variable, so the spans of a forked child process
+are children of the span which started it. Every process appends its finished
+spans to its own JSONL file in the trace directory of the run, export_trace()
+merges them into a flat JSONL file and a Chrome trace JSON file which can be
+opened in chrome://tracing or https://ui.perfetto.dev.
+"""
+
+import contextvars
+import functools
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from src import framework
+
+log = logging.getLogger(__name__)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_span_file = None
+_span_file_pid = None
+_lock = threading.Lock()
+
+
+def is_enabled():
+    """
+    Returns:
+        bool: True if tracing is enabled in RUN['tracing'] and a run is
+            active, the library use outside of a run is not recorded
+    """
+    try:
+        return bool(framework.config.run_id) and framework.config.RUN.get(
+            "tracing", True
+        )
+    except Exception:
+        return False
+
+
+def get_trace_dir():
+    """
+    Returns:
+        str: Directory with the span files of the current run
+    """
+    trace_dir = framework.config.RUN.get("trace_dir", "logs")
+    return os.path.join(
+        os.path.expanduser(trace_dir), f"trace_{framework.config.run_id}"
+    )
+
+
+def _get_cluster_name():
+    try:
+        return framework.config.ENV_DATA.get("cluster_name")
+    except Exception:
+        return None
+
+
+def _write(record):
+    """
+    Append the finished span to the span file of this process, the file is
+    reopened in a forked child
+    """
+    global _span_file, _span_file_pid
+    with _lock:
+        pid = os.getpid()
+        if _span_file is None or _span_file_pid != pid:
+            trace_dir = get_trace_dir()
+            os.makedirs(trace_dir, exist_ok=True)
+            _span_file = open(os.path.join(trace_dir, f"spans-{pid}.jsonl"), "a")
+            _span_file_pid = pid
+        _span_file.write(json.dumps(record, default=str) + "\n")
+        _span_file.flush()
+
+
+class Span(object):
+    """
+    Single traced piece of work
+    Args:
+        name (str): Name of the span
+        parent_id (str): Id of the parent span
+        attributes (dict): Attributes of the span, e.g. the command
+    """
+
+    def __init__(self, name, parent_id=None, **attributes):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.parent_id = parent_id
+        self.cluster = _get_cluster_name()
+        self.attributes = attributes
+        self.start_time = time.time()
+        self.end_time = None
+        self.status = "ok"
+
+    def set(self, **attributes):
+        """
+        Add attributes to the span
+        """
+        self.attributes.update(attributes)
+
+    def end(self, error=None):
+        """
+        Finish the span and write it to the span file
+        Args:
+            error (Exception): Exception the traced work failed with
+        """
+        if self.end_time is not None:
+            return
+        self.end_time = time.time()
+        if error is not None:
+            self.status = "error"
+            self.attributes["error"] = repr(error)
+        if not is_enabled():
+            return
+        try:
+            _write(self.to_dict())
+        except Exception:
+            log.debug(f"Unable to record span {self.name}", exc_info=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "cluster": self.cluster,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "start": self.start_time,
+            "duration": self.end_time - self.start_time,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+def get_current_span():
+    """
+    Returns:
+        Span: The current span, None outside of any span
+    """
+    return _current_span.get()
+
+
+def start_span(name, **attributes):
+    """
+    Start a span which is not made the current one, e.g. for a generator
+    which is suspended between its iterations. It has to be ended by
+    Span.end()
+    Args:
+        name (str): Name of the span
+        attributes: Attributes of the span
+    Returns:
+        Span: The started span
+    """
+    parent = _current_span.get()
+    return Span(name, parent.id if parent else None, **attributes)
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Trace the work done in the with block
+    Args:
+        name (str): Name of the span
+        attributes: Attributes of the span
+    Yields:
+        Span: The span, attributes can be added by Span.set()
+    """
+    current = start_span(name, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as ex:
+        current.end(error=ex)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+
+def traced(name=None):
+    """
+    Decorator which traces every call of the function
+    Args:
+        name (str): Name of the span, defaults to the qualified function name
+    """
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def load_spans(trace_dir=None):
+    """
+    Load the spans recorded by all the processes of the run
+    Args:
+        trace_dir (str): Directory with the span files, defaults to the one
+            of the current run
+    Returns:
+        list: Spans sorted by their start time
+    """
+    spans = []
+    trace_dir = trace_dir or get_trace_dir()
+    for path in glob.glob(os.path.join(trace_dir, "spans-*.jsonl")):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    spans.append(json.loads(line))
+    return sorted(spans, key=lambda record: record["start"])
+
+
+def export_trace(trace_dir=None):
+    """
+    Merge the spans of the run into trace.jsonl (one span per line) and
+    trace.json in Chrome trace event format
+    Args:
+        trace_dir (str): Directory with the span files, defaults to the one
+            of the current run
+    Returns:
+        str: Path to the Chrome trace file, None if nothing was traced
+    """
+    trace_dir = trace_dir or get_trace_dir()
+    spans = load_spans(trace_dir)
+    if not spans:
+        return None
+    with open(os.path.join(trace_dir, "trace.jsonl"), "w") as f:
+        for record in spans:
+            f.write(json.dumps(record, default=str) + "\n")
+    events = []
+    for pid in {record["pid"] for record in spans}:
+        # Name the process track after the first span of the process
+        first = next(record for record in spans if record["pid"] == pid)
+        events.append(
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": pid,
+                "args": {"name": f"{first['name']} ({pid})"},
+            }
+        )
+    for record in spans:
+        events.append(
+            {
+                "name": record["name"],
+                "cat": record["cluster"] or "run",
+                "ph": "X",
+                "ts": int(record["start"] * 1e6),
+                "dur": int(record["duration"] * 1e6),
+                "pid": record["pid"],
+                "tid": record["tid"],
+                "args": dict(
+                    record["attributes"],
+                    cluster=record["cluster"],
+                    status=record["status"],
+                ),
+            }
+        )
+    trace_path = os.path.join(trace_dir, "trace.json")
+    with open(trace_path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+    log.info(f"Trace of the run written to {trace_path}")
+    return trace_path
@@ -3,7 +3,6 @@ import json
 import logging
 import os
 import platform
-import yaml
 import shutil
 import time
 
@@ -17,7 +16,6 @@ from src.utility.constants import (
     EXTERNAL_DIR,
     WORKER_MACHINE,
     MASTER_MACHINE,
-    MACHINECONFIGPOOL,
 )
 from src.utility.exceptions import (
     UnsupportedOSType,
@@ -29,6 +27,7 @@ from src.utility.exceptions import (
 )
 from src.utility.cmd import exec_cmd
 from src.utility.retry import retry
+from src.utility.serialization import yaml_load
 
 logger = logging.getLogger(__name__)
 
@@ -42,7 +41,7 @@ def download_installer(
     version = version or config.DEPLOYMENT["installer_version"]
     bin_dir = os.path.expanduser(bin_dir or config.RUN["bin_dir"])
     installer_filename = "openshift-install"
-    installer_binary_path = os.path.join(bin_dir, installer_filename)
+    installer_binary_path = get_installer_binary_path(bin_dir)
     if (
         os.path.isfile(installer_binary_path)
         and force_download
@@ -80,6 +79,18 @@ def download_installer(
     return installer_binary_path
 
 
+def get_installer_binary_path(bin_dir=None):
+    """
+    Get path of the openshift installer binary
+    Args:
+        bin_dir (str): Path to bin directory (default: config.RUN['bin_dir'])
+    Returns:
+        str: Path to the installer binary
+    """
+    bin_dir = os.path.expanduser(bin_dir or config.RUN["bin_dir"])
+    return os.path.join(bin_dir, "openshift-install")
+
+
 def get_openshift_client(
     version=None, bin_dir=None, force_download=False, skip_comparison=False
 ):
@@ -413,6 +424,16 @@ def is_cluster_running(cluster_path):
 
 
 def get_kube_config_path(cluster_path=""):
+    """
+    Get kubeconfig path of the cluster
+    Args:
+        cluster_path (str): Path to the cluster directory, defaults to the
+            cluster path of the current (bound) cluster context
+    Returns:
+        str: Path to the kubeconfig file
+    """
+    if not cluster_path:
+        return config.get_kubeconfig_path()
     return os.path.join(cluster_path, config.RUN.get("kubeconfig_location"))
 
 
@@ -476,7 +497,7 @@ def load_auth_config():
     auth_file = os.path.join(TOP_DIR, "data", AUTHYAML)
     try:
         with open(auth_file) as f:
-            return yaml.safe_load(f)
+            return yaml_load(f)
     except FileNotFoundError:
         logger.warning(
             f"Unable to find the authentication configuration at {auth_file}, "
@@ -586,7 +607,9 @@ def get_kube_config(cluster_path):
         return f.read()
 
 
-def wait_for_machineconfigpool_status(node_type, timeout=900, skip_tls_verify=False):
+def wait_for_machineconfigpool_status(
+    node_type, timeout=900, skip_tls_verify=False, rollout=None
+):
     """
     Check for Machineconfigpool status
 
@@ -596,32 +619,25 @@ def wait_for_machineconfigpool_status(node_type, timeout=900, skip_tls_verify=Fa
             e.g: worker, master and all if we want to check for all nodes
         timeout (int): Time in seconds to wait
         skip_tls_verify (bool): True if allow skipping TLS verification
+        rollout (MachineConfigPoolRollout): The rollout created before the
+            change, if not set the start of the rollout is detected by the
+            Updating condition of the pools
 
     """
-    logger.info("Sleeping for 60 sec to start update machineconfigpool status")
-    time.sleep(60)
     # importing here to avoid dependencies
-    from src.ocs import ocp
+    from src.ocs.resources.machine_config_pool import MachineConfigPoolRollout
 
     node_types = [node_type]
     if node_type == "all":
         node_types = [f"{WORKER_MACHINE}", f"{MASTER_MACHINE}"]
-
-    for role in node_types:
-        logger.info(f"Checking machineconfigpool status for {role} nodes")
-        ocp_obj = ocp.OCP(
-            kind=MACHINECONFIGPOOL,
-            resource_name=role,
-            skip_tls_verify=skip_tls_verify,
-        )
-        machine_count = ocp_obj.get()["status"]["machineCount"]
-
-        assert ocp_obj.wait_for_resource(
-            condition=str(machine_count),
-            column="READYMACHINECOUNT",
-            timeout=timeout,
-            sleep=5,
+    if rollout is None:
+        rollout = MachineConfigPoolRollout(
+            node_types, skip_tls_verify=skip_tls_verify, baseline=False
         )
+    rollout.wait(
+        timeout=timeout,
+        start_timeout=config.RUN.get("mcp_rollout_start_timeout", 120),
+    )
 
 
 def get_cluster_metadata(cluster_path):